@@ -12,9 +12,52 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str
+    # Run schema creation on app startup (otherwise use `python -m app.migrate`)
+    DB_AUTO_MIGRATE: bool = False
+    
+    # Connection pool, per worker process (see app/server.py for the totals)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 3600
+    # Connections this service may hold in total (PostgreSQL max_connections minus headroom)
+    DB_MAX_CONNECTIONS: int = 90
+    
+    # Monthly partitions of meals and food_analyses (PostgreSQL 15+ only)
+    DB_PARTITIONING_ENABLED: bool = True
+    PARTITION_MONTHS_AHEAD: int = 3  # upcoming monthly partitions kept created
+    PARTITION_RETENTION_MONTHS: int = 0  # archive months older than this, 0 = keep everything live
+    PARTITION_MAINTENANCE_INTERVAL_SECONDS: float = 3600.0
+    
+    # AI provider ("gemini" or "fake" for offline/load testing)
+    AI_PROVIDER: str = "gemini"
     
     # Google Gemini AI
-    GEMINI_API_KEY: str
+    GEMINI_API_KEY: str = ""
+    GEMINI_MODEL: str = "gemini-2.0-flash"
+    
+    # Fake AI provider (latency in milliseconds)
+    FAKE_AI_LATENCY_MS: float = 1500.0
+    FAKE_AI_LATENCY_SPREAD_MS: float = 500.0
+    FAKE_AI_LATENCY_DISTRIBUTION: str = "lognormal"  # constant/uniform/normal/lognormal
+    FAKE_AI_FAILURE_RATE: float = 0.0
+    FAKE_AI_SEED: int = 42
+    
+    # Batched food/photo analysis (per request and per model call)
+    AI_BATCH_MAX_ITEMS: int = 20  # per request; lower while rate limited: capacity / item cost (photos: 6)
+    AI_BATCH_ITEMS_PER_CALL: int = 6  # keeps each answer well inside the output token limit
+    AI_BATCH_MAX_PROMPT_CHARS: int = 8000
+    AI_BATCH_MAX_IMAGE_BYTES: int = 12 * 1024 * 1024  # decoded; Gemini caps inline requests at 20MB
+    
+    # Local food database, consulted before the AI for single foods
+    FOOD_DB_ENABLED: bool = True
+    FOOD_DB_MATCH_THRESHOLD: float = 0.75  # trigram similarity for answering without the AI
+    FOOD_DB_FALLBACK_THRESHOLD: float = 0.6  # looser match used when the AI is unavailable
+    
+    # AI circuit breaker
+    AI_CIRCUIT_FAILURE_THRESHOLD: int = 5
+    AI_CIRCUIT_RESET_SECONDS: float = 30.0
+    AI_CALL_TIMEOUT: float = 60.0  # per model call; a timeout counts as a failure
     
     # Security
     SECRET_KEY: str
@@ -25,6 +68,101 @@ class Settings(BaseSettings):
     DEBUG: bool = False
     BACKEND_CORS_ORIGINS: str = '["http://localhost:5173"]'
     
+    # Meal history pagination
+    MEAL_HISTORY_PAGE_SIZE: int = 20
+    MEAL_HISTORY_MAX_PAGE_SIZE: int = 100
+    
+    # Meal search (PostgreSQL text search configuration used for stemming)
+    SEARCH_TEXT_CONFIG: str = "turkish"
+    SEARCH_PAGE_SIZE: int = 20
+    SEARCH_MAX_PAGE_SIZE: int = 50
+    
+    # Long-range trends (/api/reports/trends)
+    TRENDS_DEFAULT_DAYS: int = 365
+    TRENDS_MAX_DAYS: int = 3650
+    
+    # Overnight weekly report precompute (one worker holds the lease and runs it)
+    REPORT_SCHEDULER_ENABLED: bool = True
+    REPORT_PRECOMPUTE_START_HOUR: int = 2  # server local time, off-peak window [start, end)
+    REPORT_PRECOMPUTE_END_HOUR: int = 6
+    REPORT_PRECOMPUTE_CONCURRENCY: int = 4  # concurrent AI insight calls
+    REPORT_PRECOMPUTE_BATCH_SIZE: int = 100  # users per pending-user query
+    REPORT_SCHEDULER_POLL_SECONDS: float = 60.0
+    REPORT_SCHEDULER_LEASE_SECONDS: float = 300.0
+    
+    # Rate limiting of AI endpoints (token buckets per user and per client IP)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"  # "memory" (per worker) or "database" (shared by all workers)
+    RATE_LIMIT_USER_CAPACITY: float = 30.0  # burst, in tokens (photo 5, daily 3, weekly report 2, food 1)
+    RATE_LIMIT_USER_REFILL_PER_MINUTE: float = 10.0
+    RATE_LIMIT_IP_CAPACITY: float = 60.0  # larger: several users may share an address
+    RATE_LIMIT_IP_REFILL_PER_MINUTE: float = 30.0
+    RATE_LIMIT_MEMORY_MAX_KEYS: int = 100_000
+    RATE_LIMIT_PRUNE_SECONDS: float = 300.0  # how often idle database buckets are deleted
+    
+    # Idempotency-Key support for /api/analysis/daily and /api/analysis/photo
+    IDEMPOTENCY_ENABLED: bool = True
+    IDEMPOTENCY_TTL_SECONDS: float = 24 * 3600  # how long a response is replayed
+    IDEMPOTENCY_LOCK_SECONDS: float = 120.0  # a running request's claim; taken over after this
+    IDEMPOTENCY_WAIT_SECONDS: float = 60.0  # duplicates wait this long for the first, then get 409
+    IDEMPOTENCY_POLL_SECONDS: float = 0.5  # re-check interval for keys held by another worker
+    IDEMPOTENCY_PRUNE_SECONDS: float = 300.0  # how often expired keys are deleted
+    
+    # Server-side response cache
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    RESPONSE_CACHE_MAX_ENTRY_BYTES: int = 1024 * 1024
+    
+    # Response compression (brotli is used when installed, gzip otherwise)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024
+    GZIP_COMPRESSION_LEVEL: int = 6
+    BROTLI_QUALITY: int = 4
+    
+    # Production server (python -m app.server)
+    HOST: str = "0.0.0.0"
+    PORT: int = 8000
+    WEB_CONCURRENCY: int = 0  # worker processes, 0 = one per available CPU
+    KEEP_ALIVE_SECONDS: int = 75  # longer than the proxy's idle timeout
+    LIMIT_MAX_REQUESTS: int = 0  # recycle a worker after this many requests, 0 = never
+    GRACEFUL_SHUTDOWN_SECONDS: float = 30.0  # in-flight requests / AI calls get this long to finish
+    # Peers whose X-Forwarded-For / X-Forwarded-Proto are trusted (comma-separated
+    # addresses or CIDRs). The client address (rate limits, logs) comes from the
+    # rightmost untrusted X-Forwarded-For entry, so never use "*": any client
+    # could forge its address. On Railway set it to the edge proxy's private
+    # range, FORWARDED_ALLOW_IPS=100.64.0.0/10.
+    FORWARDED_ALLOW_IPS: str = "127.0.0.1"
+    ACCESS_LOG: bool = False  # requests are already logged by QueryStatsMiddleware
+    
+    # Live updates over server-sent events
+    SSE_HEARTBEAT_SECONDS: float = 15.0  # also how often other workers' changes are picked up
+    SSE_MAX_STREAM_SECONDS: float = 600.0  # clients reconnect after this long
+    SSE_MAX_STREAMS_PER_USER: int = 5
+    SSE_QUEUE_SIZE: int = 100
+    
+    # Logging (JSON lines on stdout; "text" for local development)
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"
+    LOG_QUEUE_SIZE: int = 10_000  # records waiting to be written; more are dropped
+    
+    # Instrumentation
+    SLOW_QUERY_THRESHOLD_MS: float = 200.0
+    SERVER_TIMING_ENABLED: bool = True
+    
+    # Per-request sampling profiler (requests with X-Debug-Profile: <PROFILING_TOKEN>, or sampled)
+    PROFILING_ENABLED: bool = False
+    PROFILING_TOKEN: str = ""  # also required by /api/debug/profiles; empty disables the header
+    PROFILING_SAMPLE_RATE: float = 0.0  # fraction of all requests profiled
+    PROFILING_INTERVAL_MS: float = 5.0
+    PROFILING_DIR: str = "profiles"
+    PROFILING_MAX_FILES: int = 200
+    
+    # Readiness probe
+    READINESS_DB_CACHE_SECONDS: float = 5.0
+    READINESS_DB_TIMEOUT_SECONDS: float = 2.0
+    READINESS_POOL_SATURATION: float = 0.9
+    READINESS_REQUIRE_AI: bool = False
+    
     @property
     def cors_origins(self) -> List[str]:
         """Parse CORS origins from JSON string"""
@@ -3,9 +3,20 @@ Database configuration with PostgreSQL support for production
 """
 
 import os
-from sqlalchemy import create_engine
+import math
+import time
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import create_engine, event, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from .config import settings
+from .utils.metrics import registry, DB_POOL, DB_POOL_CHECKOUT_DURATION
+
+logger = logging.getLogger(__name__)
 
 # Get database URL from environment variable
 # Use PostgreSQL in production (Railway), SQLite in development
@@ -15,14 +26,19 @@ DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./foodtime.db")
 if DATABASE_URL.startswith("postgres://"):
     DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
+# Connection pool limits per worker process
+POOL_SIZE = settings.DB_POOL_SIZE
+MAX_OVERFLOW = settings.DB_MAX_OVERFLOW
+
 # Create engine with connection pooling for PostgreSQL
 if DATABASE_URL.startswith("postgresql://"):
     engine = create_engine(
         DATABASE_URL,
         pool_pre_ping=True,
-        pool_recycle=3600,
-        pool_size=5,
-        max_overflow=10
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_size=POOL_SIZE,
+        max_overflow=MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT
     )
 else:
     # SQLite for local development
@@ -34,6 +50,139 @@ else:
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+
+class QueryStats:
+    """SQL statement statistics collected for a single request"""
+
+    __slots__ = ("count", "total_time", "slowest_time", "slowest_statement", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement: Optional[str] = None
+        # (statement, seconds) of every statement; only kept for profiled requests
+        self.statements: Optional[list] = None
+
+    def record(self, statement: str, elapsed: float):
+        """Add one executed statement"""
+        self.count += 1
+        self.total_time += elapsed
+        if elapsed > self.slowest_time:
+            self.slowest_time = elapsed
+            self.slowest_statement = statement
+        if self.statements is not None:
+            self.statements.append((statement, elapsed))
+
+
+# Stats object for the request being served (shared with threadpool workers)
+_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+# Monotonic time of the last statement that completed successfully
+_last_query_success = 0.0
+
+
+def start_query_stats() -> QueryStats:
+    """Begin collecting query statistics for the current request"""
+    stats = QueryStats()
+    _query_stats.set(stats)
+    return stats
+
+
+def get_query_stats() -> Optional[QueryStats]:
+    """Return statistics for the current request, if collection is active"""
+    return _query_stats.get()
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+@event.listens_for(engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    global _last_query_success
+    elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+    _last_query_success = time.monotonic()
+
+    stats = _query_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+
+    if elapsed * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS:
+        logger.warning("Slow query (%.1f ms): %s", elapsed * 1000, " ".join(statement.split()))
+
+
+@event.listens_for(engine, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    connection_record.info["checkout_time"] = time.perf_counter()
+
+
+@event.listens_for(engine, "checkin")
+def _on_checkin(dbapi_connection, connection_record):
+    checked_out_at = connection_record.info.pop("checkout_time", None)
+    if checked_out_at is not None:
+        DB_POOL_CHECKOUT_DURATION.observe(time.perf_counter() - checked_out_at)
+
+
+def last_query_success() -> float:
+    """Monotonic timestamp of the last successful SQL statement (0 if none)"""
+    return _last_query_success
+
+
+# Unpooled engine for readiness probes, created on first use (PostgreSQL only)
+_probe_engine = None
+
+
+def check_connection(timeout: float):
+    """
+    Run a trivial statement; raises if the database is unreachable
+
+    On PostgreSQL the probe opens its own unpooled connection with a
+    connect timeout and a server-side statement_timeout, so a slow database
+    fails the probe within ``timeout`` seconds instead of leaving the
+    calling thread and a pooled connection stuck.
+    """
+    global _probe_engine
+    if not DATABASE_URL.startswith("postgresql://"):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        return
+
+    if _probe_engine is None:
+        _probe_engine = create_engine(
+            DATABASE_URL,
+            poolclass=NullPool,
+            connect_args={
+                "connect_timeout": max(1, math.ceil(timeout)),
+                "options": f"-c statement_timeout={int(timeout * 1000)}"
+            }
+        )
+    with _probe_engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+
+def pool_usage() -> Optional[tuple]:
+    """Return (checked out, capacity) for pooled engines, None otherwise"""
+    pool = engine.pool
+    if not hasattr(pool, "checkedout"):
+        return None
+    return pool.checkedout(), POOL_SIZE + MAX_OVERFLOW
+
+
+def _collect_pool_stats():
+    """Publish connection pool occupancy to the metrics registry"""
+    pool = engine.pool
+    if not hasattr(pool, "checkedout"):
+        return
+    DB_POOL.set(pool.size(), state="size")
+    DB_POOL.set(pool.checkedout(), state="checked_out")
+    DB_POOL.set(pool.checkedin(), state="idle")
+    DB_POOL.set(max(pool.overflow(), 0), state="overflow")
+
+
+registry.add_collector(_collect_pool_stats)
+
 def get_db():
     """
     Database session dependency
@@ -44,9 +193,48 @@ def get_db():
     finally:
         db.close()
 
+@contextmanager
+def session_scope():
+    """
+    Short-lived session for code that must not hold a pooled connection
+    across slow awaits (e.g. AI calls); the connection is returned on exit
+    """
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
 def create_tables():
     """
     Create all database tables
     """
     Base.metadata.create_all(bind=engine)
-    print("✅ Database tables created successfully")
+    
+    # create_all skips existing tables, so add columns and indexes introduced later
+    _add_missing_columns()
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
+def _add_missing_columns():
+    """
+    Add model columns that are missing from existing tables
+    
+    Only additive changes are handled; new columns need a server default
+    (or must be nullable) so existing rows stay valid.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=engine.dialect)}"
+                if column.server_default is not None:
+                    ddl += f" DEFAULT {column.server_default.arg} NOT NULL"
+                conn.execute(text(ddl))
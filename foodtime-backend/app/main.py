@@ -3,11 +3,27 @@ FOOD TIME Backend - FastAPI Application
 Main application entry point
 """
 
-from fastapi import FastAPI
+import logging
+
+from fastapi import FastAPI, Request
+from fastapi.exception_handlers import http_exception_handler
+from fastapi.responses import PlainTextResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.exceptions import HTTPException as StarletteHTTPException
 from .config import settings
-from .database import create_tables
-from .routers import users_router, meals_router, analysis_router, auth_router, dashboard_router, nutrition_router, reports_router
+from .utils.log_config import configure_logging
+from .database import engine
+from .migrate import migrate
+from .middleware import QueryStatsMiddleware, MetricsMiddleware, CompressionMiddleware, ProfilingMiddleware, RequestIdMiddleware
+from .utils.metrics import render_metrics
+from .services.ai_provider import ai_service
+from .services.report_scheduler import report_scheduler
+from .services.partitioning import partition_maintainer
+from .routers import users_router, meals_router, analysis_router, auth_router, dashboard_router, nutrition_router, reports_router, health_router, events_router, debug_router
+
+# JSON log records through a background queue (see app/utils/log_config.py)
+configure_logging()
+logger = logging.getLogger(__name__)
 
 # Create FastAPI application
 app = FastAPI(
@@ -15,7 +31,8 @@ app = FastAPI(
     description="Nutrition tracking and analysis API powered by Google Gemini AI",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS
@@ -25,8 +42,25 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "ETag", "X-Profile-Id", "X-Request-ID", "Idempotent-Replayed"],
 )
 
+# gzip / brotli for JSON and text bodies above COMPRESSION_MIN_SIZE
+app.add_middleware(CompressionMiddleware)
+
+# Opt-in sampling profiler (X-Debug-Profile header or PROFILING_SAMPLE_RATE);
+# inside QueryStatsMiddleware so profiles include the request's SQL
+app.add_middleware(ProfilingMiddleware)
+
+# Per-request SQL statement counting (Server-Timing header + request log)
+app.add_middleware(QueryStatsMiddleware)
+
+# Request latency / status / in-flight metrics exposed at /metrics
+app.add_middleware(MetricsMiddleware)
+
+# Request ids for logs and the X-Request-ID header (outermost)
+app.add_middleware(RequestIdMiddleware)
+
 # Include routers
 app.include_router(auth_router)  # Auth router first (no auth required)
 app.include_router(dashboard_router)
@@ -35,15 +69,61 @@ app.include_router(reports_router)
 app.include_router(users_router)
 app.include_router(meals_router)
 app.include_router(analysis_router)
+app.include_router(health_router)
+app.include_router(events_router)
+app.include_router(debug_router)
 
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database tables on startup"""
-    create_tables()
-    print("✅ Database tables created successfully")
-    print(f"✅ FOOD TIME Backend is running on port 8000")
-    print(f"📚 API Documentation: http://localhost:8000/docs")
+    """
+    Log startup information
+    
+    Schema changes run out of band (`python -m app.migrate`, the deploy
+    pre-step) so restarts and new replicas don't touch DDL; set
+    DB_AUTO_MIGRATE=true to create tables on startup for local setups.
+    """
+    if settings.DB_AUTO_MIGRATE:
+        migrate()
+        logger.info("Database tables created successfully")
+    report_scheduler.start()
+    partition_maintainer.start()
+    logger.info("FOOD TIME Backend is running on port %s", settings.PORT)
+    logger.info("API Documentation: http://localhost:%s/docs", settings.PORT)
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """
+    Let in-flight AI calls finish, then close pooled connections
+    
+    The server stops accepting connections and waits for open requests
+    first (GRACEFUL_SHUTDOWN_SECONDS); this covers AI calls that outlive
+    their request, e.g. when a client disconnects mid-analysis.
+    """
+    await report_scheduler.stop()
+    await partition_maintainer.stop()
+    remaining = await ai_service.drain(settings.GRACEFUL_SHUTDOWN_SECONDS)
+    if remaining:
+        logger.warning("Shutting down with %d AI call(s) still running", remaining)
+    engine.dispose()
+
+
+@app.exception_handler(StarletteHTTPException)
+async def log_server_errors(request: Request, exc: StarletteHTTPException):
+    """
+    Log 5xx responses with the error that caused them
+    
+    Routers turn failures into HTTPException(500, ...), which is otherwise
+    returned without a trace in the logs.
+    """
+    if exc.status_code >= 500:
+        cause = exc.__cause__ or exc.__context__
+        logger.error(
+            "%s %s failed: %s", request.method, request.url.path, exc.detail,
+            exc_info=(type(cause), cause, cause.__traceback__) if cause is not None else None
+        )
+    return await http_exception_handler(request, exc)
 
 
 @app.get("/")
@@ -56,13 +136,10 @@ async def root():
     }
 
 
-@app.get("/health")
-async def health_check():
-    """Health check endpoint"""
-    return {
-        "status": "healthy",
-        "service": "FOOD TIME Backend"
-    }
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition of in-process metrics"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
 
 
 if __name__ == "__main__":
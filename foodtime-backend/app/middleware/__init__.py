@@ -0,0 +1,11 @@
+"""
+Middleware package initialization
+"""
+
+from .query_stats import QueryStatsMiddleware
+from .metrics import MetricsMiddleware
+from .compression import CompressionMiddleware
+from .profiling import ProfilingMiddleware
+from .request_id import RequestIdMiddleware
+
+__all__ = ["QueryStatsMiddleware", "MetricsMiddleware", "CompressionMiddleware", "ProfilingMiddleware", "RequestIdMiddleware"]
@@ -0,0 +1,181 @@
+"""
+Negotiated gzip / brotli response compression middleware
+"""
+
+import gzip
+from typing import Optional
+
+from ..config import settings
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "image/svg+xml",
+    "text/",
+)
+
+# Streams must reach the client as they are produced
+EXCLUDED_TYPES = ("text/event-stream",)
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Pick the best supported encoding from an Accept-Encoding header
+
+    Args:
+        accept_encoding: Raw Accept-Encoding header value
+        
+    Returns:
+        "br", "gzip" or None when the client accepts neither
+    """
+    weights = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[token] = quality
+
+    wildcard = weights.get("*", 0.0)
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best, best_quality = None, 0.0
+    for encoding in candidates:
+        quality = weights.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """ETag of the encoded representation: '"abc"' -> '"abc-gzip"' (strength kept)"""
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def _add_vary(headers: list) -> list:
+    """Headers with Accept-Encoding added to Vary"""
+    for index, (name, value) in enumerate(headers):
+        if name == b"vary":
+            if b"accept-encoding" not in value.lower() and value.strip() != b"*":
+                headers[index] = (name, value + b", Accept-Encoding")
+            return headers
+    return headers + [(b"vary", b"Accept-Encoding")]
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress a response body with the negotiated encoding"""
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=settings.GZIP_COMPRESSION_LEVEL)
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware that compresses complete JSON and text responses
+
+    Only single-message bodies above ``COMPRESSION_MIN_SIZE`` are
+    compressed; streaming responses (including server-sent events), 204/304
+    responses and already-encoded bodies pass through untouched. A
+    compressed response gets a strong ETag of its own, suffixed with the
+    encoding (``"abc-gzip"``), which ``routers.conditional`` accepts in
+    If-None-Match. Every response that could have been compressed, and
+    every 304, carries ``Vary: Accept-Encoding``, so shared caches keep the
+    representations apart whether or not this one was compressed.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.COMPRESSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+
+        encoding = choose_encoding(accept_encoding)
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+
+            if message["type"] == "http.response.start":
+                if message["status"] == 304:
+                    message = {**message, "headers": _add_vary(list(message.get("headers", [])))}
+                    passthrough = True
+                elif not self._compressible(message):
+                    passthrough = True
+                else:
+                    message = {**message, "headers": _add_vary(list(message.get("headers", [])))}
+                    passthrough = encoding is None
+                if passthrough:
+                    await send(message)
+                else:
+                    start_message = message
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            if message.get("more_body", False):
+                # Streaming body: send as-is
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            if len(body) < settings.COMPRESSION_MIN_SIZE:
+                await send(start_message)
+                await send(message)
+                return
+
+            compressed = compress(body, encoding)
+            headers = []
+            for name, value in start_message.get("headers", []):
+                if name == b"content-length":
+                    continue
+                if name == b"etag":
+                    value = encoded_etag(value.decode("latin-1"), encoding).encode("latin-1")
+                headers.append((name, value))
+            headers.append((b"content-encoding", encoding.encode("latin-1")))
+            headers.append((b"content-length", str(len(compressed)).encode("latin-1")))
+
+            await send({**start_message, "headers": headers})
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
+
+    @staticmethod
+    def _compressible(message) -> bool:
+        """Check whether a response start message allows compression"""
+        if message["status"] in (204, 304) or message["status"] < 200:
+            return False
+
+        content_type = ""
+        for name, value in message.get("headers", []):
+            if name == b"content-encoding":
+                return False
+            if name == b"content-type":
+                content_type = value.decode("latin-1").lower()
+
+        if content_type.startswith(EXCLUDED_TYPES):
+            return False
+        return content_type.startswith(COMPRESSIBLE_TYPES)
@@ -0,0 +1,44 @@
+"""
+Request metrics middleware
+"""
+
+import time
+
+from ..utils.metrics import HTTP_REQUESTS, HTTP_REQUEST_DURATION, HTTP_IN_FLIGHT
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request latency, status and in-flight count
+
+    Requests are labelled with the route template (``/api/meals/{meal_id}``)
+    rather than the raw path so label cardinality stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - started, method=method, route=route_path)
+            HTTP_REQUESTS.inc(method=method, route=route_path, status=str(status_code))
@@ -0,0 +1,99 @@
+"""
+Opt-in per-request sampling profiler middleware
+"""
+
+import asyncio
+import hmac
+import logging
+import random
+import time
+from urllib.parse import parse_qsl, urlencode
+
+from ..config import settings
+from ..database import get_query_stats
+from ..services.profiler import profile_store
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-debug-profile"
+
+# Query parameters carrying credentials (EventSource sends the JWT as ?token=)
+SECRET_PARAMS = {"token", "access_token", "refresh_token", "password"}
+
+
+def _authorized(scope) -> bool:
+    """Whether the request carries X-Debug-Profile with the configured token"""
+    if not settings.PROFILING_TOKEN:
+        return False
+    for name, value in scope["headers"]:
+        if name == PROFILE_HEADER:
+            return hmac.compare_digest(value, settings.PROFILING_TOKEN.encode("latin-1"))
+    return False
+
+
+def _safe_query_string(query_string: bytes) -> str:
+    """Query string with credential parameters removed, fit to be written to disk"""
+    if not query_string:
+        return ""
+    params = parse_qsl(query_string.decode("latin-1"), keep_blank_values=True)
+    return urlencode([(name, value) for name, value in params if name.lower() not in SECRET_PARAMS])
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling requests that ask for it or are sampled
+
+    A request is profiled when it sends ``X-Debug-Profile: <PROFILING_TOKEN>``
+    or falls within PROFILING_SAMPLE_RATE, and no other request is being
+    profiled. The profile id is returned in an ``X-Profile-Id`` header; the
+    profile (collapsed stacks and SQL statements) is written once the
+    response has been sent and can be fetched from /api/debug/profiles.
+    Must sit inside QueryStatsMiddleware, whose statistics collect the SQL.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or not settings.PROFILING_ENABLED
+            or not (_authorized(scope) or random.random() < settings.PROFILING_SAMPLE_RATE)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        profiler = profile_store.try_start()
+        if profiler is None:
+            await self.app(scope, receive, send)
+            return
+
+        stats = get_query_stats()
+        if stats is not None:
+            stats.statements = []
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message.setdefault("headers", []).append((b"x-profile-id", profiler.id.encode("latin-1")))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            meta = {
+                "method": scope["method"],
+                "path": scope["path"],
+                "query_string": _safe_query_string(scope.get("query_string", b"")),
+                "status": status_code,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+                "interval_ms": settings.PROFILING_INTERVAL_MS
+            }
+            queries = stats.statements if stats is not None else []
+            try:
+                await asyncio.to_thread(profile_store.finish, profiler, meta, queries)
+            except OSError as e:
+                logger.warning("Could not write profile %s: %s", profiler.id, e)
@@ -0,0 +1,74 @@
+"""
+Per-request SQL instrumentation middleware
+"""
+
+import logging
+import time
+
+from ..config import settings
+from ..database import start_query_stats
+from ..utils.log_config import get_request_context
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStatsMiddleware:
+    """
+    ASGI middleware that records SQL statements issued by each request
+
+    Adds query count, total DB time, slowest statement time and AI time to
+    a ``Server-Timing`` response header and writes one log record per
+    request with the same timings as structured fields.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = start_query_stats()
+        context = get_request_context()
+        started = time.perf_counter()
+        status_code = 500
+
+        def ai_time() -> float:
+            return context.ai_time if context is not None else 0.0
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if settings.SERVER_TIMING_ENABLED:
+                    timing = (
+                        f'db;dur={stats.total_time * 1000:.1f};desc="{stats.count} queries", '
+                        f"db-slowest;dur={stats.slowest_time * 1000:.1f}, "
+                        f"ai;dur={ai_time() * 1000:.1f}, "
+                        f"app;dur={(time.perf_counter() - started) * 1000:.1f}"
+                    )
+                    message.setdefault("headers", []).append((b"server-timing", timing.encode("latin-1")))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - started
+            route = getattr(scope.get("route"), "path", None)
+            logger.info(
+                "%s %s %s %.1fms", scope["method"], scope["path"], status_code, duration * 1000,
+                extra={
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "route": route,
+                    "status": status_code,
+                    "duration_ms": round(duration * 1000, 1),
+                    "db_queries": stats.count,
+                    "db_ms": round(stats.total_time * 1000, 1),
+                    "db_slowest_ms": round(stats.slowest_time * 1000, 1),
+                    "db_slowest": " ".join(stats.slowest_statement.split())[:200] if stats.slowest_statement else None,
+                    "ai_calls": context.ai_calls if context is not None else 0,
+                    "ai_ms": round(ai_time() * 1000, 1)
+                }
+            )
@@ -0,0 +1,45 @@
+"""
+Request id middleware
+"""
+
+import re
+
+from ..utils.log_config import start_request_context
+
+REQUEST_ID_HEADER = b"x-request-id"
+
+# Ids accepted from the client or proxy; anything else is replaced
+REQUEST_ID_PATTERN = re.compile(rb"^[A-Za-z0-9._-]{1,64}$")
+
+
+class RequestIdMiddleware:
+    """
+    ASGI middleware assigning each request an id
+
+    Reuses a well-formed ``X-Request-ID`` sent by the client or proxy,
+    otherwise generates one, and returns it in the response's
+    ``X-Request-ID`` header. The id is kept in the request context, so every
+    log record emitted while serving the request (in routers, services,
+    threadpool workers and AI calls) carries it. Must be the outermost
+    middleware.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = next((value for name, value in scope["headers"] if name == REQUEST_ID_HEADER), None)
+        if incoming is not None and not REQUEST_ID_PATTERN.match(incoming):
+            incoming = None
+        context = start_request_context(incoming.decode("ascii") if incoming else None)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", []).append((REQUEST_ID_HEADER, context.request_id.encode("ascii")))
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
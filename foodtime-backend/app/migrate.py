@@ -0,0 +1,54 @@
+"""
+Database migration command
+
+Creates tables, additive columns and indexes for the current models, moves
+inline analysis texts into the compressed side table, creates the meal
+search table (filled from existing meals when first created) and, on
+PostgreSQL, partitions meals and food_analyses by month. Run once per
+deploy, before the new release starts serving:
+
+    python -m app.migrate
+"""
+
+import logging
+import sys
+import time
+
+from .database import create_tables, engine
+from .services.analysis_texts import migrate_legacy_texts, prune_orphaned_texts
+from .services.partitioning import backfill_partition_keys, partition_tables, partitioning_enabled
+from .services.search_service import create_search_index, rebuild_search_index
+from .utils.log_config import configure_logging
+
+logger = logging.getLogger(__name__)
+
+
+def migrate():
+    """Apply schema changes for the current models"""
+    create_tables()
+    with engine.connect() as conn:
+        migrate_legacy_texts(conn)
+    with engine.begin() as conn:
+        prune_orphaned_texts(conn)
+        if create_search_index(conn):
+            rebuild_search_index(conn)
+        backfill_partition_keys(conn)
+        if partitioning_enabled(conn):
+            partition_tables(conn)
+
+
+def main() -> int:
+    """Command line entry point"""
+    configure_logging()
+    started = time.perf_counter()
+    try:
+        migrate()
+    except Exception:
+        logger.exception("Migration failed on %s", engine.dialect.name)
+        return 1
+    logger.info("Database schema up to date (%s, %.2fs)", engine.dialect.name, time.perf_counter() - started)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
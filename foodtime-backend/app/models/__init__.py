@@ -5,5 +5,10 @@ Models package initialization
 from .user import User
 from .meal import Meal
 from .food_analysis import FoodAnalysis
+from .analysis_text import AnalysisText
+from .weekly_report import WeeklyReport
+from .scheduler_lease import SchedulerLease
+from .rate_limit_bucket import RateLimitBucket
+from .idempotency_key import IdempotencyKey
 
-__all__ = ["User", "Meal", "FoodAnalysis"]
+__all__ = ["User", "Meal", "FoodAnalysis", "AnalysisText", "WeeklyReport", "SchedulerLease", "RateLimitBucket", "IdempotencyKey"]
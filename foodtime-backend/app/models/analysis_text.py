@@ -0,0 +1,70 @@
+"""
+AnalysisText Model - compressed AI analysis prose, stored by content
+"""
+
+import hashlib
+import zlib
+from datetime import datetime
+from typing import Iterable, Tuple
+
+from sqlalchemy import Column, String, LargeBinary, DateTime
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from ..database import Base
+
+COMPRESSION_LEVEL = 6
+
+
+class AnalysisText(Base):
+    """
+    Analysis text keyed by the SHA-256 of its content
+
+    Kept out of ``food_analyses`` so aggregates over the numeric columns
+    scan narrow rows; identical texts (e.g. food database answers) are
+    stored once.
+    """
+    __tablename__ = "analysis_texts"
+
+    digest = Column(String(64), primary_key=True)
+    body = Column(LargeBinary, nullable=False)  # zlib-compressed UTF-8
+    # Last time a writer stored this text; orphans are pruned after a grace period
+    touched_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    @property
+    def content(self) -> str:
+        """Decompressed text"""
+        return decode_text(self.body)
+
+    def __repr__(self):
+        return f"<AnalysisText(digest='{self.digest[:12]}')>"
+
+
+def encode_text(content: str) -> Tuple[str, bytes]:
+    """Digest and compressed body of a text"""
+    raw = content.encode("utf-8")
+    return hashlib.sha256(raw).hexdigest(), zlib.compress(raw, COMPRESSION_LEVEL)
+
+
+def decode_text(body: bytes) -> str:
+    """Text of a compressed body"""
+    return zlib.decompress(body).decode("utf-8")
+
+
+def store_texts(conn: Connection, texts: Iterable[Tuple[str, bytes]]):
+    """
+    Insert (digest, body) pairs; digests already stored are only touched
+
+    Uses INSERT ... ON CONFLICT DO UPDATE, so concurrent writers of the
+    same text do not conflict, and a reused text is not pruned as an
+    orphan before the analysis referencing it commits.
+    """
+    now = datetime.utcnow()
+    rows = [{"digest": digest, "body": body, "touched_at": now} for digest, body in dict(texts).items()]
+    if not rows:
+        return
+    dialect = postgresql if conn.dialect.name == "postgresql" else sqlite
+    statement = dialect.insert(AnalysisText)
+    conn.execute(
+        statement.on_conflict_do_update(index_elements=["digest"], set_={"touched_at": statement.excluded.touched_at}),
+        rows
+    )
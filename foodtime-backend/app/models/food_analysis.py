@@ -2,21 +2,28 @@
 FoodAnalysis Model - AI analysis results for meals
 """
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Float
-from sqlalchemy.orm import relationship
+from typing import Optional
+
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, Float, Index, event, inspect
+from sqlalchemy.orm import relationship, Session
 from datetime import datetime
 from ..database import Base
+from .analysis_text import encode_text, store_texts
 
 
 class FoodAnalysis(Base):
     """AI analysis results table"""
     __tablename__ = "food_analyses"
+    __table_args__ = (
+        Index("ix_food_analyses_meal_id", "meal_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     meal_id = Column(Integer, ForeignKey("meals.id"), nullable=True)
+    # Copy of the meal's date: the partition key on PostgreSQL, so filter on it too
+    meal_date = Column(Date, nullable=True)
     
     analysis_type = Column(String(50))  # gunluk, besin, foto
-    analysis_result = Column(Text)
     health_score = Column(Float, nullable=True)
     
     # Nutritional data
@@ -25,10 +32,50 @@ class FoodAnalysis(Base):
     carbs = Column(Float, nullable=True)
     fat = Column(Float, nullable=True)
     
+    # Narrative text, stored compressed in analysis_texts (see analysis_result)
+    text_digest = Column(String(64), ForeignKey("analysis_texts.digest"), nullable=True, index=True)
+    
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
     meal = relationship("Meal", back_populates="analyses")
+    stored_text = relationship("AnalysisText", lazy="select")
+    
+    @property
+    def analysis_result(self) -> Optional[str]:
+        """
+        Analysis text, loaded and decompressed on first access
+    
+        Queries over the other columns never read it; load it eagerly with
+        ``selectinload(FoodAnalysis.stored_text)`` when listing many.
+        """
+        if "_text" not in self.__dict__:
+            self._text = self.stored_text.content if self.stored_text is not None else None
+        return self._text
+    
+    @analysis_result.setter
+    def analysis_result(self, value: Optional[str]):
+        self._text = value
+        if value is None:
+            self._encoded_text = None
+            self.text_digest = None
+        else:
+            self._encoded_text = encode_text(value)
+            self.text_digest = self._encoded_text[0]
     
     def __repr__(self):
         return f"<FoodAnalysis(id={self.id}, type='{self.analysis_type}')>"
+
+
+@event.listens_for(Session, "before_flush")
+def _store_analysis_texts(session, flush_context, instances):
+    """Insert the texts of new or re-texted analyses ahead of the rows referencing them"""
+    texts = [
+        obj._encoded_text
+        for obj in [*session.new, *session.dirty]
+        if isinstance(obj, FoodAnalysis)
+        and obj.__dict__.get("_encoded_text") is not None
+        and inspect(obj).attrs.text_digest.history.has_changes()
+    ]
+    if texts:
+        store_texts(session.connection(), texts)
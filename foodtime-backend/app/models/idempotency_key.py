@@ -0,0 +1,30 @@
+"""
+IdempotencyKey Model - stored responses of requests sent with an Idempotency-Key
+"""
+
+from sqlalchemy import Column, String, Integer, Float, LargeBinary
+from ..database import Base
+
+
+class IdempotencyKey(Base):
+    """
+    One Idempotency-Key of one client on one endpoint
+
+    A row without ``status_code`` is a request still running; its
+    ``expires_at`` is the owner's lock, after which another request may
+    take the key over (the owner is presumed dead). ``claim_token`` tells
+    the owner's completion apart from that of a request it replaced.
+    Completed rows keep the response until ``expires_at``.
+    """
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String(200), primary_key=True)  # "<endpoint>:<client>:<Idempotency-Key>"
+    fingerprint = Column(String(64), nullable=False)  # SHA-256 of the request body
+    status_code = Column(Integer, nullable=True)
+    body = Column(LargeBinary, nullable=True)
+    claim_token = Column(String(32), nullable=True)  # random per claim
+    # Unix time; expired rows are taken over on reuse and pruned
+    expires_at = Column(Float, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<IdempotencyKey(key='{self.key}', status_code={self.status_code})>"
@@ -2,7 +2,7 @@
 Meal database model
 """
 
-from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from ..database import Base
@@ -11,6 +11,10 @@ from ..database import Base
 class Meal(Base):
     """Daily meal entries table"""
     __tablename__ = "meals"
+    __table_args__ = (
+        # Access path for per-user history pages ordered by (meal_date, id)
+        Index("ix_meals_user_date_id", "user_id", "meal_date", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
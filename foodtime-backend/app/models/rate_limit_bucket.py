@@ -0,0 +1,21 @@
+"""
+RateLimitBucket Model - token buckets shared by all workers
+"""
+
+from sqlalchemy import Column, String, Float, Boolean
+from ..database import Base
+
+
+class RateLimitBucket(Base):
+    """Token bucket state for one rate limit key (e.g. "user:42", "ip:10.0.0.1")"""
+    __tablename__ = "rate_limit_buckets"
+
+    key = Column(String(100), primary_key=True)
+    tokens = Column(Float, nullable=False)
+    # Unix time of the last update; tokens are refilled lazily from it
+    updated_at = Column(Float, nullable=False, index=True)
+    # Whether the last take() was granted (returned by the atomic upsert)
+    granted = Column(Boolean, nullable=False, default=True)
+
+    def __repr__(self):
+        return f"<RateLimitBucket(key='{self.key}', tokens={self.tokens})>"
@@ -0,0 +1,18 @@
+"""
+SchedulerLease Model - leader election for background jobs
+"""
+
+from sqlalchemy import Column, String, DateTime
+from ..database import Base
+
+
+class SchedulerLease(Base):
+    """Time-limited lease; the worker holding it runs the named job"""
+    __tablename__ = "scheduler_leases"
+    
+    name = Column(String(100), primary_key=True)
+    holder = Column(String(255), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    
+    def __repr__(self):
+        return f"<SchedulerLease(name='{self.name}', holder='{self.holder}')>"
@@ -32,6 +32,9 @@ class User(Base):
     daily_carbs_target = Column(Integer, default=250)
     daily_fat_target = Column(Integer, default=70)
     
+    # Bumped on every meal / analysis / profile write; drives ETags and caches
+    data_version = Column(Integer, nullable=False, default=0, server_default="0")
+    
     # Relationships
     meals = relationship("Meal", back_populates="user", cascade="all, delete-orphan")
     
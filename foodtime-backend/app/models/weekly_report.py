@@ -0,0 +1,29 @@
+"""
+WeeklyReport Model - precomputed weekly reports
+"""
+
+from sqlalchemy import Column, Integer, Date, DateTime, ForeignKey, Text, UniqueConstraint
+from datetime import datetime
+from ..database import Base
+
+
+class WeeklyReport(Base):
+    """Rendered weekly report per user and completed week"""
+    __tablename__ = "weekly_reports"
+    __table_args__ = (
+        UniqueConstraint("user_id", "week_start", name="uq_weekly_reports_user_week"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    week_start = Column(Date, nullable=False)  # Monday
+    
+    # Response body (WeeklyReportResponse JSON), served as-is
+    payload = Column(Text, nullable=False)
+    
+    # User's data_version the report was computed from
+    data_version = Column(Integer, nullable=False)
+    generated_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<WeeklyReport(user_id={self.user_id}, week_start={self.week_start})>"
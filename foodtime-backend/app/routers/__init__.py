@@ -9,5 +9,8 @@ from .auth import router as auth_router
 from .dashboard import router as dashboard_router
 from .nutrition import router as nutrition_router
 from .reports import router as reports_router
+from .health import router as health_router
+from .events import router as events_router
+from .debug import router as debug_router
 
-__all__ = ["users_router", "meals_router", "analysis_router", "auth_router", "dashboard_router", "nutrition_router", "reports_router"]
+__all__ = ["users_router", "meals_router", "analysis_router", "auth_router", "dashboard_router", "nutrition_router", "reports_router", "health_router", "events_router", "debug_router"]
@@ -2,40 +2,47 @@
 Analysis API routes for AI-powered food analysis
 """
 
+from typing import Awaitable, Callable
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from ..database import get_db
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func
+from ..config import settings
+from ..database import session_scope
 from ..schemas.analysis import (
     DailyAnalysisRequest,
     FoodQueryRequest,
     PhotoAnalysisRequest,
-    AnalysisResponse
+    BatchFoodQueryRequest,
+    BatchPhotoAnalysisRequest,
+    AnalysisResponse,
+    BatchAnalysisResponse
 )
-from ..services.gemini_service import gemini_service
+from ..schemas.meal import MealCreate
+from ..services.ai_provider import ai_service
 from ..services.meal_service import MealService
+from ..services.user_service import UserService
+from ..services.response_cache import response_cache
+from ..services.event_bus import event_bus
+from ..services.search_service import SearchService
+from ..services.report_service import ReportService
 from ..models.food_analysis import FoodAnalysis
+from ..models.meal import Meal
 from ..models.user import User
-from .auth import get_current_user
+from .auth import get_current_user_detached
+from .rate_limit import max_batch_items, rate_limit, rate_limit_per_item
+from .idempotency import idempotency, IdempotentCall
 from datetime import date
 
 router = APIRouter(prefix="/api/analysis", tags=["analysis"])
 
 
-@router.post("/daily", response_model=AnalysisResponse)
-async def analyze_daily_meals(
-    request: DailyAnalysisRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """
-    Analyze daily meals and provide recommendations for current user
-    """
-    try:
-        # Get meal history for context
-        meal_history = MealService.get_meal_history(db, current_user.id, days=10)
+def _load_history_context(user_id: int) -> list:
+    """Read recent meals for the AI prompt in a short transaction"""
+    with session_scope() as db:
+        meal_history = MealService.get_meal_history(db, user_id, days=10)
         
         # Format history for AI
-        history_data = [
+        return [
             {
                 "date": str(meal.meal_date),
                 "morning": meal.morning_meal,
@@ -44,62 +51,123 @@ async def analyze_daily_meals(
             }
             for meal in meal_history
         ]
-        
-        # Call Gemini AI
-        result = await gemini_service.analyze_daily_meals(
-            morning=request.morning_meal,
-            afternoon=request.afternoon_meal,
-            evening=request.evening_meal,
-            meal_history=history_data
-        )
-        
-        analysis_text = result["analysis"]
-        health_score = result.get("health_score")
-        calories = result.get("calories")
-        protein = result.get("protein")
-        carbs = result.get("carbs")
-        fat = result.get("fat")
-        
-        # Save analysis to database
-        # First, create or get today's meal
-        from ..schemas.meal import MealCreate
-        meal_data = MealCreate(
-            user_id=current_user.id,
-            meal_date=date.today(),
-            morning_meal=request.morning_meal,
-            morning_feeling=request.morning_feeling,
-            afternoon_meal=request.afternoon_meal,
-            afternoon_feeling=request.afternoon_feeling,
-            evening_meal=request.evening_meal,
-            evening_feeling=request.evening_feeling
-        )
-        
-        existing_meal = MealService.get_meal_by_date(db, current_user.id, date.today())
+
+
+def _save_daily_analysis(user_id: int, request: DailyAnalysisRequest, result: dict):
+    """Upsert today's meal and store the analysis in a short transaction"""
+    meal_data = MealCreate(
+        user_id=user_id,
+        meal_date=date.today(),
+        morning_meal=request.morning_meal,
+        morning_feeling=request.morning_feeling,
+        afternoon_meal=request.afternoon_meal,
+        afternoon_feeling=request.afternoon_feeling,
+        evening_meal=request.evening_meal,
+        evening_feeling=request.evening_feeling
+    )
+    
+    with session_scope() as db:
+        # One transaction for meal and analysis: the search row, week
+        # invalidation and data version are written once, and the
+        # "analysis.completed" event below covers the meal change too
+        existing_meal = MealService.get_meal_by_date(db, user_id, date.today())
         if existing_meal:
-            meal = MealService.update_meal(db, existing_meal.id, meal_data.model_dump(exclude={"user_id"}))
+            meal = existing_meal
+            for field, value in meal_data.model_dump(exclude={"user_id"}).items():
+                setattr(meal, field, value)
         else:
-            meal = MealService.create_meal(db, meal_data)
+            meal = Meal(**meal_data.model_dump())
+            db.add(meal)
+        db.flush()
         
         # Save analysis with health score and nutrition
         analysis = FoodAnalysis(
             meal_id=meal.id,
+            meal_date=meal.meal_date,
             analysis_type="gunluk",
-            analysis_result=analysis_text,
-            health_score=health_score,
-            calories=calories,
-            protein=protein,
-            carbs=carbs,
-            fat=fat
+            analysis_result=result["analysis"],
+            health_score=result.get("health_score"),
+            calories=result.get("calories"),
+            protein=result.get("protein"),
+            carbs=result.get("carbs"),
+            fat=result.get("fat")
         )
         db.add(analysis)
+        db.flush()
+        SearchService.index_meal(db, meal.id)
+        ReportService.invalidate_week(db, user_id, meal.meal_date)
+        
+        # Today's score as the dashboard computes it, so clients can patch in place
+        day_health_score = db.query(func.avg(FoodAnalysis.health_score)).filter(
+            FoodAnalysis.meal_id == meal.id,
+            FoodAnalysis.meal_date == meal.meal_date,
+            FoodAnalysis.health_score.isnot(None),
+            FoodAnalysis.health_score != 0
+        ).scalar()
+        
+        event = {
+            "meal_id": meal.id,
+            "meal_date": meal.meal_date.isoformat(),
+            "meal_created": existing_meal is None,
+            "description": MealService.describe_meal(meal),
+            "analysis_id": analysis.id,
+            "health_score": result.get("health_score"),
+            "day_health_score": round(day_health_score, 1) if day_health_score is not None else 0.0,
+            "calories": result.get("calories"),
+            "protein": result.get("protein"),
+            "carbs": result.get("carbs"),
+            "fat": result.get("fat")
+        }
+        event["data_version"] = UserService.bump_data_version(db, user_id)
         db.commit()
+    
+    response_cache.invalidate_user(user_id)
+    event_bus.publish(user_id, "analysis.completed", event)
+
+
+@router.post("/daily", response_model=AnalysisResponse)
+async def analyze_daily_meals(
+    request: DailyAnalysisRequest,
+    current_user: User = Depends(get_current_user_detached),
+    idempotent: IdempotentCall = Depends(idempotency("daily"))
+):
+    """
+    Analyze daily meals and provide recommendations for current user
+    
+    Database work runs in two short transactions in the threadpool, one
+    before and one after the AI call, so no pooled connection is held (and
+    the event loop is not blocked) during the model round-trip. Retries
+    sent with the same Idempotency-Key get the stored response instead of
+    another AI call and analysis row.
+    """
+    if idempotent.replay is not None:
+        return idempotent.replay
+    
+    try:
+        # Get meal history for context
+        history_data = await run_in_threadpool(_load_history_context, current_user.id)
         
-        return AnalysisResponse(
-            analysis_result=analysis_text,
-            health_score=health_score,
-            analysis_type="gunluk"
+        # Call Gemini AI
+        result = await ai_service.analyze_daily_meals(
+            morning=request.morning_meal,
+            afternoon=request.afternoon_meal,
+            evening=request.evening_meal,
+            meal_history=history_data
         )
         
+        # Save today's meal and the analysis
+        await run_in_threadpool(_save_daily_analysis, current_user.id, request, result)
+        
+        return await idempotent.store(AnalysisResponse(
+            analysis_result=result["analysis"],
+            health_score=result.get("health_score"),
+            analysis_type="gunluk",
+            calories=result.get("calories"),
+            protein=result.get("protein"),
+            carbs=result.get("carbs"),
+            fat=result.get("fat")
+        ))
+        
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -107,19 +175,29 @@ async def analyze_daily_meals(
         )
 
 
-@router.post("/food", response_model=AnalysisResponse)
+def _food_response(result: dict) -> AnalysisResponse:
+    """Build the response for one food result (database answers carry nutrition values)"""
+    return AnalysisResponse(
+        analysis_result=result["analysis"],
+        health_score=result["health_score"],
+        analysis_type="besin",
+        calories=result.get("calories"),
+        protein=result.get("protein"),
+        carbs=result.get("carbs"),
+        fat=result.get("fat"),
+        source=result.get("source", "ai")
+    )
+
+
+@router.post("/food", response_model=AnalysisResponse, dependencies=[Depends(rate_limit("food"))])
 async def analyze_food(request: FoodQueryRequest):
     """
     Analyze specific food or ingredient
     """
     try:
-        result = await gemini_service.analyze_food(request.food_description)
+        result = await ai_service.analyze_food(request.food_description)
         
-        return AnalysisResponse(
-            analysis_result=result["analysis"],
-            health_score=result["health_score"],
-            analysis_type="besin"
-        )
+        return _food_response(result)
         
     except Exception as e:
         raise HTTPException(
@@ -129,21 +207,98 @@ async def analyze_food(request: FoodQueryRequest):
 
 
 @router.post("/photo", response_model=AnalysisResponse)
-async def analyze_photo(request: PhotoAnalysisRequest):
+async def analyze_photo(
+    request: PhotoAnalysisRequest,
+    idempotent: IdempotentCall = Depends(idempotency("photo"))
+):
     """
     Analyze food from uploaded photo
+    
+    Retries sent with the same Idempotency-Key get the stored response.
     """
+    if idempotent.replay is not None:
+        return idempotent.replay
+    
     try:
-        result = await gemini_service.analyze_photo(
+        result = await ai_service.analyze_photo(
             request.image_base64,
             request.mime_type
         )
         
-        return AnalysisResponse(
+        return await idempotent.store(AnalysisResponse(
             analysis_result=result["analysis"],
             health_score=result["health_score"],
             analysis_type="foto"
+        ))
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Photo analysis failed: {str(e)}"
+        )
+
+
+def _check_batch_size(endpoint: str, count: int):
+    """Reject batches larger than max_batch_items(endpoint)"""
+    limit = max_batch_items(endpoint)
+    if count > limit:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {limit} items per batch"
+        )
+
+
+@router.post("/food/batch", response_model=BatchAnalysisResponse)
+async def analyze_food_batch(
+    request: BatchFoodQueryRequest,
+    charge: Callable[[int], Awaitable[None]] = Depends(rate_limit_per_item("food"))
+):
+    """
+    Analyze several foods or ingredients in as few AI calls as possible
+
+    At most AI_BATCH_MAX_ITEMS foods (20), and no more than the rate limit
+    pays for at once (RATE_LIMIT_USER_CAPACITY at 1 token per food).
+    """
+    _check_batch_size("food", len(request.food_descriptions))
+    await charge(len(request.food_descriptions))
+    
+    try:
+        results = await ai_service.analyze_food_batch(request.food_descriptions)
+        
+        return BatchAnalysisResponse(items=[_food_response(result) for result in results])
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Food analysis failed: {str(e)}"
         )
+
+
+@router.post("/photo/batch", response_model=BatchAnalysisResponse)
+async def analyze_photo_batch(
+    request: BatchPhotoAnalysisRequest,
+    charge: Callable[[int], Awaitable[None]] = Depends(rate_limit_per_item("photo"))
+):
+    """
+    Analyze several food photos in as few AI calls as possible
+
+    At most AI_BATCH_MAX_ITEMS photos, and no more than the rate limit pays
+    for at once: 5 tokens per photo, so 6 with the default user capacity.
+    """
+    _check_batch_size("photo", len(request.images))
+    await charge(len(request.images))
+    
+    try:
+        results = await ai_service.analyze_photo_batch([image.model_dump() for image in request.images])
+        
+        return BatchAnalysisResponse(items=[
+            AnalysisResponse(
+                analysis_result=result["analysis"],
+                health_score=result["health_score"],
+                analysis_type="foto"
+            )
+            for result in results
+        ])
         
     except Exception as e:
         raise HTTPException(
@@ -5,7 +5,7 @@ Authentication router with signup and login endpoints
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
-from ..database import get_db
+from ..database import get_db, session_scope
 from ..models.user import User
 from ..schemas.auth import SignupRequest, LoginRequest, TokenResponse
 from ..schemas.user import UserResponse
@@ -31,6 +31,30 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     Raises:
         HTTPException: If token is invalid or user not found
     """
+    return _authenticate(token, db)
+
+
+def get_current_user_detached(token: str = Depends(oauth2_scheme)) -> User:
+    """
+    Dependency returning the authenticated user without pinning a connection
+    
+    The user is loaded in its own short session which is closed before the
+    endpoint runs, so handlers that await slow AI calls do not keep a pooled
+    connection checked out for the whole request. The returned object is
+    detached: its columns are loaded, relationships are not.
+    
+    Args:
+        token: JWT token from Authorization header
+        
+    Returns:
+        Detached User object
+    """
+    with session_scope() as db:
+        return _authenticate(token, db)
+
+
+def _authenticate(token: str, db: Session) -> User:
+    """Resolve a JWT token to an active user or raise 401/400"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
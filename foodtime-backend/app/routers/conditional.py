@@ -0,0 +1,140 @@
+"""
+Conditional GET and versioned response caching for per-user read endpoints
+"""
+
+import hashlib
+from datetime import date
+from typing import Any, Callable, Optional
+
+import orjson
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+from ..config import settings
+from ..middleware.compression import encoded_etag
+from ..models.user import User
+from ..services.response_cache import response_cache
+from ..utils.metrics import record_cache_lookup
+from .auth import get_current_user, get_current_user_detached
+
+CACHE_CONTROL = "private, no-cache"
+
+# Content codings the compression middleware may tag ETags with
+ENCODINGS = ("gzip", "br")
+
+
+def compute_etag(user: User, request: Request) -> str:
+    """
+    Strong ETag for a user's view of an endpoint
+
+    Derived from the user's data version, the route and query string and
+    today's date (dashboards and reports are relative to today), so it can
+    be computed before any aggregation runs.
+    """
+    query = "&".join(sorted(f"{key}={value}" for key, value in request.query_params.multi_items()))
+    raw = f"{user.id}:{user.data_version}:{request.url.path}?{query}:{date.today().isoformat()}"
+    return '"' + hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> Optional[str]:
+    """
+    Check an If-None-Match header value against an ETag
+
+    The compression middleware tags encoded representations with the
+    encoding appended (``"abc-gzip"``), so those match as well; comparison
+    is weak, as RFC 9110 specifies for If-None-Match.
+
+    Returns:
+        The matching validator to send back with the 304 (the client's own
+        representation), or None
+    """
+    if not if_none_match:
+        return None
+    variants = {etag} | {encoded_etag(etag, encoding) for encoding in ENCODINGS}
+    for candidate in (value.strip() for value in if_none_match.split(",")):
+        if candidate == "*":
+            return etag
+        opaque = candidate[2:] if candidate.startswith("W/") else candidate
+        if opaque in variants:
+            return opaque
+    return None
+
+
+def render_json(content: Any) -> bytes:
+    """
+    Serialize a payload to JSON bytes
+
+    Response models go straight through pydantic-core; anything else is
+    handed to orjson, which handles dates and datetimes natively.
+    """
+    if isinstance(content, BaseModel):
+        return content.model_dump_json().encode("utf-8")
+    return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+class VersionedView:
+    """
+    Per-request handle on a cacheable, versioned response
+
+    ``hit`` holds a ready response when the server-side cache already has
+    this version; otherwise the endpoint computes its payload and returns
+    ``store(payload)``, which renders, caches and tags it.
+    """
+
+    def __init__(self, user_id: int, etag: str):
+        self.user_id = user_id
+        self.etag = etag
+        self.hit: Optional[Response] = None
+
+        if settings.RESPONSE_CACHE_ENABLED:
+            body = response_cache.get(user_id, etag)
+            if body is not None:
+                self.hit = self._response(body)
+
+    def _headers(self) -> dict:
+        return {"ETag": self.etag, "Cache-Control": CACHE_CONTROL}
+
+    def _response(self, body: bytes) -> Response:
+        return Response(content=body, media_type="application/json", headers=self._headers())
+
+    def store(self, content: Any) -> Response:
+        """Render a payload, keep it in the cache and return the response"""
+        return self.store_rendered(render_json(content))
+
+    def store_rendered(self, body: bytes) -> Response:
+        """Like ``store`` for a body that is already rendered JSON"""
+        if settings.RESPONSE_CACHE_ENABLED:
+            response_cache.set(self.user_id, self.etag, body)
+        return self._response(body)
+
+
+def versioned_view_dependency(user_dependency: Callable) -> Callable:
+    """
+    Build a dependency that answers If-None-Match with 304 before the
+    endpoint body runs, and otherwise returns a VersionedView
+
+    Args:
+        user_dependency: Dependency providing the current user
+    """
+    def versioned_view(
+        request: Request,
+        current_user: User = Depends(user_dependency)
+    ) -> VersionedView:
+        etag = compute_etag(current_user, request)
+        matched = etag_matches(request.headers.get("if-none-match"), etag)
+        record_cache_lookup("etag", matched is not None)
+
+        if matched is not None:
+            raise HTTPException(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers={"ETag": matched, "Cache-Control": CACHE_CONTROL}
+            )
+
+        return VersionedView(current_user.id, etag)
+
+    return versioned_view
+
+
+versioned_view = versioned_view_dependency(get_current_user)
+versioned_view_detached = versioned_view_dependency(get_current_user_detached)
@@ -12,19 +12,32 @@ from ..database import get_db
 from ..models.user import User
 from ..models.meal import Meal
 from ..models.food_analysis import FoodAnalysis
+from ..services.meal_service import MealService
+from ..schemas.dashboard import (
+    DashboardStatsResponse,
+    DashboardToday,
+    DashboardSummary,
+    TrendPoint,
+    RecentMeal
+)
 from .auth import get_current_user
+from .conditional import versioned_view, VersionedView
 
 router = APIRouter(prefix="/api/dashboard", tags=["dashboard"])
 
 
-@router.get("/stats")
+@router.get("/stats", response_model=DashboardStatsResponse)
 async def get_dashboard_stats(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    view: VersionedView = Depends(versioned_view)
 ):
     """
     Get aggregated statistics for dashboard display
     """
+    if view.hit is not None:
+        return view.hit
+    
     try:
         today = date.today()
         week_ago = today - timedelta(days=6)  # Last 7 days including today
@@ -34,21 +47,26 @@ async def get_dashboard_stats(
             Meal.user_id == current_user.id
         ).order_by(desc(Meal.meal_date)).all()
         
+        # Analysis scores of this week's and the recent meals, in one query
+        wanted = {m.id: m.meal_date for m in all_meals if m.meal_date >= week_ago}
+        wanted.update((m.id, m.meal_date) for m in all_meals[:5])
+        meal_scores = {}
+        if wanted:
+            rows = db.query(FoodAnalysis.meal_id, FoodAnalysis.health_score).filter(
+                FoodAnalysis.meal_id.in_(list(wanted)),
+                FoodAnalysis.meal_date >= min(wanted.values())
+            ).order_by(FoodAnalysis.meal_id, FoodAnalysis.id).all()
+            for meal_id, score in rows:
+                meal_scores.setdefault(meal_id, []).append(score)
+        
+        def day_score(day_meals):
+            """Average non-zero analysis score of a day's meals"""
+            scores = [score for m in day_meals for score in meal_scores.get(m.id, []) if score]
+            return sum(scores) / len(scores) if scores else 0.0
+        
         # Today's stats
         today_meals = [m for m in all_meals if m.meal_date == today]
-        today_analyses = []
-        today_health_score = 0.0
-        
-        if today_meals:
-            for meal in today_meals:
-                analyses = db.query(FoodAnalysis).filter(
-                    FoodAnalysis.meal_id == meal.id
-                ).all()
-                today_analyses.extend(analyses)
-            
-            if today_analyses:
-                scores = [a.health_score for a in today_analyses if a.health_score]
-                today_health_score = sum(scores) / len(scores) if scores else 0.0
+        today_health_score = day_score(today_meals)
         
         # Week trend (last 7 days)
         week_trend = []
@@ -56,50 +74,22 @@ async def get_dashboard_stats(
             day = today - timedelta(days=i)
             day_meals = [m for m in all_meals if m.meal_date == day]
             
-            if day_meals:
-                day_analyses = []
-                for meal in day_meals:
-                    analyses = db.query(FoodAnalysis).filter(
-                        FoodAnalysis.meal_id == meal.id
-                    ).all()
-                    day_analyses.extend(analyses)
-                
-                if day_analyses:
-                    scores = [a.health_score for a in day_analyses if a.health_score]
-                    avg_score = sum(scores) / len(scores) if scores else 0.0
-                else:
-                    avg_score = 0.0
-            else:
-                avg_score = 0.0
-            
-            week_trend.append({
-                "date": day.isoformat(),
-                "score": round(avg_score, 1)
-            })
+            week_trend.append(TrendPoint(
+                date=day,
+                score=round(day_score(day_meals), 1)
+            ))
         
-        # Recent meals (last 5)
+        # Recent meals (last 5), scored by their first analysis
         recent_meals = []
         for meal in all_meals[:5]:
-            # Get the meal's analysis
-            analysis = db.query(FoodAnalysis).filter(
-                FoodAnalysis.meal_id == meal.id
-            ).first()
-            
-            # Determine meal type and description
-            meal_parts = []
-            if meal.morning_meal:
-                meal_parts.append(f"Sabah: {meal.morning_meal[:50]}")
-            if meal.afternoon_meal:
-                meal_parts.append(f"Öğle: {meal.afternoon_meal[:50]}")
-            if meal.evening_meal:
-                meal_parts.append(f"Akşam: {meal.evening_meal[:50]}")
+            scores = meal_scores.get(meal.id)
             
-            recent_meals.append({
-                "id": meal.id,
-                "date": meal.meal_date.isoformat(),
-                "description": " | ".join(meal_parts) if meal_parts else "Öğün detayı yok",
-                "health_score": analysis.health_score if analysis else 0.0
-            })
+            recent_meals.append(RecentMeal(
+                id=meal.id,
+                date=meal.meal_date,
+                description=MealService.describe_meal(meal),
+                health_score=(scores[0] or 0.0) if scores else 0.0
+            ))
         
         # Calculate streak (consecutive days with meals)
         streak_days = 0
@@ -124,24 +114,24 @@ async def get_dashboard_stats(
             avg_score = 0.0
         
         # Calculate week average
-        week_scores = [day["score"] for day in week_trend if day["score"] > 0]
+        week_scores = [day.score for day in week_trend if day.score > 0]
         week_avg = sum(week_scores) / len(week_scores) if week_scores else 0.0
         
-        return {
-            "today": {
-                "health_score": round(today_health_score, 1),
-                "meals_logged": len(today_meals),
-                "date": today.isoformat()
-            },
-            "week_trend": week_trend,
-            "recent_meals": recent_meals,
-            "summary": {
-                "total_meals": len(all_meals),
-                "avg_score": round(avg_score, 1),
-                "week_avg": round(week_avg, 1),
-                "streak_days": streak_days
-            }
-        }
+        return view.store(DashboardStatsResponse(
+            today=DashboardToday(
+                health_score=round(today_health_score, 1),
+                meals_logged=len(today_meals),
+                date=today
+            ),
+            week_trend=week_trend,
+            recent_meals=recent_meals,
+            summary=DashboardSummary(
+                total_meals=len(all_meals),
+                avg_score=round(avg_score, 1),
+                week_avg=round(week_avg, 1),
+                streak_days=streak_days
+            )
+        ))
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching dashboard stats: {str(e)}")
@@ -0,0 +1,64 @@
+"""
+Debug routes for retrieving request profiles
+"""
+
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
+
+from ..config import settings
+from ..services.profiler import profile_store
+
+router = APIRouter(prefix="/api/debug", tags=["debug"])
+
+
+def require_profiling_token(x_debug_profile: Optional[str] = Header(None)):
+    """
+    Allow access only with ``X-Debug-Profile: <PROFILING_TOKEN>``
+    
+    The routes answer 404 while profiling is disabled or has no token.
+    """
+    if not settings.PROFILING_ENABLED or not settings.PROFILING_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    # Compare bytes: compare_digest rejects str with non-ASCII characters
+    if x_debug_profile is None or not hmac.compare_digest(
+        x_debug_profile.encode("latin-1"), settings.PROFILING_TOKEN.encode("latin-1")
+    ):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid profiling token")
+
+
+@router.get("/profiles", dependencies=[Depends(require_profiling_token)])
+async def list_profiles():
+    """
+    Stored profiles, newest first
+    
+    Summaries only (request, status, duration, sample and query counts);
+    fetch a profile by id for its stacks and SQL statements.
+    """
+    return {"profiles": await run_in_threadpool(profile_store.list)}
+
+
+@router.get("/profiles/{profile_id}", dependencies=[Depends(require_profiling_token)])
+async def get_profile(profile_id: str):
+    """Profile with its collapsed stacks and the request's SQL statements"""
+    profile = await run_in_threadpool(profile_store.get, profile_id)
+    if profile is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return profile
+
+
+@router.get("/profiles/{profile_id}/collapsed", response_class=PlainTextResponse,
+            dependencies=[Depends(require_profiling_token)])
+async def get_collapsed_stacks(profile_id: str):
+    """
+    Profile stacks in collapsed format
+    
+    Feed to flamegraph.pl or load into speedscope to get a flame graph.
+    """
+    profile = await run_in_threadpool(profile_store.get, profile_id)
+    if profile is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return PlainTextResponse(profile_store.collapsed(profile))
@@ -0,0 +1,121 @@
+"""
+Live update stream (server-sent events) for dashboard clients
+"""
+
+import time
+from typing import Optional
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from fastapi.security import OAuth2PasswordBearer
+from starlette.background import BackgroundTask
+
+from ..config import settings
+from ..database import session_scope
+from ..models.user import User
+from ..services.event_bus import event_bus, Event
+from .auth import _authenticate
+
+router = APIRouter(prefix="/api/events", tags=["events"])
+
+# EventSource cannot send headers, so the token may also come as ?token=
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login", auto_error=False)
+
+# Client reconnect delay sent with the first message
+RETRY_MS = 5000
+
+
+def format_event(event: Event) -> bytes:
+    """Encode an event in the text/event-stream format"""
+    head = f"id: {event.id}\n" if event.id else ""
+    return f"{head}event: {event.type}\ndata: ".encode("utf-8") + orjson.dumps(event.data) + b"\n\n"
+
+
+def _load_user(token: str) -> User:
+    """Authenticate in a short session; the stream itself holds no connection"""
+    with session_scope() as db:
+        return _authenticate(token, db)
+
+
+def _current_data_version(user_id: int) -> Optional[int]:
+    """Read the user's data version (None if the user is gone)"""
+    with session_scope() as db:
+        return db.query(User.data_version).filter(User.id == user_id).scalar()
+
+
+@router.get("/stream")
+async def stream_events(
+    token: Optional[str] = Query(None, description="JWT, for clients that cannot set headers"),
+    header_token: Optional[str] = Depends(optional_oauth2_scheme)
+):
+    """
+    Stream the current user's meal and analysis changes
+
+    Events:
+        ready: sent on connect with the current data_version; clients
+            should refetch if they may have missed changes while disconnected
+        analysis.completed: a daily analysis was saved, with its score and
+            macro values (deltas) and today's recomputed score
+        meal.created / meal.updated / meal.deleted: meal changed
+        sync: data changed in a way not described by an event (another
+            worker, or the client fell behind); clients should refetch
+
+    A comment line is sent every SSE_HEARTBEAT_SECONDS to keep proxies from
+    closing the connection. The stream is cancelled when the client
+    disconnects and ends on its own after SSE_MAX_STREAM_SECONDS so clients
+    reconnect (EventSource does so automatically).
+    """
+    credentials = header_token or token
+    if not credentials:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    user = await run_in_threadpool(_load_user, credentials)
+
+    # Take the slot now, not when the body starts, so concurrent connects can't all pass
+    subscription = event_bus.subscribe(user.id, limit=settings.SSE_MAX_STREAMS_PER_USER)
+    if subscription is None:
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Too many open event streams")
+
+    async def event_stream():
+        last_version = user.data_version
+        started = time.monotonic()
+        try:
+            yield f"retry: {RETRY_MS}\n\n".encode("utf-8")
+            yield format_event(Event(id=0, type="ready", data={"data_version": last_version}))
+
+            while time.monotonic() - started < settings.SSE_MAX_STREAM_SECONDS:
+                event = await subscription.next_event(settings.SSE_HEARTBEAT_SECONDS)
+                if event is not None:
+                    version = event.data.get("data_version")
+                    if version is not None:
+                        last_version = max(last_version, version)
+                    yield format_event(event)
+                    continue
+
+                # Quiet period: pick up changes made by other workers
+                version = await run_in_threadpool(_current_data_version, user.id)
+                if version is None:
+                    break
+                if version > last_version:
+                    last_version = version
+                    yield format_event(Event(id=0, type="sync", data={"data_version": version}))
+                else:
+                    yield b": keep-alive\n\n"
+        finally:
+            event_bus.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        },
+        # Also frees the slot if the client left before the body started
+        background=BackgroundTask(event_bus.unsubscribe, subscription),
+    )
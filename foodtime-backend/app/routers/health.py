@@ -0,0 +1,120 @@
+"""
+Health check routes for liveness and readiness probes
+"""
+
+import asyncio
+import time
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from ..config import settings
+from ..database import check_connection, last_query_success, pool_usage
+from ..services.ai_provider import ai_service
+from ..services.circuit_breaker import CircuitBreaker
+
+router = APIRouter(tags=["health"])
+
+
+class DatabaseProbe:
+    """
+    Cached, time-bounded database connectivity check
+
+    A statement that succeeded recently (from regular traffic) counts as a
+    passing probe, so busy instances never issue probe queries. Otherwise a
+    single ``SELECT 1`` is run, shared by concurrent callers and cached for
+    READINESS_DB_CACHE_SECONDS.
+    """
+
+    def __init__(self):
+        self._checked_at = 0.0
+        self._healthy = False
+        self._error = None
+        self._lock = asyncio.Lock()
+
+    async def check(self) -> dict:
+        now = time.monotonic()
+        ttl = settings.READINESS_DB_CACHE_SECONDS
+
+        if now - last_query_success() < ttl:
+            return {"status": "ok", "source": "traffic"}
+
+        async with self._lock:
+            if time.monotonic() - self._checked_at >= ttl:
+                try:
+                    # The database enforces the timeout (see check_connection);
+                    # wait_for only bounds the wait for the result
+                    await asyncio.wait_for(
+                        asyncio.to_thread(check_connection, settings.READINESS_DB_TIMEOUT_SECONDS),
+                        timeout=settings.READINESS_DB_TIMEOUT_SECONDS + 1
+                    )
+                    self._healthy, self._error = True, None
+                except asyncio.TimeoutError:
+                    self._healthy, self._error = False, "timeout"
+                except Exception as e:
+                    self._healthy, self._error = False, type(e).__name__
+                self._checked_at = time.monotonic()
+
+        result = {"status": "ok" if self._healthy else "error", "source": "probe"}
+        if self._error:
+            result["error"] = self._error
+        return result
+
+
+database_probe = DatabaseProbe()
+
+
+@router.get("/health")
+async def health_check():
+    """Health check endpoint (liveness)"""
+    return {
+        "status": "healthy",
+        "service": "FOOD TIME Backend"
+    }
+
+
+@router.get("/health/live")
+async def liveness():
+    """Liveness probe: the process is up and serving requests"""
+    return {"status": "alive"}
+
+
+@router.get("/health/ready")
+async def readiness():
+    """
+    Readiness probe
+
+    Returns 503 when the database is unreachable or the connection pool is
+    saturated (and, with READINESS_REQUIRE_AI, when the AI circuit is open).
+    """
+    checks = {"database": await database_probe.check()}
+    ready = checks["database"]["status"] == "ok"
+
+    usage = pool_usage()
+    if usage is not None:
+        checked_out, capacity = usage
+        saturation = checked_out / capacity if capacity else 0.0
+        pool_ok = saturation < settings.READINESS_POOL_SATURATION
+        checks["pool"] = {
+            "status": "ok" if pool_ok else "saturated",
+            "checked_out": checked_out,
+            "capacity": capacity
+        }
+        ready = ready and pool_ok
+
+    breaker = ai_service.circuit_breaker
+    circuit_state = breaker.state
+    checks["ai"] = {
+        "status": "ok" if circuit_state == CircuitBreaker.CLOSED else "degraded",
+        "provider": ai_service.name,
+        "circuit": circuit_state
+    }
+    if circuit_state == CircuitBreaker.OPEN:
+        checks["ai"]["retry_after"] = round(breaker.retry_after(), 1)
+        if settings.READINESS_REQUIRE_AI:
+            ready = False
+
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "not_ready", "checks": checks}
+    )
@@ -0,0 +1,112 @@
+"""
+Idempotency-Key dependency for expensive POST endpoints
+"""
+
+import math
+import re
+from typing import Any, Optional
+
+from fastapi import Depends, Header, HTTPException, Request, status
+from fastapi.responses import Response
+
+from ..config import settings
+from ..services.idempotency import idempotency_store, fingerprint, CLAIMED, REPLAY, MISMATCH
+from ..utils.auth_utils import decode_access_token
+from .conditional import render_json
+from .rate_limit import enforce_rate_limit, optional_oauth2_scheme
+
+# Keys accepted from clients (UUIDs and similar)
+KEY_PATTERN = re.compile(r"^[A-Za-z0-9_.:-]{1,100}$")
+
+
+class IdempotentCall:
+    """
+    Per-request handle on an idempotent endpoint call
+
+    ``replay`` holds the stored response when the key was already used
+    with the same body; otherwise the endpoint computes its payload and
+    returns ``await store(payload)``, which renders it and keeps it for
+    retries.
+    """
+
+    def __init__(self, key: Optional[str] = None):
+        self.key = key
+        # Claim token from the store, required to complete or release the key
+        self.token: Optional[str] = None
+        self.replay: Optional[Response] = None
+        self.stored = False
+
+    async def store(self, content: Any, status_code: int = 200) -> Response:
+        """Render a payload, keep it for retries and return the response"""
+        body = render_json(content)
+        if self.key is not None:
+            await idempotency_store.complete(self.key, self.token, status_code, body)
+            self.stored = True
+        return Response(content=body, status_code=status_code, media_type="application/json")
+
+
+def idempotency(endpoint: str):
+    """
+    Dependency factory for endpoints honouring ``Idempotency-Key``
+
+    Also charges the endpoint's rate limit (replaces ``rate_limit``), but
+    only for requests that will run: replays and duplicates that waited
+    for the first request are free. Keys are scoped to the endpoint and
+    the client (bearer token subject, else IP address). Without the header
+    the endpoint behaves as before.
+
+    Raises:
+        HTTPException: 400 for malformed keys, 422 when the key was used
+            with a different body, 409 with Retry-After when the first
+            request is still running after IDEMPOTENCY_WAIT_SECONDS
+    """
+    async def dependency(
+        request: Request,
+        idempotency_key: Optional[str] = Header(None),
+        token: Optional[str] = Depends(optional_oauth2_scheme)
+    ):
+        user_id = decode_access_token(token) if token else None
+        if idempotency_key is None or not settings.IDEMPOTENCY_ENABLED:
+            await enforce_rate_limit(request, endpoint, user_id)
+            yield IdempotentCall()
+            return
+
+        if not KEY_PATTERN.match(idempotency_key):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid Idempotency-Key")
+        if user_id is not None:
+            client = f"user:{user_id}"
+        else:
+            client = f"ip:{request.client.host if request.client else '-'}"
+        call = IdempotentCall(f"{endpoint}:{client}:{idempotency_key}")
+
+        outcome, result = await idempotency_store.acquire(call.key, fingerprint(await request.body()))
+        if outcome == REPLAY:
+            call.replay = Response(
+                content=result.body,
+                status_code=result.status_code,
+                media_type="application/json",
+                headers={"Idempotent-Replayed": "true"}
+            )
+            yield call
+            return
+        if outcome == MISMATCH:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used with a different request"
+            )
+        if outcome != CLAIMED:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is still in progress",
+                headers={"Retry-After": str(math.ceil(settings.IDEMPOTENCY_POLL_SECONDS))}
+            )
+
+        call.token = result
+        try:
+            await enforce_rate_limit(request, endpoint, user_id)
+            yield call
+        finally:
+            if not call.stored:
+                await idempotency_store.release(call.key, call.token)
+
+    return dependency
@@ -4,11 +4,13 @@ Meal API routes (Protected - requires authentication)
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from datetime import date
+from ..config import settings
 from ..database import get_db
-from ..schemas.meal import MealCreate, MealResponse
+from ..schemas.meal import MealCreate, MealResponse, MealPageResponse, MealSearchResponse
 from ..services.meal_service import MealService
+from ..services.search_service import SearchService
 from ..models.user import User
 from ..models.meal import Meal
 from .auth import get_current_user
@@ -47,6 +49,64 @@ def get_my_meal_history(
     return meals
 
 
+@router.get("/history/page", response_model=MealPageResponse)
+def get_my_meal_history_page(
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page"),
+    limit: Optional[int] = Query(None, ge=1, description="Page size"),
+    from_date: Optional[date] = Query(None, description="Earliest meal date (inclusive)"),
+    to_date: Optional[date] = Query(None, description="Latest meal date (inclusive)"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get meal history for current user one page at a time, newest first"""
+    page_size = min(limit or settings.MEAL_HISTORY_PAGE_SIZE, settings.MEAL_HISTORY_MAX_PAGE_SIZE)
+    
+    if from_date and to_date and from_date > to_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="from_date must not be after to_date"
+        )
+    
+    try:
+        meals, next_cursor = MealService.get_meal_history_page(
+            db, current_user.id, page_size, cursor, from_date, to_date
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    return MealPageResponse(items=meals, next_cursor=next_cursor, has_more=next_cursor is not None)
+
+
+@router.get("/search", response_model=MealSearchResponse)
+def search_my_meals(
+    q: str = Query(..., min_length=1, max_length=200, description="Words to search for"),
+    limit: Optional[int] = Query(None, ge=1, description="Page size"),
+    offset: int = Query(0, ge=0, description="Results to skip (next_offset from the previous page)"),
+    include_analysis: bool = Query(True, description="Also search stored AI analyses"),
+    order: str = Query("rank", pattern="^(rank|recent)$", description="rank (best match first) or recent"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Full-text search over the current user's meals and their analyses
+    
+    Every word must match. Matches in the meal texts rank above matches
+    that only appear in an analysis; use order=recent for questions like
+    "when did I last eat menemen?".
+    """
+    page_size = min(limit or settings.SEARCH_PAGE_SIZE, settings.SEARCH_MAX_PAGE_SIZE)
+    
+    rows, has_more = SearchService.search(
+        db, current_user.id, q, page_size, offset, include_analysis, order
+    )
+    
+    return MealSearchResponse(
+        items=rows,
+        next_offset=offset + len(rows) if has_more else None,
+        has_more=has_more
+    )
+
+
 @router.get("/{meal_id}", response_model=MealResponse)
 def get_meal(
     meal_id: int,
@@ -11,19 +11,25 @@ from ..database import get_db
 from ..models.user import User
 from ..models.meal import Meal
 from ..models.food_analysis import FoodAnalysis
+from ..schemas.nutrition import DailyNutritionResponse, MacroAmounts, MacroTargets
 from .auth import get_current_user
+from .conditional import versioned_view, VersionedView
 
 router = APIRouter(prefix="/api/nutrition", tags=["nutrition"])
 
 
-@router.get("/daily")
+@router.get("/daily", response_model=DailyNutritionResponse)
 async def get_daily_nutrition(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    view: VersionedView = Depends(versioned_view)
 ):
     """
     Get today's nutrition totals and compare with user targets
     """
+    if view.hit is not None:
+        return view.hit
+    
     try:
         today = date.today()
         
@@ -41,7 +47,8 @@ async def get_daily_nutrition(
         
         for meal in today_meals:
             analyses = db.query(FoodAnalysis).filter(
-                FoodAnalysis.meal_id == meal.id
+                FoodAnalysis.meal_id == meal.id,
+                FoodAnalysis.meal_date == meal.meal_date
             ).all()
             
             for analysis in analyses:
@@ -70,16 +77,16 @@ async def get_daily_nutrition(
             "fat": round((total_fat / targets["fat"]) * 100, 1) if targets["fat"] > 0 else 0
         }
         
-        return {
-            "consumed": {
-                "calories": round(total_calories, 1),
-                "protein": round(total_protein, 1),
-                "carbs": round(total_carbs, 1),
-                "fat": round(total_fat, 1)
-            },
-            "targets": targets,
-            "percentages": percentages
-        }
+        return view.store(DailyNutritionResponse(
+            consumed=MacroAmounts(
+                calories=round(total_calories, 1),
+                protein=round(total_protein, 1),
+                carbs=round(total_carbs, 1),
+                fat=round(total_fat, 1)
+            ),
+            targets=MacroTargets(**targets),
+            percentages=MacroAmounts(**percentages)
+        ))
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching nutrition data: {str(e)}")
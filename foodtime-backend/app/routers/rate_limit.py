@@ -0,0 +1,96 @@
+"""
+Rate limiting dependency for AI-backed endpoints
+"""
+
+import math
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import OAuth2PasswordBearer
+
+from ..config import settings
+from ..services.rate_limiter import rate_limiter, max_units, retry_after_header
+from ..utils.auth_utils import decode_access_token
+
+# Like the auth scheme, but a missing token is not an error here
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login", auto_error=False)
+
+
+async def enforce_rate_limit(request: Request, endpoint: str, user_id: Optional[int] = None, units: int = 1):
+    """
+    Charge a call against the client's buckets or raise 429
+
+    The IP key is the client address as resolved by the server: the peer
+    itself, or the X-Forwarded-For entry added by a proxy listed in
+    FORWARDED_ALLOW_IPS (app/server.py), so clients cannot pick their key.
+
+    Args:
+        request: Current request (its client address is the IP key)
+        endpoint: Key of ENDPOINT_COSTS
+        user_id: Authenticated user, if any
+        units: Items in the call (batch endpoints pay per item)
+
+    Raises:
+        HTTPException: 429 with Retry-After when a bucket is short, 413 when
+            the call costs more than a full bucket (too many batch items)
+    """
+    client_ip = request.client.host if request.client else None
+    denied = await rate_limiter.check(endpoint, client_ip, user_id, units)
+    if denied is not None:
+        scope, retry_after = denied
+        if math.isinf(retry_after):
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"At most {max_units(endpoint, scope)} items per request under the rate limit",
+            )
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Rate limit exceeded ({scope}), retry later",
+            headers={"Retry-After": retry_after_header(retry_after)},
+        )
+
+
+def rate_limit(endpoint: str):
+    """
+    Dependency factory charging one call of ``endpoint``
+
+    The user bucket is keyed by the bearer token's subject, verified but
+    not looked up, so rejected calls never reach the database; requests
+    without a valid token are limited by IP only.
+    """
+    async def dependency(request: Request, token: Optional[str] = Depends(optional_oauth2_scheme)):
+        user_id = decode_access_token(token) if token else None
+        await enforce_rate_limit(request, endpoint, user_id)
+
+    return dependency
+
+
+def max_batch_items(endpoint: str) -> int:
+    """
+    Largest batch of ``endpoint`` a client can send
+
+    AI_BATCH_MAX_ITEMS, lowered while rate limiting is on to what a full
+    bucket pays for (with the default limits: 20 foods, 6 photos), so an
+    allowed batch size can never be refused for its cost alone.
+    """
+    if not settings.RATE_LIMIT_ENABLED:
+        return settings.AI_BATCH_MAX_ITEMS
+    return min(settings.AI_BATCH_MAX_ITEMS, max_units(endpoint, "user"), max_units(endpoint, "ip"))
+
+
+def rate_limit_per_item(endpoint: str):
+    """
+    Dependency factory for batch endpoints
+
+    Resolves the client like ``rate_limit`` and returns an async
+    ``charge(units)`` the endpoint awaits once it knows the batch size.
+    """
+    async def dependency(request: Request, token: Optional[str] = Depends(optional_oauth2_scheme)):
+        user_id = decode_access_token(token) if token else None
+
+        async def charge(units: int):
+            await enforce_rate_limit(request, endpoint, user_id, units)
+
+        return charge
+
+    return dependency
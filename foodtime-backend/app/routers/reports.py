@@ -2,209 +2,143 @@
 Reports API routes for weekly summaries and analytics
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from datetime import datetime, timedelta, date
-from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request
+from fastapi.concurrency import run_in_threadpool
 
-from ..database import get_db
+from ..config import settings
 from ..models.user import User
-from ..models.meal import Meal
-from ..models.food_analysis import FoodAnalysis
-from ..services.gemini_service import gemini_service
-from .auth import get_current_user
+from ..services.report_service import ReportService, get_week_range
+from ..services.trends_service import TrendsService
+from ..services.calendar_service import CalendarService
+from ..schemas.report import WeeklyReportResponse, TrendsResponse, CalendarResponse
+from .auth import get_current_user_detached
+from .conditional import versioned_view_detached, VersionedView
+from .rate_limit import enforce_rate_limit
 
 router = APIRouter(prefix="/api/reports", tags=["reports"])
 
 
-def get_week_range(week_offset: int = 0):
-    """Get start and end dates for a week (Monday to Sunday)"""
-    today = date.today()
-    # Get Monday of current week
-    monday = today - timedelta(days=today.weekday())
-    # Apply offset
-    start = monday + timedelta(weeks=week_offset)
-    end = start + timedelta(days=6)
-    return start, end
-
-
-@router.get("/weekly")
+@router.get("/weekly", response_model=WeeklyReportResponse)
 async def get_weekly_report(
+    request: Request,
     week_offset: int = Query(0, description="Week offset: 0=current, -1=last week, etc."),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_detached),
+    view: VersionedView = Depends(versioned_view_detached)
 ):
     """
     Generate weekly summary report with AI insights
+    
+    Completed weeks are served from the stored report (precomputed
+    overnight, or saved on first view) with a single-row read. Otherwise
+    statistics are read in one short transaction; the connection is back
+    in the pool before the AI insights call starts. Only computing a
+    report is rate limited; cached and stored reports are not.
     """
+    if view.hit is not None:
+        return view.hit
+    
+    week_start, _ = get_week_range(week_offset)
+    complete = ReportService.is_complete(week_start)
+    
     try:
-        week_start, week_end = get_week_range(week_offset)
-        
-        # Get all meals for the week
-        weekly_meals = db.query(Meal).filter(
-            Meal.user_id == current_user.id,
-            Meal.meal_date >= week_start,
-            Meal.meal_date <= week_end
-        ).order_by(Meal.meal_date).all()
-        
-        # Aggregate statistics
-        total_meals = len(weekly_meals)
-        total_calories = 0.0
-        total_protein = 0.0
-        total_carbs = 0.0
-        total_fat = 0.0
-        health_scores = []
-        
-        daily_breakdown = []
-        best_day = {"date": None, "score": 0}
-        worst_day = {"date": None, "score": 10}
-        
-        # Process each day
-        for i in range(7):
-            day_date = week_start + timedelta(days=i)
-            day_meals = [m for m in weekly_meals if m.meal_date == day_date]
-            
-            day_calories = 0.0
-            day_scores = []
-            
-            for meal in day_meals:
-                analyses = db.query(FoodAnalysis).filter(
-                    FoodAnalysis.meal_id == meal.id
-                ).all()
-                
-                for analysis in analyses:
-                    if analysis.health_score:
-                        day_scores.append(analysis.health_score)
-                        health_scores.append(analysis.health_score)
-                    if analysis.calories:
-                        day_calories += analysis.calories
-                        total_calories += analysis.calories
-                    if analysis.protein:
-                        total_protein += analysis.protein
-                    if analysis.carbs:
-                        total_carbs += analysis.carbs
-                    if analysis.fat:
-                        total_fat += analysis.fat
-            
-            day_avg_score = sum(day_scores) / len(day_scores) if day_scores else 0
-            
-            daily_breakdown.append({
-                "date": day_date.isoformat(),
-                "health_score": round(day_avg_score, 1),
-                "calories": round(day_calories, 1),
-                "meal_count": len(day_meals)
-            })
-            
-            # Track best/worst days
-            if day_avg_score > 0:
-                if day_avg_score > best_day["score"]:
-                    best_day = {"date": day_date.isoformat(), "score": day_avg_score}
-                if day_avg_score < worst_day["score"]:
-                    worst_day = {"date": day_date.isoformat(), "score": day_avg_score}
-        
-        # Calculate averages
-        avg_health_score = sum(health_scores) / len(health_scores) if health_scores else 0
-        avg_calories_per_day = total_calories / 7 if total_calories > 0 else 0
-        
-        # Calculate trends (compare to previous week if available)
-        prev_week_start, prev_week_end = get_week_range(week_offset - 1)
-        prev_meals = db.query(Meal).filter(
-            Meal.user_id == current_user.id,
-            Meal.meal_date >= prev_week_start,
-            Meal.meal_date <= prev_week_end
-        ).all()
-        
-        prev_scores = []
-        prev_calories = 0.0
-        for meal in prev_meals:
-            analyses = db.query(FoodAnalysis).filter(
-                FoodAnalysis.meal_id == meal.id
-            ).all()
-            for analysis in analyses:
-                if analysis.health_score:
-                    prev_scores.append(analysis.health_score)
-                if analysis.calories:
-                    prev_calories += analysis.calories
-        
-        prev_avg_score = sum(prev_scores) / len(prev_scores) if prev_scores else avg_health_score
-        prev_avg_calories = prev_calories / 7 if prev_calories > 0 else avg_calories_per_day
+        if complete:
+            body = await run_in_threadpool(ReportService.get_stored_report, current_user.id, week_start)
+            if body is not None:
+                return view.store_rendered(body)
         
-        # Determine trends
-        score_diff = avg_health_score - prev_avg_score
-        cal_diff = avg_calories_per_day - prev_avg_calories
+        await enforce_rate_limit(request, "weekly_report", current_user.id)
+        data = await run_in_threadpool(ReportService.collect_weekly_data, current_user.id, week_start)
         
-        health_score_trend = "stable"
-        if score_diff > 0.5:
-            health_score_trend = "improving"
-        elif score_diff < -0.5:
-            health_score_trend = "declining"
-        
-        calorie_trend = "stable"
-        if cal_diff > 200:
-            calorie_trend = "increasing"
-        elif cal_diff < -200:
-            calorie_trend = "decreasing"
+        user_goals = {
+            "daily_calorie_target": current_user.daily_calorie_target,
+            "goal": current_user.goal
+        }
+        report = await ReportService.build_weekly_report(data, user_goals)
         
-        # Generate AI insights
-        insights = ""
-        if total_meals > 0:
-            # Prepare meal data for AI
-            meal_summary = []
-            for meal in weekly_meals:
-                meal_summary.append({
-                    "date": meal.meal_date.isoformat(),
-                    "morning": meal.morning_meal or "",
-                    "afternoon": meal.afternoon_meal or "",
-                    "evening": meal.evening_meal or ""
-                })
-            
-            weekly_stats = {
-                "avg_health_score": round(avg_health_score, 1),
-                "total_calories": round(total_calories, 1),
-                "avg_calories": round(avg_calories_per_day, 1),
-                "total_protein": round(total_protein, 1),
-                "total_carbs": round(total_carbs, 1),
-                "total_fat": round(total_fat, 1),
-                "total_meals": total_meals
-            }
-            
-            user_goals = {
-                "daily_calorie_target": current_user.daily_calorie_target,
-                "goal": current_user.goal
-            }
-            
-            insights = await gemini_service.generate_weekly_insights(
-                meal_summary,
-                weekly_stats,
-                user_goals
+        response = view.store(report)
+        if complete:
+            await run_in_threadpool(
+                ReportService.store_report, current_user.id, week_start, data["data_version"], response.body
             )
-        else:
-            insights = "Bu hafta için yeterli veri yok. Öğünlerinizi kaydetmeye başlayın!"
-        
-        return {
-            "week_start": week_start.isoformat(),
-            "week_end": week_end.isoformat(),
-            "summary": {
-                "total_meals": total_meals,
-                "avg_health_score": round(avg_health_score, 1),
-                "total_calories": round(total_calories, 1),
-                "avg_calories_per_day": round(avg_calories_per_day, 1),
-                "macros": {
-                    "protein": round(total_protein, 1),
-                    "carbs": round(total_carbs, 1),
-                    "fat": round(total_fat, 1)
-                }
-            },
-            "daily_breakdown": daily_breakdown,
-            "insights": insights,
-            "trends": {
-                "health_score_trend": health_score_trend,
-                "calorie_trend": calorie_trend,
-                "best_day": best_day["date"] if best_day["date"] else None,
-                "worst_day": worst_day["date"] if worst_day["date"] else None
-            }
-        }
+        return response
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating weekly report: {str(e)}")
+
+
+@router.get("/trends", response_model=TrendsResponse)
+async def get_trends(
+    days: int = Query(settings.TRENDS_DEFAULT_DAYS, ge=7, le=settings.TRENDS_MAX_DAYS,
+                      description="Length of the period, ending today"),
+    current_user: User = Depends(get_current_user_detached),
+    view: VersionedView = Depends(versioned_view_detached)
+):
+    """
+    Long-range trends: daily series with 7/30-day rolling averages, trend
+    slopes, intake vs targets, macro shares and weekday patterns
+    
+    The history is aggregated per day in one query and the statistics are
+    computed on NumPy arrays in the threadpool.
+    """
+    if view.hit is not None:
+        return view.hit
+    
+    targets = {
+        "calories": current_user.daily_calorie_target,
+        "protein": current_user.daily_protein_target,
+        "carbs": current_user.daily_carbs_target,
+        "fat": current_user.daily_fat_target
+    }
+    
+    try:
+        trends = await run_in_threadpool(TrendsService.compute_trends, current_user.id, days, targets)
+        return view.store(trends)
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error computing trends: {str(e)}")
+
+
+async def _calendar(current_user: User, view: VersionedView, start, end) -> CalendarResponse:
+    """Serve a calendar from the conditional-request cache or build it"""
+    if view.hit is not None:
+        return view.hit
+    
+    try:
+        result = await run_in_threadpool(
+            CalendarService.build_calendar, current_user.id, start, end, current_user.daily_calorie_target
+        )
+        return view.store(result)
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error building calendar: {str(e)}")
+
+
+@router.get("/calendar/{year}", response_model=CalendarResponse)
+async def get_year_calendar(
+    year: int = Path(..., ge=2000, le=2100),
+    current_user: User = Depends(get_current_user_detached),
+    view: VersionedView = Depends(versioned_view_detached)
+):
+    """
+    Per-day health score, calories and calorie adherence for a whole year
+    
+    One aggregate query, no AI call; meant for a heatmap.
+    """
+    return await _calendar(current_user, view, *CalendarService.year_range(year))
+
+
+@router.get("/calendar/{year}/{month}", response_model=CalendarResponse)
+async def get_month_calendar(
+    year: int = Path(..., ge=2000, le=2100),
+    month: int = Path(..., ge=1, le=12),
+    current_user: User = Depends(get_current_user_detached),
+    view: VersionedView = Depends(versioned_view_detached)
+):
+    """
+    Per-day health score, calories and calorie adherence for one month
+    
+    One aggregate query, no AI call; meant for a heatmap.
+    """
+    return await _calendar(current_user, view, *CalendarService.month_range(year, month))
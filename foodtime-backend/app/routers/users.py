@@ -9,14 +9,20 @@ from ..schemas.user import UserUpdate, UserResponse
 from ..services.user_service import UserService
 from ..models.user import User
 from .auth import get_current_user
+from .conditional import versioned_view, VersionedView
 
 router = APIRouter(prefix="/api/users", tags=["users"])
 
 
 @router.get("/me", response_model=UserResponse)
-def get_my_profile(current_user: User = Depends(get_current_user)):
+def get_my_profile(
+    current_user: User = Depends(get_current_user),
+    view: VersionedView = Depends(versioned_view)
+):
     """Get current user's profile"""
-    return current_user
+    if view.hit is not None:
+        return view.hit
+    return view.store(UserResponse.model_validate(current_user))
 
 
 @router.put("/me", response_model=UserResponse)
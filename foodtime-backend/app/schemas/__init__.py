@@ -3,14 +3,20 @@ Schemas package initialization
 """
 
 from .user import UserCreate, UserUpdate, UserResponse
-from .meal import MealCreate, MealResponse, MealHistoryResponse
+from .meal import MealCreate, MealResponse, MealHistoryResponse, MealPageResponse, MealSearchResponse
 from .analysis import (
     DailyAnalysisRequest,
     FoodQueryRequest,
     PhotoAnalysisRequest,
     AnalysisResponse,
-    FoodAnalysisResponse
+    FoodAnalysisResponse,
+    BatchFoodQueryRequest,
+    BatchPhotoAnalysisRequest,
+    BatchAnalysisResponse
 )
+from .dashboard import DashboardStatsResponse
+from .nutrition import DailyNutritionResponse
+from .report import WeeklyReportResponse, TrendsResponse, CalendarResponse
 
 __all__ = [
     "UserCreate",
@@ -19,9 +25,19 @@ __all__ = [
     "MealCreate",
     "MealResponse",
     "MealHistoryResponse",
+    "MealPageResponse",
+    "MealSearchResponse",
     "DailyAnalysisRequest",
     "FoodQueryRequest",
     "PhotoAnalysisRequest",
     "AnalysisResponse",
-    "FoodAnalysisResponse"
+    "FoodAnalysisResponse",
+    "BatchFoodQueryRequest",
+    "BatchPhotoAnalysisRequest",
+    "BatchAnalysisResponse",
+    "DashboardStatsResponse",
+    "DailyNutritionResponse",
+    "WeeklyReportResponse",
+    "TrendsResponse",
+    "CalendarResponse"
 ]
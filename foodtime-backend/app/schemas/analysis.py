@@ -2,8 +2,8 @@
 Analysis Pydantic schemas for AI analysis requests/responses
 """
 
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -28,16 +28,36 @@ class PhotoAnalysisRequest(BaseModel):
     mime_type: str = "image/jpeg"
 
 
+class BatchFoodQueryRequest(BaseModel):
+    """Request for analyzing several foods at once"""
+    food_descriptions: List[str] = Field(..., min_length=1)
+
+
+class BatchPhotoAnalysisRequest(BaseModel):
+    """Request for analyzing several photos at once"""
+    images: List[PhotoAnalysisRequest] = Field(..., min_length=1)
+
+
 class AnalysisResponse(BaseModel):
     """Response from AI analysis"""
     analysis_result: str
     health_score: Optional[int] = None
     analysis_type: str
+    calories: Optional[float] = None
+    protein: Optional[float] = None
+    carbs: Optional[float] = None
+    fat: Optional[float] = None
+    source: str = "ai"  # "database", "ai" or "fallback" (database answer while the AI is unavailable)
     
     class Config:
         from_attributes = True
 
 
+class BatchAnalysisResponse(BaseModel):
+    """Per-item results of a batch analysis, in request order"""
+    items: List[AnalysisResponse]
+
+
 class FoodAnalysisResponse(BaseModel):
     """Full food analysis response"""
     id: int
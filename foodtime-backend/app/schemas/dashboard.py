@@ -0,0 +1,44 @@
+"""
+Dashboard Pydantic schemas for aggregated statistics responses
+"""
+
+from pydantic import BaseModel
+from typing import List
+from datetime import date
+
+
+class DashboardToday(BaseModel):
+    """Today's score and logging status"""
+    health_score: float
+    meals_logged: int
+    date: date
+
+
+class TrendPoint(BaseModel):
+    """Average health score for one day"""
+    date: date
+    score: float
+
+
+class RecentMeal(BaseModel):
+    """Short description of a recently logged meal"""
+    id: int
+    date: date
+    description: str
+    health_score: float
+
+
+class DashboardSummary(BaseModel):
+    """Overall statistics across the user's history"""
+    total_meals: int
+    avg_score: float
+    week_avg: float
+    streak_days: int
+
+
+class DashboardStatsResponse(BaseModel):
+    """Schema for dashboard statistics"""
+    today: DashboardToday
+    week_trend: List[TrendPoint]
+    recent_meals: List[RecentMeal]
+    summary: DashboardSummary
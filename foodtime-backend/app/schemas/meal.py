@@ -3,7 +3,7 @@ Meal Pydantic schemas for request/response validation
 """
 
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import date, datetime
 
 
@@ -40,3 +40,28 @@ class MealHistoryResponse(BaseModel):
     afternoon: Optional[str] = None
     evening: Optional[str] = None
     ai_summary: Optional[str] = None
+
+
+class MealPageResponse(BaseModel):
+    """Schema for one page of keyset-paginated meal history"""
+    items: List[MealResponse]
+    next_cursor: Optional[str] = None
+    has_more: bool = False
+
+
+class MealSearchHit(BaseModel):
+    """One meal matching a search, with the matched text around the query words"""
+    meal_id: int
+    meal_date: date
+    morning_meal: Optional[str] = None
+    afternoon_meal: Optional[str] = None
+    evening_meal: Optional[str] = None
+    snippet: Optional[str] = None
+    rank: float
+
+
+class MealSearchResponse(BaseModel):
+    """Schema for one page of ranked meal search results"""
+    items: List[MealSearchHit]
+    next_offset: Optional[int] = None
+    has_more: bool = False
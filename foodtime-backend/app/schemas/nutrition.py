@@ -0,0 +1,28 @@
+"""
+Nutrition Pydantic schemas for daily nutrition tracking responses
+"""
+
+from pydantic import BaseModel
+
+
+class MacroAmounts(BaseModel):
+    """Calories and macronutrients"""
+    calories: float
+    protein: float
+    carbs: float
+    fat: float
+
+
+class MacroTargets(BaseModel):
+    """User's daily calorie and macronutrient targets"""
+    calories: int
+    protein: int
+    carbs: int
+    fat: int
+
+
+class DailyNutritionResponse(BaseModel):
+    """Schema for today's nutrition totals compared with targets"""
+    consumed: MacroAmounts
+    targets: MacroTargets
+    percentages: MacroAmounts
@@ -0,0 +1,122 @@
+"""
+Report Pydantic schemas for weekly summaries, long-range trends and calendars
+"""
+
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import date
+
+
+class WeeklyMacros(BaseModel):
+    """Macronutrient totals for the week (grams)"""
+    protein: float
+    carbs: float
+    fat: float
+
+
+class WeeklySummary(BaseModel):
+    """Aggregated weekly statistics"""
+    total_meals: int
+    avg_health_score: float
+    total_calories: float
+    avg_calories_per_day: float
+    macros: WeeklyMacros
+
+
+class DailyBreakdown(BaseModel):
+    """Statistics for one day of the week"""
+    date: date
+    health_score: float
+    calories: float
+    meal_count: int
+
+
+class WeeklyTrends(BaseModel):
+    """Comparison with the previous week"""
+    health_score_trend: str
+    calorie_trend: str
+    best_day: Optional[date] = None
+    worst_day: Optional[date] = None
+
+
+class WeeklyReportResponse(BaseModel):
+    """Schema for the weekly report"""
+    week_start: date
+    week_end: date
+    summary: WeeklySummary
+    daily_breakdown: List[DailyBreakdown]
+    insights: str
+    trends: WeeklyTrends
+
+
+class TrendSeries(BaseModel):
+    """Daily values, one entry per day of the period (None where nothing was logged)"""
+    dates: List[date]
+    health_score: List[Optional[float]]
+    calories: List[Optional[float]]
+    protein: List[Optional[float]]
+    carbs: List[Optional[float]]
+    fat: List[Optional[float]]
+    health_score_7d: List[Optional[float]]
+    health_score_30d: List[Optional[float]]
+    calories_7d: List[Optional[float]]
+    calories_30d: List[Optional[float]]
+
+
+class TrendSlopes(BaseModel):
+    """Linear trend over the period, change per week"""
+    health_score_per_week: Optional[float] = None
+    calories_per_week: Optional[float] = None
+
+
+class TargetRatios(BaseModel):
+    """Average daily intake as a percentage of the user's targets"""
+    calories: Optional[float] = None
+    protein: Optional[float] = None
+    carbs: Optional[float] = None
+    fat: Optional[float] = None
+
+
+class MacroShares(BaseModel):
+    """Share of macronutrient calories, in percent"""
+    protein: Optional[float] = None
+    carbs: Optional[float] = None
+    fat: Optional[float] = None
+
+
+class WeekdayPattern(BaseModel):
+    """Averages for one day of the week (0 = Monday)"""
+    weekday: int
+    logged_days: int
+    health_score: Optional[float] = None
+    calories: Optional[float] = None
+
+
+class TrendsResponse(BaseModel):
+    """Schema for long-range trends"""
+    start: date
+    end: date
+    days: int
+    logged_days: int
+    series: TrendSeries
+    slopes: TrendSlopes
+    target_ratios: TargetRatios
+    macro_shares: MacroShares
+    weekdays: List[WeekdayPattern]
+
+
+class CalendarResponse(BaseModel):
+    """
+    Schema for a month or year heatmap
+    
+    Each array has one entry per day from start to end; values are None
+    on days without analyses.
+    """
+    start: date
+    end: date
+    logged_days: int
+    calorie_target: Optional[float] = None
+    health_score: List[Optional[float]]
+    calories: List[Optional[int]]
+    adherence: List[Optional[int]]  # calories as % of calorie_target
+    logged: List[bool]
@@ -0,0 +1,130 @@
+"""
+Production server entry point
+
+    python -m app.server
+
+Runs uvicorn with several worker processes (WEB_CONCURRENCY, default one
+per available CPU), uvloop and httptools when installed, keep-alive longer
+than the proxy's idle timeout, optional worker recycling after
+LIMIT_MAX_REQUESTS and a graceful shutdown that waits up to
+GRACEFUL_SHUTDOWN_SECONDS for open requests and in-flight AI calls.
+
+The client address (rate limit keys, logs) is taken from X-Forwarded-For
+only when the connecting peer is listed in FORWARDED_ALLOW_IPS (default
+127.0.0.1); set it to the platform proxy's addresses, e.g. Railway's
+100.64.0.0/10, never "*".
+
+Per-worker resource math
+------------------------
+Every worker is a separate process with its own:
+
+- database pool: DB_POOL_SIZE + DB_MAX_OVERFLOW connections at most, so the
+  service can open ``replicas x workers x (DB_POOL_SIZE + DB_MAX_OVERFLOW)``
+  connections. Keep that under DB_MAX_CONNECTIONS (PostgreSQL's
+  max_connections minus headroom for migrations and admin sessions); with
+  the defaults (5 + 10) and 90 allowed connections that is 6 workers in
+  total. Workers are capped to fit when WEB_CONCURRENCY is left at 0.
+- response cache: up to RESPONSE_CACHE_MAX_BYTES of rendered bodies.
+  Entries are keyed by the user's data version, so a write handled by one
+  worker never lets another serve stale data; it only costs a miss.
+- AI circuit breaker and /metrics registry: state is per process, so a
+  scrape of /metrics sees the worker that answered it.
+
+Threadpool work (sync endpoints, DB sessions) shares the default AnyIO
+limit of 40 threads per worker; requests beyond the pool size wait up to
+DB_POOL_TIMEOUT seconds for a connection.
+"""
+
+import importlib.util
+import logging
+import os
+import sys
+
+from .config import settings
+from .utils.log_config import configure_logging
+
+logger = logging.getLogger(__name__)
+
+
+def available_cpus() -> int:
+    """CPUs this process may run on (respects container CPU affinity)"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def connections_per_worker() -> int:
+    """Maximum database connections a single worker can hold"""
+    return settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+
+
+def resolve_workers() -> int:
+    """
+    Number of worker processes to start
+
+    Uses WEB_CONCURRENCY when set; otherwise one worker per CPU, capped so
+    the combined connection pools fit in DB_MAX_CONNECTIONS.
+    """
+    if settings.WEB_CONCURRENCY > 0:
+        return settings.WEB_CONCURRENCY
+
+    workers = available_cpus()
+    if settings.DATABASE_URL.startswith(("postgres://", "postgresql://")):
+        workers = min(workers, max(settings.DB_MAX_CONNECTIONS // connections_per_worker(), 1))
+    return max(workers, 1)
+
+
+def event_loop() -> str:
+    """uvloop when installed (uvicorn[standard]), asyncio otherwise"""
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+
+def http_protocol() -> str:
+    """httptools when installed (uvicorn[standard]), h11 otherwise"""
+    return "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+
+def main() -> int:
+    """Command line entry point"""
+    import uvicorn
+
+    configure_logging()
+    workers = resolve_workers()
+    total_connections = workers * connections_per_worker()
+    logger.info(
+        "Starting %d worker(s) on %s:%s (%s/%s, up to %d DB connections)",
+        workers, settings.HOST, settings.PORT, event_loop(), http_protocol(), total_connections
+    )
+    if "*" in settings.FORWARDED_ALLOW_IPS:
+        logger.warning(
+            "FORWARDED_ALLOW_IPS=* trusts X-Forwarded-For from any client, which lets clients pick "
+            "the address their IP rate limit is keyed on; list the proxy's addresses instead"
+        )
+    if total_connections > settings.DB_MAX_CONNECTIONS:
+        logger.warning(
+            "%d workers x %d connections exceeds DB_MAX_CONNECTIONS=%d; lower WEB_CONCURRENCY or the pool size",
+            workers, connections_per_worker(), settings.DB_MAX_CONNECTIONS
+        )
+
+    uvicorn.run(
+        "app.main:app",
+        host=settings.HOST,
+        port=settings.PORT,
+        workers=workers,
+        loop=event_loop(),
+        http=http_protocol(),
+        timeout_keep_alive=settings.KEEP_ALIVE_SECONDS,
+        timeout_graceful_shutdown=settings.GRACEFUL_SHUTDOWN_SECONDS,
+        limit_max_requests=settings.LIMIT_MAX_REQUESTS or None,
+        proxy_headers=True,
+        forwarded_allow_ips=settings.FORWARDED_ALLOW_IPS,
+        access_log=settings.ACCESS_LOG,
+        log_config=None,  # uvicorn's loggers go through the app's log queue
+        server_header=False,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
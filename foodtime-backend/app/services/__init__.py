@@ -4,6 +4,6 @@ Services package initialization
 
 from .user_service import UserService
 from .meal_service import MealService
-from .gemini_service import gemini_service, GeminiService
+from .ai_provider import ai_service, AIProvider, AIProviderError, create_ai_provider
 
-__all__ = ["UserService", "MealService", "gemini_service", "GeminiService"]
+__all__ = ["UserService", "MealService", "ai_service", "AIProvider", "AIProviderError", "create_ai_provider"]
@@ -0,0 +1,575 @@
+"""
+AI Provider Interface
+Shared prompts, response parsing and provider selection for AI analysis
+"""
+
+import re
+import time
+import asyncio
+import base64
+import logging
+from typing import Awaitable, Callable, List, Optional
+
+from ..config import settings
+from ..utils.log_config import get_request_context
+from ..utils.metrics import AI_REQUESTS, AI_REQUEST_DURATION, AI_TOKENS
+from .circuit_breaker import CircuitBreaker
+from .food_database import food_database, FoodMatch
+
+logger = logging.getLogger(__name__)
+
+STYLE_PROMPT = "Yıldız (*) veya hashtag (#) kullanma. Profesyonel paragraflar kur. "
+
+FOOD_TASKS = (
+    "1) Besine 10 üzerinden SAĞLIK PUANI ver. "
+    "2) İçindeki YARARLI MADDELERİ açıkla. "
+    "3) İçindeki ZARARLI MADDELERİ açıkla. "
+)
+
+PHOTO_TASKS = (
+    "1) 10 üzerinden SAĞLIK PUANI ver. "
+    "2) İçindeki YARARLI MADDELERİ anlat. "
+    "3) İçindeki ZARARLI MADDELERİ anlat."
+)
+
+# Batch answers are split on these section headers ("=== ÖĞE 2 ===")
+BATCH_SECTION = "=== ÖĞE {index} ==="
+BATCH_SECTION_PATTERN = re.compile(r"===\s*ÖĞE\s+(\d+)\s*===")
+
+# Answer for foods found in the local database
+DATABASE_ANSWER = (
+    "Sağlık puanı: {score}/10. {name} ({portion}, yaklaşık {grams:g} g) yaklaşık {calories:g} kcal, "
+    "{protein:g} g protein, {carbs:g} g karbonhidrat ve {fat:g} g yağ içerir. "
+    "Bu değerler yerel besin veritabanından alınmıştır; pişirme yöntemi ve porsiyona göre değişebilir."
+)
+DEGRADED_NOTICE = "Yapay zeka analizi şu anda kullanılamıyor, yerel besin veritabanındaki en yakın eşleşme gösteriliyor. "
+
+
+class AIProviderError(Exception):
+    """Raised when an AI provider fails to produce a response"""
+
+
+class AIProvider:
+    """
+    Base class for AI analysis providers
+
+    Subclasses only implement ``_generate``; prompt construction and
+    extraction of scores / nutrition values live here so every provider
+    returns results in exactly the same shape.
+    """
+
+    name = "base"
+
+    def __init__(self):
+        """Set up the circuit breaker shared by all calls of this provider"""
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold=settings.AI_CIRCUIT_FAILURE_THRESHOLD,
+            reset_timeout=settings.AI_CIRCUIT_RESET_SECONDS
+        )
+        self.in_flight = 0
+
+    async def _generate(self, method: str, prompt: str, image_parts: Optional[List[dict]] = None) -> str:
+        """
+        Produce raw model text for a prompt
+
+        Args:
+            method: Public method that issued the call (e.g. "analyze_food")
+            prompt: Prompt text
+            image_parts: Optional image payloads ({"mime_type", "data"}), in order
+
+        Returns:
+            Raw response text
+        """
+        raise NotImplementedError
+
+    def _is_outage(self, error: Exception) -> bool:
+        """
+        Whether an error means the provider is failing, rather than refusing this request
+
+        Timeouts and transport errors count towards opening the circuit;
+        errors about the request itself (bad input, blocked content, an
+        unreadable response) do not. Providers add their own 5xx types.
+        """
+        return isinstance(error, (AIProviderError, asyncio.TimeoutError, OSError))
+
+    async def _call(self, method: str, prompt: str, image_parts: Optional[List[dict]] = None) -> str:
+        """Run ``_generate`` behind the circuit breaker, with AI_CALL_TIMEOUT, and record metrics"""
+        if not self.circuit_breaker.allow():
+            AI_REQUESTS.inc(provider=self.name, method=method, outcome="rejected")
+            raise AIProviderError("AI service is temporarily unavailable, please try again later")
+
+        # Only the half-open trial holder may give the trial back
+        trial = self.circuit_breaker.state == CircuitBreaker.HALF_OPEN
+        started = time.perf_counter()
+        outcome = "error"
+        self.in_flight += 1
+        try:
+            try:
+                text = await asyncio.wait_for(self._generate(method, prompt, image_parts), settings.AI_CALL_TIMEOUT)
+            except asyncio.TimeoutError:
+                # A hanging provider counts as failing
+                outcome = "timeout"
+                raise AIProviderError(f"AI call timed out after {settings.AI_CALL_TIMEOUT:g}s")
+            outcome = "success"
+            self.circuit_breaker.record_success()
+            return text
+        except Exception as e:
+            if self._is_outage(e):
+                self.circuit_breaker.record_failure()
+            elif trial:
+                # The provider answered, just not with a result: no verdict either way
+                self.circuit_breaker.release_trial()
+            logger.warning(
+                "AI call %s failed: %s", method, e,
+                extra={"provider": self.name, "ai_method": method, "error": type(e).__name__}
+            )
+            raise
+        except BaseException:
+            # Cancelled: no verdict on the provider, but free a half-open trial
+            outcome = "cancelled"
+            if trial:
+                self.circuit_breaker.release_trial()
+            raise
+        finally:
+            self.in_flight -= 1
+            elapsed = time.perf_counter() - started
+            context = get_request_context()
+            if context is not None:
+                context.record_ai_call(elapsed)
+            AI_REQUEST_DURATION.observe(elapsed, provider=self.name, method=method)
+            AI_REQUESTS.inc(provider=self.name, method=method, outcome=outcome)
+
+    async def drain(self, timeout: float) -> int:
+        """
+        Wait for in-flight calls to finish
+        
+        Args:
+            timeout: Maximum seconds to wait
+            
+        Returns:
+            Number of calls still running when the wait ended
+        """
+        deadline = time.monotonic() + timeout
+        while self.in_flight and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        return self.in_flight
+
+    def _record_usage(self, method: str, prompt_tokens: Optional[int], completion_tokens: Optional[int]):
+        """Count tokens reported by the provider for one call"""
+        if prompt_tokens:
+            AI_TOKENS.inc(prompt_tokens, provider=self.name, method=method, direction="prompt")
+        if completion_tokens:
+            AI_TOKENS.inc(completion_tokens, provider=self.name, method=method, direction="completion")
+
+    @staticmethod
+    def _clean(text: str) -> str:
+        """Strip markdown characters the prompts ask the model not to use"""
+        return text.replace('*', '').replace('#', '')
+
+    async def analyze_daily_meals(
+        self,
+        morning: str,
+        afternoon: str,
+        evening: str,
+        user_context: Optional[dict] = None,
+        meal_history: Optional[list] = None
+    ) -> dict:
+        """
+        Analyze daily meals and provide recommendations
+        
+        Args:
+            morning: Morning meal description
+            afternoon: Afternoon meal description
+            evening: Evening meal description
+            user_context: User profile information
+            meal_history: Previous meal history for context
+            
+        Returns:
+            Dictionary with analysis and health score
+        """
+        prompt = (
+            "Yıldız (*) veya hashtag (#) kullanma. Profesyonel paragraflar kur. "
+            f"Kullanıcı bugünkü öğünlerini giriyor. "
+            f"Sabah: {morning}, Öğle: {afternoon}, Akşam: {evening}. "
+            "ÖNEMLİ: Analizin başında şunları belirt: "
+            "1) Günün genel SAĞLIK PUANI (örnek: '8/10') "
+            "2) Tahmini TOPLAM KALORİ (örnek: 'Kalori: 1850 kcal') "
+            "3) Tahmini PROTEIN (örnek: 'Protein: 120g') "
+            "4) Tahmini KARBONHİDRAT (örnek: 'Karbonhidrat: 220g') "
+            "5) Tahmini YAĞ (örnek: 'Yağ: 65g') "
+        )
+        
+        if meal_history:
+            prompt += f"Geçmiş 10 günlük verilere dayanarak analiz yap: {meal_history}. "
+        
+        prompt += "Bugünü analiz et ve yarın için tam menü ve besin stratejisi öner."
+        
+        result_text = self._clean(await self._call("analyze_daily_meals", prompt))
+        
+        # Extract health score and nutrition data
+        health_score = None
+        calories = None
+        protein = None
+        carbs = None
+        fat = None
+        
+        try:
+            # Extract health score
+            score_match = re.search(r'(\d+\.?\d*)\s*[/üzerinden]\s*10', result_text)
+            if score_match:
+                health_score = float(score_match.group(1))
+            
+            # Extract calories (look for "Kalori: 1850" or "1850 kcal")
+            cal_match = re.search(r'(?:Kalori|kalori)[:\s]*(\d+)', result_text, re.IGNORECASE)
+            if cal_match:
+                calories = float(cal_match.group(1))
+            
+            # Extract protein (look for "Protein: 120g" or "120 g protein")
+            prot_match = re.search(r'(?:Protein|protein)[:\s]*(\d+)', result_text, re.IGNORECASE)
+            if prot_match:
+                protein = float(prot_match.group(1))
+            
+            # Extract carbs
+            carb_match = re.search(r'(?:Karbonhidrat|karbonhidrat|Karb)[:\s]*(\d+)', result_text, re.IGNORECASE)
+            if carb_match:
+                carbs = float(carb_match.group(1))
+            
+            # Extract fat
+            fat_match = re.search(r'(?:Yağ|yağ)[:\s]*(\d+)', result_text, re.IGNORECASE)
+            if fat_match:
+                fat = float(fat_match.group(1))
+                
+        except Exception as e:
+            logger.warning("Error extracting nutrition data: %s", e)
+        
+        return {
+            "analysis": result_text,
+            "health_score": health_score,
+            "calories": calories,
+            "protein": protein,
+            "carbs": carbs,
+            "fat": fat,
+            "source": "ai"
+        }
+    
+    async def analyze_food(self, food_description: str) -> dict:
+        """
+        Analyze specific food or ingredient
+        
+        Common foods are answered from the local food database; everything
+        else goes to the model. If the model call fails, a looser database
+        match (FOOD_DB_FALLBACK_THRESHOLD) is returned instead when there is one.
+        
+        Args:
+            food_description: Description of food to analyze
+            
+        Returns:
+            Dictionary with analysis, health score, nutrition values (database
+            answers only) and source ("database", "ai" or "fallback")
+        """
+        match = self._lookup_food(food_description, settings.FOOD_DB_MATCH_THRESHOLD)
+        if match:
+            return self._database_result(match)
+        
+        prompt = STYLE_PROMPT + "Kesinlikle şunları yap: " + FOOD_TASKS + f"Girdi: {food_description}"
+        
+        try:
+            result_text = self._clean(await self._call("analyze_food", prompt))
+        except Exception:
+            fallback = self._lookup_food(food_description, settings.FOOD_DB_FALLBACK_THRESHOLD)
+            if fallback is None:
+                raise
+            return self._database_result(fallback, degraded=True)
+        
+        return {
+            "analysis": result_text,
+            "health_score": self._extract_score(result_text),
+            "source": "ai"
+        }
+    
+    async def analyze_photo(self, image_base64: str, mime_type: str = "image/jpeg") -> dict:
+        """
+        Analyze food from photo
+        
+        Args:
+            image_base64: Base64 encoded image
+            mime_type: MIME type of image
+            
+        Returns:
+            Dictionary with analysis and health score
+        """
+        return await self._analyze_photo_part(self._image_part(image_base64, mime_type))
+    
+    async def analyze_food_batch(self, food_descriptions: List[str]) -> List[dict]:
+        """
+        Analyze several foods with as few model calls as possible
+        
+        Foods found in the local database are answered directly. The rest
+        are packed into one prompt per chunk (bounded by
+        AI_BATCH_ITEMS_PER_CALL and AI_BATCH_MAX_PROMPT_CHARS); chunks run
+        concurrently. Items missing from a batched answer are retried
+        individually with ``analyze_food``.
+        
+        Args:
+            food_descriptions: Foods to analyze
+            
+        Returns:
+            One result dict (as from ``analyze_food``) per food, in input order
+        """
+        results: List[Optional[dict]] = []
+        for description in food_descriptions:
+            match = self._lookup_food(description, settings.FOOD_DB_MATCH_THRESHOLD)
+            results.append(self._database_result(match) if match else None)
+        
+        unknown = [index for index, result in enumerate(results) if result is None]
+        chunks = self._chunk(unknown, lambda index: len(food_descriptions[index]), settings.AI_BATCH_MAX_PROMPT_CHARS)
+        answers = await asyncio.gather(*(
+            self._analyze_food_chunk([food_descriptions[index] for index in chunk]) for chunk in chunks
+        ))
+        for chunk, chunk_answers in zip(chunks, answers):
+            for index, answer in zip(chunk, chunk_answers):
+                results[index] = answer
+        return results
+    
+    async def analyze_photo_batch(self, images: List[dict]) -> List[dict]:
+        """
+        Analyze several photos with as few model calls as possible
+        
+        Images are packed into one request per chunk (bounded by
+        AI_BATCH_ITEMS_PER_CALL and AI_BATCH_MAX_IMAGE_BYTES of decoded
+        image data); chunks run concurrently. Items missing from a batched
+        answer are retried individually with ``analyze_photo``.
+        
+        Args:
+            images: {"image_base64", "mime_type"} dicts
+            
+        Returns:
+            One {"analysis", "health_score"} dict per image, in input order
+        """
+        parts = [self._image_part(image["image_base64"], image.get("mime_type", "image/jpeg")) for image in images]
+        chunks = self._chunk(parts, lambda part: len(part["data"]), settings.AI_BATCH_MAX_IMAGE_BYTES)
+        results = await asyncio.gather(*(self._analyze_photo_chunk(chunk) for chunk in chunks))
+        return [item for chunk in results for item in chunk]
+    
+    async def _analyze_food_chunk(self, food_descriptions: List[str]) -> List[dict]:
+        """Analyze one chunk of foods in a single call"""
+        if len(food_descriptions) == 1:
+            return [await self.analyze_food(food_descriptions[0])]
+        
+        count = len(food_descriptions)
+        prompt = (
+            STYLE_PROMPT
+            + f"Aşağıda {count} ayrı girdi var. Her girdiyi ayrı ayrı analiz et ve her analize "
+            + f"'{BATCH_SECTION.format(index='N')}' satırıyla başla (N girdinin numarası). "
+            + "Her girdi için kesinlikle şunları yap: " + FOOD_TASKS + "\n"
+            + "\n".join(f"ÖĞE {index}: {description}" for index, description in enumerate(food_descriptions, 1))
+        )
+        
+        try:
+            sections = self._split_sections(await self._call("analyze_food_batch", prompt), count)
+        except Exception:
+            fallbacks = [self._lookup_food(description, settings.FOOD_DB_FALLBACK_THRESHOLD) for description in food_descriptions]
+            if None in fallbacks:
+                raise
+            return [self._database_result(match, degraded=True) for match in fallbacks]
+        
+        return await self._fill_missing(
+            sections,
+            lambda index: self.analyze_food(food_descriptions[index])
+        )
+    
+    async def _analyze_photo_chunk(self, parts: List[dict]) -> List[dict]:
+        """Analyze one chunk of images in a single call"""
+        if len(parts) == 1:
+            return [await self._analyze_photo_part(parts[0])]
+        
+        count = len(parts)
+        prompt = (
+            STYLE_PROMPT
+            + f"Sırasıyla {count} görsel var (ÖĞE 1 - ÖĞE {count}). Her görseli ayrı ayrı analiz et ve "
+            + f"her analize '{BATCH_SECTION.format(index='N')}' satırıyla başla (N görselin sırası). "
+            + "Kesinlikle her görseldeki besine: " + PHOTO_TASKS
+        )
+        
+        sections = self._split_sections(await self._call("analyze_photo_batch", prompt, parts), count)
+        return await self._fill_missing(
+            sections,
+            lambda index: self._analyze_photo_part(parts[index])
+        )
+    
+    async def _analyze_photo_part(self, image_part: dict) -> dict:
+        """Analyze a single decoded image"""
+        prompt = STYLE_PROMPT + "Kesinlikle görseldeki besine: " + PHOTO_TASKS
+        
+        result_text = self._clean(await self._call("analyze_photo", prompt, [image_part]))
+        
+        return {
+            "analysis": result_text,
+            "health_score": self._extract_score(result_text),
+            "source": "ai"
+        }
+    
+    def _split_sections(self, text: str, count: int) -> List[Optional[dict]]:
+        """
+        Split a batched answer into per-item results
+        
+        Returns:
+            ``count`` entries; None where the model skipped an item
+        """
+        results: List[Optional[dict]] = [None] * count
+        pieces = BATCH_SECTION_PATTERN.split(text)
+        # pieces = [preamble, index, body, index, body, ...]
+        for number, body in zip(pieces[1::2], pieces[2::2]):
+            index = int(number) - 1
+            body = self._clean(body).strip()
+            if 0 <= index < count and body and results[index] is None:
+                results[index] = {"analysis": body, "health_score": self._extract_score(body), "source": "ai"}
+        return results
+    
+    @staticmethod
+    async def _fill_missing(results: List[Optional[dict]], retry: Callable[[int], Awaitable[dict]]) -> List[dict]:
+        """Re-run items a batched answer left out, one call each"""
+        missing = [index for index, result in enumerate(results) if result is None]
+        if missing:
+            retried = await asyncio.gather(*(retry(index) for index in missing))
+            for index, result in zip(missing, retried):
+                results[index] = result
+        return results
+    
+    @staticmethod
+    def _chunk(items: list, size: Callable[[object], int], budget: int) -> List[list]:
+        """
+        Group items in order so each chunk stays within the per-call limits
+        
+        Args:
+            items: Items to group
+            size: Size of one item in the unit ``budget`` is measured in
+            budget: Maximum combined size per chunk (a single larger item
+                still gets a chunk of its own)
+        """
+        chunks, current, current_size = [], [], 0
+        for item in items:
+            item_size = size(item)
+            if current and (
+                len(current) >= settings.AI_BATCH_ITEMS_PER_CALL or current_size + item_size > budget
+            ):
+                chunks.append(current)
+                current, current_size = [], 0
+            current.append(item)
+            current_size += item_size
+        if current:
+            chunks.append(current)
+        return chunks
+    
+    @staticmethod
+    def _lookup_food(food_description: str, threshold: float) -> Optional[FoodMatch]:
+        """Look a food up in the local database (None when disabled or unknown)"""
+        if not settings.FOOD_DB_ENABLED:
+            return None
+        return food_database.lookup(food_description, threshold)
+    
+    @staticmethod
+    def _database_result(match: FoodMatch, degraded: bool = False) -> dict:
+        """Build an analysis result from a database match"""
+        analysis = DATABASE_ANSWER.format(
+            score=match.health_score,
+            name=match.name,
+            portion=match.portion,
+            grams=match.grams,
+            calories=match.calories,
+            protein=match.protein,
+            carbs=match.carbs,
+            fat=match.fat
+        )
+        return {
+            "analysis": DEGRADED_NOTICE + analysis if degraded else analysis,
+            "health_score": match.health_score,
+            "calories": match.calories,
+            "protein": match.protein,
+            "carbs": match.carbs,
+            "fat": match.fat,
+            "source": "fallback" if degraded else "database"
+        }
+    
+    @staticmethod
+    def _image_part(image_base64: str, mime_type: str) -> dict:
+        """Decode a base64 image into a model request part"""
+        return {
+            "mime_type": mime_type,
+            "data": base64.b64decode(image_base64)
+        }
+    
+    async def generate_weekly_insights(
+        self,
+        weekly_meals: list,
+        weekly_stats: dict,
+        user_goals: dict
+    ) -> str:
+        """
+        Generate AI insights for weekly eating patterns
+        
+        Args:
+            weekly_meals: List of meals for the week
+            weekly_stats: Aggregated weekly statistics
+            user_goals: User's nutrition goals
+            
+        Returns:
+            AI-generated weekly insights and recommendations
+        """
+        prompt = (
+            "Yıldız (*) veya hashtag (#) kullanma. Profesyonel paragraflar kur. "
+            f"Kullanıcının haftalık beslenme verilerini analiz et.\n\n"
+            f"Haftalık İstatistikler:\n"
+            f"- Ortalama Sağlık Skoru: {weekly_stats.get('avg_health_score', 0)}/10\n"
+            f"- Toplam Öğün: {weekly_stats.get('total_meals', 0)}\n"
+            f"- Ortalama Günlük Kalori: {weekly_stats.get('avg_calories', 0)} kcal\n"
+            f"- Toplam Protein: {weekly_stats.get('total_protein', 0)}g\n"
+            f"- Toplam Karbonhidrat: {weekly_stats.get('total_carbs', 0)}g\n"
+            f"- Toplam Yağ: {weekly_stats.get('total_fat', 0)}g\n\n"
+            f"Kullanıcı Hedefi: {user_goals.get('goal', 'Genel sağlık')}\n"
+            f"Günlük Kalori Hedefi: {user_goals.get('daily_calorie_target', 2000)} kcal\n\n"
+            "Lütfen şunları yap:\n"
+            "1) Haftanın GÜÇLÜ YÖNLERİNİ belirt (başarılar, olumlu alışkanlıklar)\n"
+            "2) DİKKAT EDİLMESİ GEREKEN NOKTALARI belirt (aşırılıklar, eksiklikler)\n"
+            "3) Gelecek hafta için SOMUT ÖNERİLER sun\n\n"
+            "Kısa ve öz tut, motive edici ol."
+        )
+        
+        return self._clean(await self._call("generate_weekly_insights", prompt))
+
+    @staticmethod
+    def _extract_score(result_text: str) -> Optional[int]:
+        """Extract an integer "X/10" or "X üzerinden 10" health score"""
+        try:
+            score_match = re.search(r'(\d+)\s*[/üzerinden]\s*10', result_text)
+            if score_match:
+                return int(score_match.group(1))
+        except Exception:
+            pass
+        return None
+
+
+def create_ai_provider(provider_name: Optional[str] = None) -> AIProvider:
+    """
+    Build the AI provider selected by settings
+
+    Args:
+        provider_name: Override for settings.AI_PROVIDER ("gemini" or "fake")
+
+    Returns:
+        AIProvider instance
+    """
+    name = (provider_name or settings.AI_PROVIDER).lower()
+
+    if name == "gemini":
+        from .gemini_service import GeminiService
+        return GeminiService()
+    if name == "fake":
+        from .fake_ai_service import FakeAIService
+        return FakeAIService()
+
+    raise ValueError(f"Unknown AI provider: {name}")
+
+
+# Global provider instance used by the routers
+ai_service = create_ai_provider()
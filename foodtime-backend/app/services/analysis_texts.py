@@ -0,0 +1,71 @@
+"""
+Maintenance of the analysis_texts side table
+
+Analysis prose used to live inline in ``food_analyses.analysis_result``.
+``python -m app.migrate`` moves it into ``analysis_texts`` in batches and
+clears the old column, which the current models no longer map; the column
+itself is left in place for instances of the previous release still
+running during a deploy (anything they write is moved by the next run).
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+from ..models.analysis_text import encode_text, store_texts
+
+MIGRATION_BATCH_SIZE = 1000
+
+# Unreferenced texts younger than this may belong to an analysis being written
+ORPHAN_GRACE = timedelta(days=1)
+
+
+def migrate_legacy_texts(conn: Connection, batch_size: int = MIGRATION_BATCH_SIZE) -> int:
+    """
+    Move inline analysis texts into analysis_texts
+
+    Commits after each batch, so a large table is not moved in one long
+    transaction and an interrupted run resumes where it stopped.
+
+    Returns:
+        Number of analyses moved
+    """
+    columns = {column["name"] for column in inspect(conn).get_columns("food_analyses")}
+    if "analysis_result" not in columns:
+        return 0
+
+    select_batch = text(
+        "SELECT id, analysis_result FROM food_analyses"
+        " WHERE analysis_result IS NOT NULL ORDER BY id LIMIT :limit"
+    )
+    update_row = text(
+        "UPDATE food_analyses SET text_digest = :digest, analysis_result = NULL WHERE id = :id"
+    )
+
+    moved = 0
+    while True:
+        rows = conn.execute(select_batch, {"limit": batch_size}).all()
+        if not rows:
+            return moved
+        encoded = [(row.id, encode_text(row.analysis_result)) for row in rows]
+        store_texts(conn, [pair for _, pair in encoded])
+        conn.execute(update_row, [{"id": row_id, "digest": digest} for row_id, (digest, _) in encoded])
+        conn.commit()
+        moved += len(rows)
+
+
+def prune_orphaned_texts(conn: Connection) -> int:
+    """
+    Delete texts no analysis refers to any more (meals and users deleted)
+
+    Texts touched within ORPHAN_GRACE are kept: their analysis may not be
+    committed yet.
+
+    Returns:
+        Number of deleted texts
+    """
+    return conn.execute(text(
+        "DELETE FROM analysis_texts WHERE touched_at < :cutoff AND NOT EXISTS"
+        " (SELECT 1 FROM food_analyses a WHERE a.text_digest = analysis_texts.digest)"
+    ), {"cutoff": datetime.utcnow() - ORPHAN_GRACE}).rowcount
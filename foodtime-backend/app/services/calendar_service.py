@@ -0,0 +1,68 @@
+"""
+Calendar heatmaps (month and year views)
+
+Built from the same per-day aggregate query as the trends: one query per
+calendar, however long the period, and no AI call.
+"""
+
+import calendar
+from datetime import date, timedelta
+from typing import Optional
+
+from ..schemas.report import CalendarResponse
+from .trends_service import TrendsService
+
+
+class CalendarService:
+    """Per-day arrays for rendering a heatmap"""
+
+    @staticmethod
+    def build_calendar(user_id: int, start: date, end: date, calorie_target: Optional[float]) -> CalendarResponse:
+        """
+        Per-day health score, calories and calorie adherence from start to end
+
+        Args:
+            user_id: Owner of the meals
+            start: First day (inclusive)
+            end: Last day (inclusive)
+            calorie_target: Daily calorie target adherence is measured against
+
+        Returns:
+            Arrays with one entry per day, index 0 being ``start``
+        """
+        days = (end - start).days + 1
+        score = [None] * days
+        calories = [None] * days
+        adherence = [None] * days
+        logged = [False] * days
+
+        for meal_date, day_score, day_calories, *_ in TrendsService.load_daily_rows(user_id, start, end):
+            i = (meal_date - start).days
+            logged[i] = True
+            if day_score is not None:
+                score[i] = round(day_score, 1)
+            if day_calories is not None:
+                calories[i] = round(day_calories)
+                if calorie_target:
+                    adherence[i] = round(day_calories / calorie_target * 100)
+
+        return CalendarResponse(
+            start=start,
+            end=end,
+            logged_days=sum(logged),
+            calorie_target=calorie_target,
+            health_score=score,
+            calories=calories,
+            adherence=adherence,
+            logged=logged
+        )
+
+    @staticmethod
+    def month_range(year: int, month: int):
+        """First and last day of a month"""
+        return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+    @staticmethod
+    def year_range(year: int):
+        """First and last day of a year"""
+        return date(year, 1, 1), date(year, 12, 31)
@@ -0,0 +1,85 @@
+"""
+Circuit breaker for calls to external services
+"""
+
+import threading
+import time
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker
+
+    closed    - calls pass through; failures are counted
+    open      - calls are rejected until ``reset_timeout`` has elapsed
+    half_open - one trial call is let through; success closes the circuit,
+                failure opens it again
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = 0.0
+        self._state = self.CLOSED
+        self._trial_in_progress = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """Current state, moving open -> half_open once the timeout passed"""
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+                self._trial_in_progress = False
+            return self._state
+
+    def allow(self) -> bool:
+        """Return True if a call may be attempted now"""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN:
+            with self._lock:
+                if not self._trial_in_progress:
+                    self._trial_in_progress = True
+                    return True
+        return False
+
+    def release_trial(self):
+        """
+        Give back a half-open trial that ended without a verdict
+
+        For a trial call that was cancelled (client disconnect, shutdown),
+        so the next call can try instead of the circuit staying rejected.
+        """
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._trial_in_progress = False
+
+    def record_success(self):
+        """Report a successful call"""
+        with self._lock:
+            self._failures = 0
+            self._state = self.CLOSED
+            self._trial_in_progress = False
+
+    def record_failure(self):
+        """Report a failed call"""
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_progress = False
+
+    def retry_after(self) -> float:
+        """Seconds until an open circuit allows a trial call"""
+        with self._lock:
+            if self._state != self.OPEN:
+                return 0.0
+            return max(self.reset_timeout - (time.monotonic() - self._opened_at), 0.0)
@@ -0,0 +1,138 @@
+"""
+In-process publish/subscribe of per-user change events
+
+Services publish meal and analysis changes after they commit; the
+``/api/events/stream`` endpoint subscribes and forwards them to the browser
+as server-sent events. Publishing is thread-safe (writes mostly happen in
+the threadpool) and never blocks: each subscriber has a bounded queue on
+its own event loop.
+
+Events only reach streams served by the same worker process. Streams
+therefore also poll the user's data version on every heartbeat and send a
+``sync`` event when another worker changed the data.
+"""
+
+import asyncio
+import itertools
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Set
+
+from ..config import settings
+from ..utils.metrics import registry, EVENTS_PUBLISHED, EVENT_STREAMS
+
+
+@dataclass(frozen=True)
+class Event:
+    """A change notification for one user"""
+    id: int
+    type: str
+    data: dict = field(default_factory=dict)
+
+
+class Subscription:
+    """One open stream's queue of pending events"""
+
+    def __init__(self, user_id: int, loop: asyncio.AbstractEventLoop, max_queue: int):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue: "asyncio.Queue[Event]" = asyncio.Queue(maxsize=max_queue)
+
+    def _deliver(self, event: Event):
+        """Enqueue an event (runs on the subscriber's loop)"""
+        if self.queue.full():
+            # A slow client fell behind: drop the backlog and ask it to resync
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            event = Event(id=event.id, type="sync")
+        self.queue.put_nowait(event)
+
+    async def next_event(self, timeout: float) -> Optional[Event]:
+        """Wait for the next event, or None after ``timeout`` seconds"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventBus:
+    """Registry of subscriptions keyed by user"""
+
+    def __init__(self, max_queue: int):
+        self.max_queue = max_queue
+        self._subscriptions: Dict[int, Set[Subscription]] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id: int, limit: Optional[int] = None) -> Optional[Subscription]:
+        """
+        Register a subscription on the running event loop
+
+        Args:
+            user_id: Subscribing user
+            limit: Most subscriptions the user may hold; counted and added
+                under one lock, so concurrent subscribers cannot overshoot
+
+        Returns:
+            The subscription, or None if the user is at ``limit``
+        """
+        subscription = Subscription(user_id, asyncio.get_running_loop(), self.max_queue)
+        with self._lock:
+            subscriptions = self._subscriptions.setdefault(user_id, set())
+            if limit is not None and len(subscriptions) >= limit:
+                return None
+            subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """Remove a subscription"""
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+    def subscriber_count(self, user_id: int) -> int:
+        """Number of open streams for a user in this process"""
+        with self._lock:
+            return len(self._subscriptions.get(user_id, ()))
+
+    def publish(self, user_id: int, event_type: str, data: Optional[dict] = None):
+        """
+        Send an event to every stream the user has open
+
+        Args:
+            user_id: User whose data changed
+            event_type: Event name, e.g. "meal.created"
+            data: JSON-serializable payload
+        """
+        EVENTS_PUBLISHED.inc(type=event_type)
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        if not subscriptions:
+            return
+
+        event = Event(id=next(self._ids), type=event_type, data=data or {})
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._deliver, event)
+            except RuntimeError:
+                # Loop already closed (worker shutting down)
+                self.unsubscribe(subscription)
+
+    def stream_count(self) -> int:
+        """Open streams across all users in this process"""
+        with self._lock:
+            return sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+
+
+# Global event bus instance
+event_bus = EventBus(max_queue=settings.SSE_QUEUE_SIZE)
+
+
+def _collect_stream_stats():
+    EVENT_STREAMS.set(event_bus.stream_count())
+
+
+registry.add_collector(_collect_stream_stats)
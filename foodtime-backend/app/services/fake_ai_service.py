@@ -0,0 +1,162 @@
+"""
+Fake AI Service
+Deterministic local stand-in for Gemini used for load testing and offline runs
+"""
+
+import asyncio
+import hashlib
+import math
+import random
+import re
+from typing import List, Optional
+
+from ..config import settings
+from .ai_provider import AIProvider, AIProviderError, BATCH_SECTION
+
+
+DAILY_TEMPLATE = (
+    "Günün genel sağlık puanı {score}/10. "
+    "Kalori: {calories} kcal, Protein: {protein}g, Karbonhidrat: {carbs}g, Yağ: {fat}g.\n\n"
+    "Sabah öğününüz güne enerjik bir başlangıç sağlıyor; özellikle protein kaynağı olarak "
+    "yumurta ve peynir tercih etmeniz tokluk süresini uzatıyor. Beyaz ekmek yerine tam tahıllı "
+    "ekmek seçmeniz kan şekerinizin daha dengeli seyretmesine yardımcı olur.\n\n"
+    "Öğle öğününde sebze ağırlıklı bir tabak tercih etmeniz olumlu. Bununla birlikte porsiyon "
+    "kontrolüne dikkat etmeniz ve yemeğin yanına bir kase yoğurt veya cacık eklemeniz hem "
+    "sindirimi destekler hem de kalsiyum ihtiyacınıza katkı sağlar.\n\n"
+    "Akşam öğünü günün en ağır öğünü olmuş görünüyor. Yatmadan en az üç saat önce yemeyi "
+    "bitirmeniz ve kızartma yerine fırın veya haşlama yöntemlerini tercih etmeniz önerilir.\n\n"
+    "Yarın için önerilen menü: Sabah menemen, tam buğday ekmeği ve domates salatalık; öğle "
+    "mercimek çorbası, ızgara tavuk ve mevsim salatası; akşam zeytinyağlı taze fasulye, bulgur "
+    "pilavı ve ayran. Ara öğünlerde bir avuç çiğ badem ve mevsim meyvesi tüketebilirsiniz. "
+    "Gün boyunca en az iki litre su içmeyi unutmayın."
+)
+
+FOOD_TEMPLATE = (
+    "Sağlık puanı: {score}/10. Bu besin dengeli bir beslenme planında yer alabilir.\n\n"
+    "Yararlı maddeler: İçerdiği lif sindirim sistemini destekler ve uzun süre tok tutar. "
+    "B grubu vitaminleri enerji metabolizmasına katkı sağlarken magnezyum ve potasyum kas ve "
+    "sinir fonksiyonlarının düzenli çalışmasına yardımcı olur. Antioksidan bileşenler hücreleri "
+    "oksidatif strese karşı korur.\n\n"
+    "Zararlı maddeler: Hazır veya işlenmiş formlarında sodyum ve ilave şeker oranı yüksek "
+    "olabilir. Aşırı tüketildiğinde kalori alımını artırabilir; bu nedenle porsiyon kontrolüne "
+    "dikkat edilmesi ve mümkünse ev yapımı, katkısız seçeneklerin tercih edilmesi önerilir."
+)
+
+PHOTO_TEMPLATE = (
+    "Sağlık puanı: {score}/10. Görseldeki tabak genel olarak dengeli görünüyor.\n\n"
+    "Yararlı maddeler: Tabakta sebze ve protein kaynağı dengeli bir şekilde yer alıyor. "
+    "Sebzeler lif, C vitamini ve potasyum sağlarken protein kaynağı kas onarımını destekler. "
+    "Zeytinyağı kullanımı kalp sağlığı açısından olumlu tekli doymamış yağ asitleri içerir.\n\n"
+    "Zararlı maddeler: Porsiyon büyüklüğü ve sos miktarı toplam kaloriyi artırıyor olabilir. "
+    "Yanında sunulan beyaz pirinç veya ekmek kan şekerini hızlı yükseltebilir; tam tahıllı "
+    "alternatifler tercih edilmesi önerilir."
+)
+
+WEEKLY_TEMPLATE = (
+    "Haftanın güçlü yönleri: Bu hafta öğünlerinizi düzenli kaydettiniz ve kahvaltıyı atlamadınız. "
+    "Sebze tüketiminiz hafta ortasında belirgin şekilde arttı ve ortalama sağlık puanınız "
+    "{score}/10 seviyesinde kaldı.\n\n"
+    "Dikkat edilmesi gereken noktalar: Hafta sonu kalori alımınız hedefinizin üzerine çıktı ve "
+    "akşam öğünlerinde hamur işi tüketimi yoğunlaştı. Protein dağılımınız günler arasında dengesiz "
+    "görünüyor.\n\n"
+    "Gelecek hafta için öneriler: Her ana öğüne bir protein kaynağı ekleyin, hafta sonu için "
+    "önceden plan yapın ve akşam yemeklerini daha erken saatlere çekin. Küçük adımlarla "
+    "ilerlemeye devam edin, doğru yoldasınız!"
+)
+
+
+class FakeAIService(AIProvider):
+    """
+    Local AI provider that never touches the network
+
+    Responses are derived from a hash of the prompt, so the same input
+    always yields the same text and scores. Latency and failures are drawn
+    from a seeded generator configured through settings.
+    """
+
+    name = "fake"
+
+    def __init__(
+        self,
+        latency_ms: Optional[float] = None,
+        latency_spread_ms: Optional[float] = None,
+        distribution: Optional[str] = None,
+        failure_rate: Optional[float] = None,
+        seed: Optional[int] = None
+    ):
+        """Configure latency distribution and failure injection"""
+        super().__init__()
+        self.latency_ms = settings.FAKE_AI_LATENCY_MS if latency_ms is None else latency_ms
+        self.latency_spread_ms = (
+            settings.FAKE_AI_LATENCY_SPREAD_MS if latency_spread_ms is None else latency_spread_ms
+        )
+        self.distribution = (distribution or settings.FAKE_AI_LATENCY_DISTRIBUTION).lower()
+        self.failure_rate = settings.FAKE_AI_FAILURE_RATE if failure_rate is None else failure_rate
+        self._random = random.Random(settings.FAKE_AI_SEED if seed is None else seed)
+
+        if self.distribution not in ("constant", "uniform", "normal", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {self.distribution}")
+
+    def _sample_latency(self) -> float:
+        """Draw one latency value in seconds (mean/spread are in milliseconds)"""
+        mean = self.latency_ms
+        spread = self.latency_spread_ms
+
+        if self.distribution == "uniform":
+            value = self._random.uniform(mean - spread, mean + spread)
+        elif self.distribution == "normal":
+            value = self._random.gauss(mean, spread)
+        elif self.distribution == "lognormal" and mean > 0:
+            # Pick mu/sigma so the distribution has the configured mean and deviation
+            sigma = math.sqrt(math.log(1 + (spread / mean) ** 2))
+            mu = math.log(mean) - sigma ** 2 / 2
+            value = self._random.lognormvariate(mu, sigma)
+        else:
+            value = mean
+
+        return max(value, 0.0) / 1000
+
+    async def _generate(self, method: str, prompt: str, image_parts: Optional[List[dict]] = None) -> str:
+        """Return canned Turkish analysis text after a simulated delay"""
+        await asyncio.sleep(self._sample_latency())
+
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            raise AIProviderError("Simulated AI provider failure")
+
+        digest = hashlib.sha256(prompt.encode("utf-8"))
+        for image_part in image_parts or ():
+            digest.update(image_part["data"])
+        rng = random.Random(digest.digest())
+
+        score = rng.randint(4, 9)
+        if method == "analyze_food_batch":
+            count = len(re.findall(r"^ÖĞE \d+:", prompt, re.MULTILINE))
+            text = self._batch_text(FOOD_TEMPLATE, count, rng)
+        elif method == "analyze_photo_batch":
+            text = self._batch_text(PHOTO_TEMPLATE, len(image_parts or ()), rng)
+        elif method == "analyze_daily_meals":
+            text = DAILY_TEMPLATE.format(
+                score=score,
+                calories=rng.randrange(1400, 2800, 10),
+                protein=rng.randint(50, 160),
+                carbs=rng.randint(120, 330),
+                fat=rng.randint(35, 110)
+            )
+        elif method == "analyze_photo":
+            text = PHOTO_TEMPLATE.format(score=score)
+        elif method == "generate_weekly_insights":
+            text = WEEKLY_TEMPLATE.format(score=score)
+        else:
+            text = FOOD_TEMPLATE.format(score=score)
+
+        # Rough token estimate (~4 characters per token) so spend metrics move
+        self._record_usage(method, len(prompt) // 4, len(text) // 4)
+        return text
+
+    @staticmethod
+    def _batch_text(template: str, count: int, rng: random.Random) -> str:
+        """One templated section per batched item"""
+        return "\n\n".join(
+            BATCH_SECTION.format(index=index) + "\n" + template.format(score=rng.randint(4, 9))
+            for index in range(1, count + 1)
+        )
@@ -0,0 +1,302 @@
+"""
+Local food-composition database
+
+A bundled table of common Turkish foods (``app/data/foods_tr.csv``: values
+per 100 g, a typical portion and a health score) kept in a compact
+in-memory index. ``analyze_food`` answers known foods from it without a
+model call and falls back to it when the AI provider is unavailable.
+
+Names and aliases are normalized (Turkish-aware lowercasing, diacritics
+folded, punctuation dropped) and matched exactly first, then by trigram
+similarity so typos and missing Turkish characters still hit; a fuzzy
+match must account for every word of the query, so "muzlu süt" is not
+answered as "Süt". A leading quantity is counted in the food's portion
+unit ("3 yumurta", "yarım dilim ekmek"). Nutrient values live in ``array``
+columns indexed by row.
+"""
+
+import csv
+import re
+import threading
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from ..utils.metrics import record_cache_lookup
+
+DATA_FILE = Path(__file__).resolve().parent.parent / "data" / "foods_tr.csv"
+
+# Python's lower() maps "I" to "i"; Turkish maps it to "ı" (and "İ" to "i")
+_TURKISH_UPPER = str.maketrans({"I": "ı", "İ": "i"})
+_FOLD = str.maketrans("çğıöşüâîû", "cgiosuaiu")
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+# Leading quantity: "200 g ...", "2 adet ...", "yarım porsiyon ...", "3 ..."
+_QUANTITY = re.compile(
+    r"^(?P<amount>\d+(?:[.,]\d+)?|yarim|bir|iki|uc|dort|bes)\s*"
+    r"(?:(?P<grams>g|gr|gram|ml)|(?P<unit>adet|tane|porsiyon|dilim|kase|bardak|avuc|kasik))?\b\s*"
+)
+_WORD_AMOUNTS = {"yarim": 0.5, "bir": 1, "iki": 2, "uc": 3, "dort": 4, "bes": 5}
+
+# Portion units as normalized in queries and in the portion column ("1 yemek kaşığı")
+_UNITS = {"adet": "adet", "tane": "adet", "porsiyon": "porsiyon", "dilim": "dilim", "kase": "kase",
+          "bardak": "bardak", "avuc": "avuc", "kasik": "kasik", "kasigi": "kasik"}
+# Portions that are a part or a serving of a food, so a bare count does not
+# say how many of them: "yarım ekmek" is not half a slice, "4 köfte" not 4 servings
+_PART_UNITS = {"dilim", "kasik", "avuc", "porsiyon"}
+# Minimum similarity of a query word to some word of a fuzzily matched key
+WORD_MATCH_THRESHOLD = 0.5
+
+
+def normalize(text: str) -> str:
+    """Lowercase Turkish text, fold diacritics to ASCII and collapse punctuation"""
+    text = text.translate(_TURKISH_UPPER).lower().translate(_FOLD)
+    return _NON_WORD.sub(" ", text).strip()
+
+
+def trigrams(text: str) -> set:
+    """Character trigrams of a normalized string, padded at word boundaries"""
+    padded = f" {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(first: str, second: str) -> float:
+    """Dice coefficient of two normalized strings' trigrams"""
+    first_grams, second_grams = trigrams(first), trigrams(second)
+    return 2 * len(first_grams & second_grams) / (len(first_grams) + len(second_grams))
+
+
+def format_amount(amount: float) -> str:
+    """Amount as written in portions ("yarım", "2", "1.5")"""
+    return "yarım" if amount == 0.5 else f"{amount:g}"
+
+
+def parse_portion(portion: str) -> Tuple[float, Optional[str], str]:
+    """
+    Split a portion description into number, unit and wording
+
+    Returns:
+        (number, unit, text after the number), e.g. (3, "adet", "adet") for
+        "3 adet" or (1, None, "orta boy") for "1 orta boy"; the unit is None
+        for whole items without a unit word, the number 1 when none is given
+    """
+    first, _, rest = portion.partition(" ")
+    folded = normalize(first)
+    if folded in _WORD_AMOUNTS:
+        number = float(_WORD_AMOUNTS[folded])
+    elif re.fullmatch(r"\d+(?:[.,]\d+)?", first):
+        number = float(first.replace(",", "."))
+    else:
+        number, rest = 1.0, portion
+    unit = next((_UNITS[word] for word in normalize(rest).split() if word in _UNITS), None)
+    return number, unit, rest
+
+
+@dataclass(frozen=True)
+class FoodMatch:
+    """A database food scaled to the amount in the query"""
+    name: str
+    portion: str
+    grams: float
+    calories: float
+    protein: float
+    carbs: float
+    fat: float
+    health_score: int
+    similarity: float
+
+
+class FoodDatabase:
+    """
+    Read-only food index, loaded from the CSV on first lookup
+
+    Every name and alias is a search key pointing at a food row. Keys are
+    found exactly through a dict, or approximately through trigram postings
+    scored with the Dice coefficient (2 x shared / (query + key trigrams)).
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._loaded = False
+        self._lock = threading.Lock()
+
+        # Food columns, one entry per row
+        self._names: List[str] = []
+        self._portions: List[str] = []
+        self._grams = array("f")
+        self._calories = array("f")
+        self._protein = array("f")
+        self._carbs = array("f")
+        self._fat = array("f")
+        self._scores = array("B")
+
+        # Search keys (names and aliases)
+        self._exact: Dict[str, int] = {}
+        self._keys: List[str] = []
+        self._key_rows = array("H")
+        self._key_sizes = array("H")
+        self._postings: Dict[str, array] = {}
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self._names)
+
+    def _ensure_loaded(self):
+        """Build the index once, on first use"""
+        if self._loaded:
+            return
+        with self._lock:
+            if not self._loaded:
+                self._load()
+                self._loaded = True
+
+    def _load(self):
+        """Read the CSV into columns and build the key index"""
+        with open(self.path, encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                index = len(self._names)
+                self._names.append(row["name"])
+                self._portions.append(row["portion"])
+                self._grams.append(float(row["grams"]))
+                self._calories.append(float(row["calories"]))
+                self._protein.append(float(row["protein"]))
+                self._carbs.append(float(row["carbs"]))
+                self._fat.append(float(row["fat"]))
+                self._scores.append(int(row["health_score"]))
+
+                aliases = [alias for alias in row["aliases"].split("|") if alias]
+                for key in [row["name"], *aliases]:
+                    self._add_key(normalize(key), index)
+
+    def _add_key(self, key: str, row: int):
+        """Register a normalized search key for a row"""
+        if not key or key in self._exact:
+            return
+        key_id = len(self._key_rows)
+        self._exact[key] = row
+        self._keys.append(key)
+        self._key_rows.append(row)
+        grams = trigrams(key)
+        self._key_sizes.append(len(grams))
+        for gram in grams:
+            self._postings.setdefault(gram, array("H")).append(key_id)
+
+    def _best_row(self, key: str) -> Optional[Tuple[int, float]]:
+        """
+        Row with the most similar key and its similarity (0-1)
+
+        A fuzzy match only counts when every word of the query resembles a
+        word of the key: "diyet kola" shares most trigrams with "kola", but
+        "diyet" is content the key does not have.
+        """
+        row = self._exact.get(key)
+        if row is not None:
+            return row, 1.0
+
+        grams = trigrams(key)
+        shared: Dict[int, int] = {}
+        for gram in grams:
+            for key_id in self._postings.get(gram, ()):
+                shared[key_id] = shared.get(key_id, 0) + 1
+        if not shared:
+            return None
+
+        key_id, score = max(
+            ((key_id, 2 * count / (len(grams) + self._key_sizes[key_id])) for key_id, count in shared.items()),
+            key=lambda item: item[1]
+        )
+        key_words = self._keys[key_id].split()
+        for word in key.split():
+            if max(similarity(word, key_word) for key_word in key_words) < WORD_MATCH_THRESHOLD:
+                return None
+        return self._key_rows[key_id], score
+
+    @staticmethod
+    def _parse_quantity(text: str) -> Tuple[str, Optional[float], Optional[float], Optional[str]]:
+        """
+        Split a leading quantity off a normalized query
+
+        Returns:
+            (food text, grams or None, count or None, unit of the count or
+            None when no unit was given)
+        """
+        match = _QUANTITY.match(text)
+        if not match or match.end() == len(text):
+            return text, None, None, None
+        amount_text = match.group("amount")
+        amount = _WORD_AMOUNTS.get(amount_text)
+        if amount is None:
+            amount = float(amount_text.replace(",", "."))
+        if amount <= 0:
+            return text, None, None, None
+        if match.group("grams"):
+            return text[match.end():], amount, None, None
+        unit = match.group("unit")
+        return text[match.end():], None, amount, _UNITS[unit] if unit else None
+
+    def _scale_portion(self, row: int, count: float, unit: Optional[str]) -> Optional[Tuple[str, float]]:
+        """
+        Portion text and grams for ``count`` of ``unit`` of a food
+
+        A count without a unit is counted in the food's own unit. Returns
+        None when the quantity cannot be converted: another unit than the
+        food's, or a bare count of a food portioned in parts or servings
+        ("2 ekmek" are loaves, not slices).
+        """
+        portion, grams = self._portions[row], self._grams[row]
+        number, portion_unit, wording = parse_portion(portion)
+        if unit == "porsiyon" and portion_unit != "porsiyon":
+            # A serving is the database portion, whatever its unit
+            return (portion if count == 1 else f"{count:g} x {portion}"), grams * count
+        if unit is None and portion_unit in _PART_UNITS:
+            return None
+        if unit is not None and unit != (portion_unit or "adet"):
+            return None
+        return f"{format_amount(count)} {wording}", grams / number * count
+
+    def lookup(self, description: str, threshold: float) -> Optional[FoodMatch]:
+        """
+        Find a food and scale its values to the quantity in the description
+
+        Args:
+            description: Free text such as "2 adet yumurta" or "200 g somon"
+            threshold: Minimum similarity (1.0 = exact name or alias)
+
+        Returns:
+            FoodMatch, or None when nothing is similar enough
+        """
+        self._ensure_loaded()
+        text, grams, count, unit = self._parse_quantity(normalize(description))
+        best = self._best_row(text) if text else None
+        scaled = None
+        if best is not None and best[1] >= threshold:
+            row, score = best
+            if grams is not None:
+                scaled = f"{grams:g} g", grams
+            elif count is None:
+                scaled = self._portions[row], float(self._grams[row])
+            else:
+                scaled = self._scale_portion(row, count, unit)
+        record_cache_lookup("food_db", scaled is not None)
+        if scaled is None:
+            return None
+
+        portion, grams = scaled
+
+        factor = grams / 100
+        return FoodMatch(
+            name=self._names[row],
+            portion=portion,
+            grams=round(grams, 1),
+            calories=float(round(self._calories[row] * factor)),
+            protein=round(self._protein[row] * factor, 1),
+            carbs=round(self._carbs[row] * factor, 1),
+            fat=round(self._fat[row] * factor, 1),
+            health_score=self._scores[row],
+            similarity=round(score, 3)
+        )
+
+
+# Global food database instance
+food_database = FoodDatabase(DATA_FILE)
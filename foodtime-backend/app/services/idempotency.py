@@ -0,0 +1,193 @@
+"""
+Idempotency keys for expensive POST endpoints
+
+A client that retries a request with the same ``Idempotency-Key`` gets the
+stored response of the first attempt instead of a second AI call and a
+second analysis row. The first request claims the key with a single
+INSERT ... ON CONFLICT DO UPDATE (PostgreSQL and SQLite >= 3.35), so
+concurrent duplicates in any worker see the claim; they wait for the
+response (woken at once in the same worker, by polling otherwise) and get
+it as a replay. Failed requests release their key so a retry runs again;
+only successful responses are stored, for IDEMPOTENCY_TTL_SECONDS. Each
+claim carries a random token that completing or releasing must present, so
+a request outliving its lock cannot overwrite or delete the claim of the
+request that took the key over.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from ..config import settings
+from ..database import session_scope
+from ..models.idempotency_key import IdempotencyKey
+from ..utils.metrics import IDEMPOTENCY_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+CLAIMED = "claimed"
+REPLAY = "replay"
+MISMATCH = "mismatch"
+IN_PROGRESS = "in_progress"
+
+
+@dataclass(frozen=True)
+class StoredResponse:
+    """Response of the first request with a key"""
+    status_code: int
+    body: bytes
+
+
+def fingerprint(body: bytes) -> str:
+    """Digest identifying a request body"""
+    return hashlib.sha256(body).hexdigest()
+
+
+class IdempotencyStore:
+    """Claims keys, stores responses and lets duplicates wait for them"""
+
+    def __init__(self):
+        self._events: Dict[str, asyncio.Event] = {}
+        self._next_prune = 0.0
+
+    def claim(self, key: str, digest: str):
+        """
+        Claim a key unless another request holds it or stored a response
+
+        Returns:
+            (claim token, None) when claimed, otherwise (None, the existing
+            row's (fingerprint, status_code, body))
+        """
+        now = time.time()
+        token = uuid.uuid4().hex
+        with session_scope() as db:
+            dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+            statement = dialect.insert(IdempotencyKey).values(
+                key=key, fingerprint=digest, status_code=None, body=None, claim_token=token,
+                expires_at=now + settings.IDEMPOTENCY_LOCK_SECONDS
+            )
+            claimed = db.execute(
+                statement.on_conflict_do_update(
+                    index_elements=["key"],
+                    set_={
+                        "fingerprint": statement.excluded.fingerprint,
+                        "status_code": None,
+                        "body": None,
+                        "claim_token": statement.excluded.claim_token,
+                        "expires_at": statement.excluded.expires_at
+                    },
+                    where=IdempotencyKey.expires_at < now
+                ).returning(IdempotencyKey.key)
+            ).first() is not None
+            if now >= self._next_prune:
+                self._next_prune = now + settings.IDEMPOTENCY_PRUNE_SECONDS
+                db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at < now))
+            db.commit()
+            if claimed:
+                return token, None
+            return None, db.execute(
+                select(IdempotencyKey.fingerprint, IdempotencyKey.status_code, IdempotencyKey.body)
+                .where(IdempotencyKey.key == key)
+            ).first()
+
+    async def acquire(self, key: str, digest: str):
+        """
+        Claim a key, or wait for the request holding it
+
+        Returns:
+            (CLAIMED, claim token), (REPLAY, StoredResponse), (MISMATCH, None) when
+            the key was used with a different body, or (IN_PROGRESS, None)
+            when the first request did not finish within
+            IDEMPOTENCY_WAIT_SECONDS
+        """
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+        waited = False
+        while True:
+            token, row = await run_in_threadpool(self.claim, key, digest)
+            if token is not None:
+                outcome, stored = CLAIMED, token
+            elif row.fingerprint != digest:
+                outcome, stored = MISMATCH, None
+            elif row.status_code is not None:
+                outcome, stored = REPLAY, StoredResponse(row.status_code, row.body)
+            else:
+                # Pending (or taken over after expiry; then the loop claims it)
+                remaining = deadline - time.monotonic()
+                if remaining > 0:
+                    waited = True
+                    event = self._events.setdefault(key, asyncio.Event())
+                    try:
+                        await asyncio.wait_for(event.wait(), min(settings.IDEMPOTENCY_POLL_SECONDS, remaining))
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                outcome, stored = IN_PROGRESS, None
+            if waited:
+                # Not woken when another worker held the key; don't keep the event
+                self._events.pop(key, None)
+            IDEMPOTENCY_REQUESTS.inc(outcome=outcome)
+            return outcome, stored
+
+    async def complete(self, key: str, token: str, status_code: int, body: bytes):
+        """Store the response of the request holding a key (``token`` from acquire)"""
+        def store() -> bool:
+            with session_scope() as db:
+                result = db.execute(
+                    update(IdempotencyKey)
+                    .where(
+                        IdempotencyKey.key == key,
+                        IdempotencyKey.claim_token == token,
+                        IdempotencyKey.status_code.is_(None)
+                    )
+                    .values(status_code=status_code, body=body, expires_at=time.time() + settings.IDEMPOTENCY_TTL_SECONDS)
+                )
+                db.commit()
+                return result.rowcount > 0
+
+        try:
+            stored = await run_in_threadpool(store)
+        except Exception as e:
+            # The response itself succeeded; retries will just run again
+            logger.warning("Could not store idempotent response for %s: %s", key, e)
+            await self.release(key, token)
+            return
+        if not stored:
+            # The lock expired and another request took the key over
+            logger.warning("Idempotency key %s was taken over; response not stored", key)
+        self._wake(key)
+
+    async def release(self, key: str, token: str):
+        """Give up a claimed key (the request failed) so a retry runs again"""
+        def remove():
+            with session_scope() as db:
+                db.execute(delete(IdempotencyKey).where(
+                    IdempotencyKey.key == key,
+                    IdempotencyKey.claim_token == token,
+                    IdempotencyKey.status_code.is_(None)
+                ))
+                db.commit()
+
+        try:
+            await run_in_threadpool(remove)
+        except Exception as e:
+            # The claim expires after IDEMPOTENCY_LOCK_SECONDS anyway
+            logger.warning("Could not release idempotency key %s: %s", key, e)
+        self._wake(key)
+
+    def _wake(self, key: str):
+        """Let duplicates waiting in this worker re-check the key"""
+        event = self._events.pop(key, None)
+        if event is not None:
+            event.set()
+
+
+# Global instance
+idempotency_store = IdempotencyStore()
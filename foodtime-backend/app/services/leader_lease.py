@@ -0,0 +1,95 @@
+"""
+Database leases electing one process to run a background job
+
+A lease is a row in ``scheduler_leases``; the process holding it renews it
+while working and any other process may take it over once it has expired,
+so multi-worker and multi-replica deployments run each job once.
+"""
+
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+
+from ..database import session_scope
+from ..models.scheduler_lease import SchedulerLease
+from ..utils.metrics import SCHEDULER_LEADER
+
+
+class LeaderLease:
+    """
+    Database lease giving one process the right to run a job
+
+    The holder renews the lease before it expires; any other process may
+    take it over once it has. Timestamps come from the workers' clocks, so
+    the lease duration should be well above their clock skew.
+    """
+
+    def __init__(self, name: str, duration: float):
+        self.name = name
+        self.duration = duration
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.held = False
+        # Monotonic time of the last successful acquire
+        self._renewed_at = 0.0
+
+    def acquire(self) -> bool:
+        """Take or renew the lease; returns True while this process holds it"""
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.duration)
+
+        with session_scope() as db:
+            result = db.execute(
+                update(SchedulerLease)
+                .where(
+                    SchedulerLease.name == self.name,
+                    or_(SchedulerLease.holder == self.holder, SchedulerLease.expires_at < now)
+                )
+                .values(holder=self.holder, expires_at=expires_at)
+            )
+            if result.rowcount == 0:
+                if db.query(SchedulerLease.name).filter(SchedulerLease.name == self.name).first():
+                    db.rollback()
+                    return self._held(False)
+                db.add(SchedulerLease(name=self.name, holder=self.holder, expires_at=expires_at))
+            try:
+                db.commit()
+            except IntegrityError:
+                # Another process created the lease first
+                db.rollback()
+                return self._held(False)
+        self._renewed_at = time.monotonic()
+        return self._held(True)
+
+    def renew(self) -> bool:
+        """
+        Keep the lease while working; returns False once it is lost
+
+        Cheap enough to call per unit of work: the database is only written
+        once a third of the duration has passed since the last renewal.
+        """
+        if self.held and time.monotonic() - self._renewed_at < self.duration / 3:
+            return True
+        return self.acquire()
+
+    def release(self):
+        """Give the lease up early (e.g. on shutdown) if this process holds it"""
+        if not self.held:
+            return
+        with session_scope() as db:
+            db.execute(
+                update(SchedulerLease)
+                .where(SchedulerLease.name == self.name, SchedulerLease.holder == self.holder)
+                .values(expires_at=datetime.utcnow())
+            )
+            db.commit()
+        self._held(False)
+
+    def _held(self, held: bool) -> bool:
+        self.held = held
+        SCHEDULER_LEADER.set(1 if held else 0, job=self.name)
+        return held
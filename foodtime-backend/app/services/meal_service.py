@@ -3,23 +3,45 @@ Meal service for business logic
 """
 
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import desc, tuple_
 from ..models.meal import Meal
+from ..models.food_analysis import FoodAnalysis
 from ..schemas.meal import MealCreate
-from typing import List, Optional
+from .user_service import UserService
+from .response_cache import response_cache
+from .event_bus import event_bus
+from .search_service import SearchService
+from .report_service import ReportService
+from typing import List, Optional, Tuple
 from datetime import date, timedelta
+import base64
 
 
 class MealService:
     """Meal business logic"""
     
     @staticmethod
-    def create_meal(db: Session, meal_data: MealCreate) -> Meal:
-        """Create a new meal entry"""
+    def create_meal(db: Session, meal_data: MealCreate, notify: bool = True) -> Meal:
+        """
+        Create a new meal entry
+        
+        Args:
+            db: Database session
+            meal_data: Meal fields
+            notify: Publish a "meal.created" event (callers that publish a
+                richer event of their own pass False)
+        """
         meal = Meal(**meal_data.model_dump())
         db.add(meal)
+        db.flush()
+        SearchService.index_meal(db, meal.id)
+        ReportService.invalidate_week(db, meal.user_id, meal.meal_date)
+        data_version = UserService.bump_data_version(db, meal.user_id)
         db.commit()
+        response_cache.invalidate_user(meal.user_id)
         db.refresh(meal)
+        if notify:
+            MealService._publish("meal.created", meal.user_id, meal.id, meal.meal_date, data_version)
         return meal
     
     @staticmethod
@@ -40,18 +62,98 @@ class MealService:
         ).order_by(desc(Meal.meal_date)).limit(days).all()
     
     @staticmethod
-    def update_meal(db: Session, meal_id: int, meal_data: dict) -> Optional[Meal]:
-        """Update an existing meal"""
+    def get_meal_history_page(
+        db: Session,
+        user_id: int,
+        limit: int,
+        cursor: Optional[str] = None,
+        from_date: Optional[date] = None,
+        to_date: Optional[date] = None
+    ) -> Tuple[List[Meal], Optional[str]]:
+        """
+        Get one page of meal history, newest first
+        
+        Uses keyset pagination on (meal_date, id) so every page is a range
+        scan of the (user_id, meal_date, id) index, however deep it is.
+        
+        Args:
+            db: Database session
+            user_id: Owner of the meals
+            limit: Page size
+            cursor: Opaque cursor returned with the previous page
+            from_date: Inclusive lower bound on meal_date
+            to_date: Inclusive upper bound on meal_date
+            
+        Returns:
+            Tuple of (meals, next_cursor); next_cursor is None on the last page
+            
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        query = db.query(Meal).filter(Meal.user_id == user_id)
+        
+        if from_date:
+            query = query.filter(Meal.meal_date >= from_date)
+        if to_date:
+            query = query.filter(Meal.meal_date <= to_date)
+        if cursor:
+            cursor_date, cursor_id = MealService.decode_cursor(cursor)
+            query = query.filter(tuple_(Meal.meal_date, Meal.id) < tuple_(cursor_date, cursor_id))
+        
+        meals = query.order_by(desc(Meal.meal_date), desc(Meal.id)).limit(limit + 1).all()
+        
+        if len(meals) > limit:
+            meals = meals[:limit]
+            last = meals[-1]
+            return meals, MealService.encode_cursor(last.meal_date, last.id)
+        return meals, None
+    
+    @staticmethod
+    def encode_cursor(meal_date: date, meal_id: int) -> str:
+        """Encode a (meal_date, id) position as an opaque cursor"""
+        raw = f"{meal_date.isoformat()}:{meal_id}".encode("ascii")
+        return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+    
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[date, int]:
+        """Decode a cursor produced by encode_cursor"""
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("ascii")
+            date_part, id_part = raw.split(":")
+            return date.fromisoformat(date_part), int(id_part)
+        except Exception:
+            raise ValueError("Invalid cursor")
+    
+    @staticmethod
+    def update_meal(db: Session, meal_id: int, meal_data: dict, notify: bool = True) -> Optional[Meal]:
+        """Update an existing meal (``notify`` as in create_meal)"""
         meal = db.query(Meal).filter(Meal.id == meal_id).first()
         if not meal:
             return None
         
+        previous_date = meal.meal_date
         for field, value in meal_data.items():
             if hasattr(meal, field):
                 setattr(meal, field, value)
         
+        db.flush()
+        if meal.meal_date != previous_date:
+            # PostgreSQL's (meal_id, meal_date) foreign key cascades this already
+            db.query(FoodAnalysis).filter(
+                FoodAnalysis.meal_id == meal.id,
+                FoodAnalysis.meal_date != meal.meal_date
+            ).update({FoodAnalysis.meal_date: meal.meal_date}, synchronize_session=False)
+        SearchService.index_meal(db, meal.id)
+        ReportService.invalidate_week(db, meal.user_id, meal.meal_date)
+        if meal.meal_date != previous_date:
+            ReportService.invalidate_week(db, meal.user_id, previous_date)
+        data_version = UserService.bump_data_version(db, meal.user_id)
         db.commit()
+        response_cache.invalidate_user(meal.user_id)
         db.refresh(meal)
+        if notify:
+            MealService._publish("meal.updated", meal.user_id, meal.id, meal.meal_date, data_version)
         return meal
     
     @staticmethod
@@ -61,6 +163,33 @@ class MealService:
         if not meal:
             return False
         
+        user_id, meal_date = meal.user_id, meal.meal_date
         db.delete(meal)
+        SearchService.remove_meal(db, meal_id)
+        ReportService.invalidate_week(db, user_id, meal_date)
+        data_version = UserService.bump_data_version(db, user_id)
         db.commit()
+        response_cache.invalidate_user(user_id)
+        MealService._publish("meal.deleted", user_id, meal_id, meal_date, data_version)
         return True
+    
+    @staticmethod
+    def describe_meal(meal: Meal) -> str:
+        """Short one-line description of a day's meals"""
+        meal_parts = []
+        if meal.morning_meal:
+            meal_parts.append(f"Sabah: {meal.morning_meal[:50]}")
+        if meal.afternoon_meal:
+            meal_parts.append(f"Öğle: {meal.afternoon_meal[:50]}")
+        if meal.evening_meal:
+            meal_parts.append(f"Akşam: {meal.evening_meal[:50]}")
+        return " | ".join(meal_parts) if meal_parts else "Öğün detayı yok"
+    
+    @staticmethod
+    def _publish(event_type: str, user_id: int, meal_id: int, meal_date: date, data_version: Optional[int]):
+        """Notify the user's open event streams about a committed meal change"""
+        event_bus.publish(user_id, event_type, {
+            "meal_id": meal_id,
+            "meal_date": meal_date.isoformat(),
+            "data_version": data_version
+        })
@@ -0,0 +1,334 @@
+"""
+Monthly range partitioning of meals and food_analyses (PostgreSQL)
+
+Both tables are partitioned by ``meal_date`` (food_analyses carries a copy
+of its meal's date), one partition per calendar month plus a default
+partition for dates no monthly partition covers. Queries bounded by date
+(today, this week, the last 10 days) then only touch one or two partitions.
+
+- ``python -m app.migrate`` converts existing plain tables (copying their
+  rows under an exclusive lock, so run it in a quiet period) and creates
+  the partitions for the current and the next PARTITION_MONTHS_AHEAD months
+- the partition maintainer repeats that hourly on the worker holding the
+  ``partitions`` lease and, when PARTITION_RETENTION_MONTHS is set, moves
+  months older than the window out of the live tables into compacted
+  copies in the ``archive`` schema
+
+SQLite (development) keeps plain tables; only the meal_date backfill runs,
+and so do PostgreSQL servers older than MIN_SERVER_VERSION.
+"""
+
+import asyncio
+import logging
+import re
+from datetime import date
+from typing import List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from ..config import settings
+from ..database import Base, engine
+from .leader_lease import LeaderLease
+
+logger = logging.getLogger(__name__)
+
+# (table, partition key) in conversion order: meals first, it is referenced
+PARTITIONED_TABLES = (("meals", "meal_date"), ("food_analyses", "meal_date"))
+ARCHIVE_SCHEMA = "archive"
+MEAL_FOREIGN_KEY = "fk_food_analyses_meal"
+
+# Foreign keys may reference partitioned tables from 12 on, but until 15 an
+# UPDATE moving a meal to another month's partition ran the foreign key's
+# delete action instead of ON UPDATE CASCADE, failing the meal date change
+MIN_SERVER_VERSION = 150000
+
+
+def partitioning_enabled(conn: Connection) -> bool:
+    """Whether tables are (to be) partitioned: enabled, on PostgreSQL >= MIN_SERVER_VERSION"""
+    if conn.dialect.name != "postgresql" or not settings.DB_PARTITIONING_ENABLED:
+        return False
+    version = int(conn.execute(text("SHOW server_version_num")).scalar())
+    if version < MIN_SERVER_VERSION:
+        logger.warning(
+            "Not partitioning: PostgreSQL %s is older than %s (set DB_PARTITIONING_ENABLED=false to silence)",
+            version, MIN_SERVER_VERSION
+        )
+        return False
+    return True
+
+
+def add_months(month: date, months: int) -> date:
+    """First day of the month ``months`` after (or before) ``month``'s"""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y_%m}"
+
+
+def _exists(conn: Connection, relation: str) -> bool:
+    return conn.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": relation}).scalar()
+
+
+def _is_partitioned(conn: Connection, table: str) -> bool:
+    return conn.execute(
+        text("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table))"),
+        {"table": table}
+    ).scalar()
+
+
+def backfill_partition_keys(conn: Connection) -> int:
+    """
+    Fill food_analyses.meal_date where it is missing
+
+    From the analysis's meal, or its creation date for analyses without
+    one. Runs on every database; rows written by this release already
+    carry the date.
+
+    Returns:
+        Number of updated analyses
+    """
+    updated = conn.execute(text(
+        "UPDATE food_analyses SET meal_date = (SELECT m.meal_date FROM meals m WHERE m.id = food_analyses.meal_id)"
+        " WHERE meal_date IS NULL AND meal_id IS NOT NULL"
+    )).rowcount
+    updated += conn.execute(text(
+        "UPDATE food_analyses SET meal_date = coalesce(date(created_at), CURRENT_DATE) WHERE meal_date IS NULL"
+    )).rowcount
+    return updated
+
+
+def _create_partition(conn: Connection, table: str, key: str, month: date) -> bool:
+    """
+    Create the partition for one month if missing
+
+    Skipped (with a warning) while the default partition holds rows of
+    that month, which PostgreSQL would refuse; they stay reachable there.
+    """
+    name = partition_name(table, month)
+    if _exists(conn, name):
+        return False
+    bounds = {"start": month, "end": add_months(month, 1)}
+    if _exists(conn, f"{table}_default") and conn.execute(
+        text(f"SELECT EXISTS (SELECT 1 FROM {table}_default WHERE {key} >= :start AND {key} < :end)"), bounds
+    ).scalar():
+        logger.warning("Not creating %s: %s_default holds rows of that month", name, table)
+        return False
+    conn.execute(text(
+        f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES FROM ('{bounds['start']}') TO ('{bounds['end']}')"
+    ))
+    return True
+
+
+def _ensure_table_partitions(conn: Connection, table: str, key: str, month: date) -> List[str]:
+    """Create a table's default partition and the partitions from ``month`` on"""
+    if not _exists(conn, f"{table}_default"):
+        conn.execute(text(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT"))
+    created = []
+    for offset in range(settings.PARTITION_MONTHS_AHEAD + 1):
+        if _create_partition(conn, table, key, add_months(month, offset)):
+            created.append(partition_name(table, add_months(month, offset)))
+    return created
+
+
+def ensure_partitions(conn: Connection, today: Optional[date] = None) -> List[str]:
+    """
+    Create the default partitions and this month's and upcoming ones
+
+    Returns:
+        Names of the created partitions
+    """
+    month = (today or date.today()).replace(day=1)
+    created = []
+    for table, key in PARTITIONED_TABLES:
+        created += _ensure_table_partitions(conn, table, key, month)
+    return created
+
+
+def _convert_table(conn: Connection, table: str, key: str):
+    """
+    Replace a plain table by a partitioned one holding the same rows
+
+    The primary key becomes (id, key), as PostgreSQL requires; foreign keys
+    of other tables pointing at it are dropped (they cannot reference id
+    alone any more) and its own are re-created on the new table.
+    """
+    legacy = f"{table}_unpartitioned"
+    own_foreign_keys = conn.execute(text(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint"
+        " WHERE conrelid = to_regclass(:table) AND contype = 'f'"
+    ), {"table": table}).all()
+    referencing = conn.execute(text(
+        "SELECT conrelid::regclass::text, conname FROM pg_constraint"
+        " WHERE confrelid = to_regclass(:table) AND contype = 'f' AND conrelid <> confrelid"
+    ), {"table": table}).all()
+    primary_key = conn.execute(text(
+        "SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(:table) AND contype = 'p'"
+    ), {"table": table}).scalar()
+    sequence = conn.execute(text("SELECT pg_get_serial_sequence(:table, 'id')"), {"table": table}).scalar()
+
+    for referencing_table, name in referencing:
+        conn.execute(text(f'ALTER TABLE {referencing_table} DROP CONSTRAINT "{name}"'))
+    for name, _ in own_foreign_keys:
+        conn.execute(text(f'ALTER TABLE {table} DROP CONSTRAINT "{name}"'))
+    if sequence:
+        # Keep the id sequence when the old table is dropped
+        conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY NONE"))
+    conn.execute(text(f"ALTER TABLE {table} RENAME TO {legacy}"))
+    if primary_key:
+        conn.execute(text(f'ALTER TABLE {legacy} RENAME CONSTRAINT "{primary_key}" TO "{legacy}_pkey"'))
+
+    conn.execute(text(
+        f"CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE)"
+        f" PARTITION BY RANGE ({key})"
+    ))
+    conn.execute(text(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id, {key})"))
+
+    # Monthly partitions for the months holding data and the upcoming ones;
+    # dates beyond those (typos far in the future) go to the default partition
+    this_month = date.today().replace(day=1)
+    first = conn.execute(text(f"SELECT min({key}) FROM {legacy}")).scalar()
+    month = min(first.replace(day=1), this_month) if first else this_month
+    while month < this_month:
+        _create_partition(conn, table, key, month)
+        month = add_months(month, 1)
+    _ensure_table_partitions(conn, table, key, this_month)
+
+    conn.execute(text(f"INSERT INTO {table} SELECT * FROM {legacy}"))
+    conn.execute(text(f"DROP TABLE {legacy}"))
+    if sequence:
+        conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {table}.id"))
+    for name, definition in own_foreign_keys:
+        conn.execute(text(f'ALTER TABLE {table} ADD CONSTRAINT "{name}" {definition}'))
+
+    # Secondary indexes went with the old table; created on the parent they cascade to partitions
+    for index in Base.metadata.tables[table].indexes:
+        index.create(bind=conn, checkfirst=True)
+    logger.info("Converted %s to monthly partitions by %s", table, key)
+
+
+def partition_tables(conn: Connection) -> bool:
+    """
+    Convert meals and food_analyses to partitioned tables if needed
+
+    Also links analyses to their meal with a (meal_id, meal_date) foreign
+    key that follows date changes, and creates upcoming partitions.
+
+    Returns:
+        True if a table was converted
+    """
+    converted = False
+    for table, key in PARTITIONED_TABLES:
+        if not _is_partitioned(conn, table):
+            _convert_table(conn, table, key)
+            converted = True
+
+    if not conn.execute(text("SELECT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = :name)"),
+                        {"name": MEAL_FOREIGN_KEY}).scalar():
+        conn.execute(text(
+            f"ALTER TABLE food_analyses ADD CONSTRAINT {MEAL_FOREIGN_KEY} FOREIGN KEY (meal_id, meal_date)"
+            " REFERENCES meals (id, meal_date) ON UPDATE CASCADE"
+        ))
+    ensure_partitions(conn)
+    return converted
+
+
+def archive_partitions(conn: Connection, today: Optional[date] = None) -> List[str]:
+    """
+    Move months older than PARTITION_RETENTION_MONTHS out of the live tables
+
+    Each such month's partitions are detached, copied compactly into the
+    archive schema and dropped, analyses before meals (their foreign key
+    points at meals); the months' search rows are deleted. Archived meals
+    no longer appear anywhere in the app.
+
+    Returns:
+        Names of the archived partitions
+    """
+    if settings.PARTITION_RETENTION_MONTHS <= 0:
+        return []
+    cutoff = add_months((today or date.today()).replace(day=1), -settings.PARTITION_RETENTION_MONTHS)
+
+    months = set()
+    for table, _ in PARTITIONED_TABLES:
+        for (name,) in conn.execute(text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid"
+            " WHERE i.inhparent = to_regclass(:table)"
+        ), {"table": table}):
+            match = re.fullmatch(rf"{table}_p(\d{{4}})_(\d{{2}})", name)
+            if match and date(int(match.group(1)), int(match.group(2)), 1) < cutoff:
+                months.add(date(int(match.group(1)), int(match.group(2)), 1))
+
+    archived = []
+    if months:
+        conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+    for month in sorted(months):
+        conn.execute(text("DELETE FROM meal_search WHERE meal_date >= :start AND meal_date < :end"),
+                     {"start": month, "end": add_months(month, 1)})
+        for table, _ in reversed(PARTITIONED_TABLES):
+            name = partition_name(table, month)
+            if not _exists(conn, name):
+                continue
+            conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+            conn.execute(text(f"CREATE TABLE {ARCHIVE_SCHEMA}.{name} AS TABLE {name}"))
+            conn.execute(text(f"DROP TABLE {name}"))
+            archived.append(name)
+    if archived:
+        logger.info("Archived partitions: %s", ", ".join(archived))
+    return archived
+
+
+def maintain_partitions() -> List[str]:
+    """Create upcoming partitions and archive expired ones in one transaction"""
+    with engine.begin() as conn:
+        if not partitioning_enabled(conn) or not _is_partitioned(conn, "meals"):
+            return []
+        return ensure_partitions(conn) + archive_partitions(conn)
+
+
+class PartitionMaintainer:
+    """Background task running maintain_partitions on the lease holder"""
+
+    def __init__(self):
+        # Renewed every run; outlives one interval so the holder keeps it
+        self.lease = LeaderLease("partitions", 2 * settings.PARTITION_MAINTENANCE_INTERVAL_SECONDS)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start the maintenance loop on the running event loop"""
+        if settings.DB_PARTITIONING_ENABLED and engine.dialect.name == "postgresql" and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Cancel the loop and release the lease"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        try:
+            await run_in_threadpool(self.lease.release)
+        except Exception as e:
+            logger.warning("Could not release partition lease: %s", e)
+
+    async def _run(self):
+        """Run maintenance every PARTITION_MAINTENANCE_INTERVAL_SECONDS while holding the lease"""
+        while True:
+            try:
+                if await run_in_threadpool(self.lease.acquire):
+                    await run_in_threadpool(maintain_partitions)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Partition maintenance failed: %s", e)
+            await asyncio.sleep(settings.PARTITION_MAINTENANCE_INTERVAL_SECONDS)
+
+
+# Global maintainer instance (started by the app's startup hook)
+partition_maintainer = PartitionMaintainer()
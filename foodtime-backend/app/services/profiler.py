@@ -0,0 +1,184 @@
+"""
+Sampling profiler for individual requests
+
+While a request is profiled, a background thread snapshots the stacks of
+every thread in the process (``sys._current_frames``) every
+PROFILING_INTERVAL_MS and counts them as collapsed stacks
+(``frame;frame;frame count``), the input format of flamegraph.pl and
+speedscope. Threads parked in the event loop's selector or waiting for
+threadpool work are left out, so the event loop thread and the threadpool
+worker running the request's DB code are what remains.
+
+Only one request is profiled at a time: the samples cover the whole
+process, so a second concurrent profile would record the same stacks.
+Profiles are written as JSON (stacks plus the request's SQL statements) to
+PROFILING_DIR, keeping the newest PROFILING_MAX_FILES.
+"""
+
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import List, Optional
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# Leaf frames of idle threads: selector waits and blocked queue/lock waits
+IDLE_FILES = ("selectors.py", "threading.py", "queue.py")
+IDLE_FUNCTIONS = {"select", "poll", "wait", "get", "_worker"}
+
+PROFILE_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+def _is_idle(frame) -> bool:
+    """Whether a thread's innermost frame is blocked waiting for work"""
+    code = frame.f_code
+    return code.co_name in IDLE_FUNCTIONS and os.path.basename(code.co_filename) in IDLE_FILES
+
+
+def _collapse(frame) -> str:
+    """Collapsed stack of a frame, outermost first"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class SamplingProfiler:
+    """Samples all thread stacks on a background thread until stopped"""
+
+    def __init__(self, interval: float):
+        self.id = uuid.uuid4().hex
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            self.sample_count += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own_id and not _is_idle(frame):
+                    self.samples[_collapse(frame)] += 1
+
+
+class ProfileStore:
+    """Writes, lists and reads profiles in PROFILING_DIR"""
+
+    def __init__(self):
+        self._active = threading.Lock()
+
+    def try_start(self) -> Optional[SamplingProfiler]:
+        """Start a profiler unless another request is being profiled"""
+        if not self._active.acquire(blocking=False):
+            return None
+        profiler = SamplingProfiler(settings.PROFILING_INTERVAL_MS / 1000)
+        profiler.start()
+        return profiler
+
+    def finish(self, profiler: SamplingProfiler, meta: dict, queries: List[tuple]):
+        """
+        Stop a profiler started by try_start and write its profile
+
+        The slot is freed once sampling stops, before the file is written.
+        Profiles beyond PROFILING_MAX_FILES are pruned, oldest first.
+        """
+        try:
+            profiler.stop()
+        finally:
+            self._active.release()
+
+        stacks = profiler.samples.most_common()
+        profile = {
+            "id": profiler.id,
+            "created_at": datetime.utcnow().isoformat(),
+            **meta,
+            "samples": profiler.sample_count,
+            "queries": [
+                {"statement": " ".join(statement.split()), "ms": round(elapsed * 1000, 2)}
+                for statement, elapsed in queries
+            ],
+            "stacks": [{"stack": stack, "count": count} for stack, count in stacks]
+        }
+        os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+        path = self._path(profiler.id)
+        with open(path + ".tmp", "w") as f:
+            json.dump(profile, f)
+        os.replace(path + ".tmp", path)
+        self._prune()
+
+    def list(self) -> List[dict]:
+        """Summaries of the stored profiles, newest first"""
+        summaries = []
+        for path in self._files():
+            try:
+                with open(path) as f:
+                    profile = json.load(f)
+            except (OSError, ValueError):
+                continue
+            profile.pop("stacks", None)
+            profile["query_count"] = len(profile.pop("queries", []))
+            summaries.append(profile)
+        return summaries
+
+    def get(self, profile_id: str) -> Optional[dict]:
+        """A stored profile, or None"""
+        if not PROFILE_ID_PATTERN.match(profile_id):
+            return None
+        try:
+            with open(self._path(profile_id)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def collapsed(profile: dict) -> str:
+        """Stacks in collapsed format (one ``stack count`` per line)"""
+        return "".join(f"{entry['stack']} {entry['count']}\n" for entry in profile["stacks"])
+
+    def _path(self, profile_id: str) -> str:
+        return os.path.join(settings.PROFILING_DIR, f"{profile_id}.json")
+
+    def _files(self) -> List[str]:
+        """Profile files, newest first"""
+        try:
+            names = [name for name in os.listdir(settings.PROFILING_DIR) if name.endswith(".json")]
+        except FileNotFoundError:
+            return []
+        dated = []
+        for name in names:
+            path = os.path.join(settings.PROFILING_DIR, name)
+            try:
+                dated.append((os.path.getmtime(path), path))
+            except OSError:
+                continue  # pruned meanwhile
+        return [path for _, path in sorted(dated, reverse=True)]
+
+    def _prune(self):
+        for path in self._files()[settings.PROFILING_MAX_FILES:]:
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.warning("Could not remove old profile %s: %s", path, e)
+
+
+# Global instance
+profile_store = ProfileStore()
@@ -0,0 +1,292 @@
+"""
+Token-bucket rate limiting for AI-backed endpoints
+
+Every client has a bucket per scope: one keyed by user id (when the request
+carries a valid token) and one keyed by client IP. A bucket holds up to
+``capacity`` tokens and refills continuously at ``refill_per_second``; an
+endpoint call takes its cost in tokens (photo > daily > weekly report >
+food) and is rejected with 429 and a Retry-After when a bucket is short.
+
+Two backends keep the bucket state:
+
+- ``memory``: a dict in the worker process (no I/O, but each worker limits
+  separately, so the effective limit is multiplied by the worker count)
+- ``database``: the ``rate_limit_buckets`` table, updated with one atomic
+  upsert per bucket, so all workers and replicas share the same limits
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, text
+
+from ..config import settings
+from ..database import session_scope
+from ..models.rate_limit_bucket import RateLimitBucket
+from ..utils.metrics import RATE_LIMITED
+
+logger = logging.getLogger(__name__)
+
+# Tokens taken per call (per item for batch endpoints)
+ENDPOINT_COSTS = {
+    "photo": 5.0,
+    "daily": 3.0,
+    "weekly_report": 2.0,
+    "food": 1.0,
+}
+
+
+@dataclass(frozen=True)
+class Limit:
+    """Bucket size and refill rate of one scope"""
+    capacity: float
+    refill_per_second: float
+
+    def retry_after(self, tokens: float, cost: float) -> float:
+        """Seconds until a bucket holding ``tokens`` can pay ``cost``"""
+        return max(cost - tokens, 0.0) / self.refill_per_second
+
+
+def _limits() -> dict:
+    return {
+        "user": Limit(settings.RATE_LIMIT_USER_CAPACITY, settings.RATE_LIMIT_USER_REFILL_PER_MINUTE / 60),
+        "ip": Limit(settings.RATE_LIMIT_IP_CAPACITY, settings.RATE_LIMIT_IP_REFILL_PER_MINUTE / 60),
+    }
+
+
+class MemoryBackend:
+    """Buckets in a bounded LRU dict, private to this worker process"""
+
+    shared = False
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        # key -> [tokens, updated_at (monotonic)]
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+
+    def take(self, key: str, cost: float, limit: Limit) -> Tuple[bool, float]:
+        """
+        Take ``cost`` tokens from a bucket
+
+        Returns:
+            (granted, tokens left)
+        """
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [limit.capacity, now]
+                if len(self._buckets) > self.max_keys:
+                    # The least recently used bucket has refilled the longest
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(limit.capacity, bucket[0] + (now - bucket[1]) * limit.refill_per_second)
+                bucket[1] = now
+
+            granted = bucket[0] >= cost
+            if granted:
+                bucket[0] -= cost
+            return granted, bucket[0]
+
+    def refund(self, key: str, cost: float, limit: Limit):
+        """Give back tokens taken by a call that was denied by another bucket"""
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket[0] = min(limit.capacity, bucket[0] + cost)
+
+    def reset(self):
+        """Forget all buckets"""
+        with self._lock:
+            self._buckets.clear()
+
+
+class DatabaseBackend:
+    """
+    Buckets in the ``rate_limit_buckets`` table, shared by all workers
+
+    Refill and take happen in a single INSERT ... ON CONFLICT DO UPDATE
+    (PostgreSQL and SQLite >= 3.35), so concurrent requests for the same
+    key serialize on the row instead of racing a read-modify-write.
+    Timestamps are wall-clock Unix times from the workers.
+    """
+
+    shared = True
+
+    def __init__(self, prune_seconds: float):
+        self.prune_seconds = prune_seconds
+        self._next_prune = 0.0
+
+    @staticmethod
+    def _statement(dialect: str) -> str:
+        least, greatest = ("LEAST", "GREATEST") if dialect == "postgresql" else ("min", "max")
+        available = (
+            f"{least}(:capacity, rate_limit_buckets.tokens"
+            f" + {greatest}(:now - rate_limit_buckets.updated_at, 0) * :rate)"
+        )
+        return f"""
+            INSERT INTO rate_limit_buckets (key, tokens, updated_at, granted)
+            VALUES (:key, :initial_tokens, :now, :initial_granted)
+            ON CONFLICT (key) DO UPDATE SET
+                tokens = CASE WHEN {available} >= :cost THEN {available} - :cost ELSE {available} END,
+                granted = {available} >= :cost,
+                updated_at = :now
+            RETURNING tokens, granted
+        """
+
+    def take(self, key: str, cost: float, limit: Limit) -> Tuple[bool, float]:
+        """
+        Take ``cost`` tokens from a bucket
+
+        Returns:
+            (granted, tokens left)
+        """
+        now = time.time()
+        initial_granted = cost <= limit.capacity
+        with session_scope() as db:
+            tokens, granted = db.execute(text(self._statement(db.bind.dialect.name)), {
+                "key": key,
+                "cost": cost,
+                "capacity": limit.capacity,
+                "rate": limit.refill_per_second,
+                "now": now,
+                "initial_tokens": limit.capacity - cost if initial_granted else limit.capacity,
+                "initial_granted": initial_granted,
+            }).one()
+            if now >= self._next_prune:
+                self._next_prune = now + self.prune_seconds
+                self._prune(db, now)
+            db.commit()
+        return bool(granted), tokens
+
+    def refund(self, key: str, cost: float, limit: Limit):
+        """Give back tokens taken by a call that was denied by another bucket"""
+        with session_scope() as db:
+            db.execute(
+                text(
+                    "UPDATE rate_limit_buckets SET tokens = "
+                    f"{'LEAST' if db.bind.dialect.name == 'postgresql' else 'min'}(:capacity, tokens + :cost)"
+                    " WHERE key = :key"
+                ),
+                {"key": key, "cost": cost, "capacity": limit.capacity}
+            )
+            db.commit()
+
+    @staticmethod
+    def _prune(db, now: float):
+        """Delete buckets idle long enough to have refilled completely"""
+        horizon = max(limit.capacity / limit.refill_per_second for limit in _limits().values())
+        db.execute(delete(RateLimitBucket).where(RateLimitBucket.updated_at < now - horizon))
+
+    def reset(self):
+        """Forget all buckets"""
+        with session_scope() as db:
+            db.execute(delete(RateLimitBucket))
+            db.commit()
+
+
+def _create_backend():
+    if settings.RATE_LIMIT_BACKEND == "database":
+        return DatabaseBackend(settings.RATE_LIMIT_PRUNE_SECONDS)
+    if settings.RATE_LIMIT_BACKEND == "memory":
+        return MemoryBackend(settings.RATE_LIMIT_MEMORY_MAX_KEYS)
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {settings.RATE_LIMIT_BACKEND!r}")
+
+
+class RateLimiter:
+    """Charges endpoint calls against a client's user and IP buckets"""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def _take_all(self, buckets: list) -> Optional[Tuple[str, float]]:
+        """
+        Charge each (scope, key, cost, limit) in turn, all or nothing
+
+        At the first short bucket the tokens already taken from the earlier
+        buckets are given back, so a denied call costs nothing.
+        """
+        taken = []
+        for scope, key, cost, limit in buckets:
+            try:
+                granted, tokens = self.backend.take(key, cost, limit)
+            except Exception as e:
+                # Fail open: a store outage must not take the API down with it
+                logger.warning("Rate limit check failed for %s: %s", key, e)
+                continue
+            if not granted:
+                for taken_key, taken_cost, taken_limit in taken:
+                    try:
+                        self.backend.refund(taken_key, taken_cost, taken_limit)
+                    except Exception as e:
+                        logger.warning("Rate limit refund failed for %s: %s", taken_key, e)
+                return scope, limit.retry_after(tokens, cost)
+            taken.append((key, cost, limit))
+        return None
+
+    async def check(
+        self,
+        endpoint: str,
+        client_ip: Optional[str],
+        user_id: Optional[int] = None,
+        units: int = 1
+    ) -> Optional[Tuple[str, float]]:
+        """
+        Charge one call of an endpoint
+
+        Args:
+            endpoint: Key of ENDPOINT_COSTS
+            client_ip: Address of the client, if known
+            user_id: Authenticated user, if any
+            units: Items in the call (batch endpoints pay per item)
+
+        Returns:
+            None if allowed, else (limited scope, seconds until retry);
+            the wait is infinite when the call costs more than a full bucket
+        """
+        if not settings.RATE_LIMIT_ENABLED:
+            return None
+
+        limits = _limits()
+        buckets = []
+        for scope, identity in (("user", user_id), ("ip", client_ip)):
+            if identity is None:
+                continue
+            limit = limits[scope]
+            cost = ENDPOINT_COSTS[endpoint] * units
+            if cost > limit.capacity:
+                # Could never pass; batches must be split instead
+                RATE_LIMITED.inc(endpoint=endpoint, scope=scope)
+                return scope, math.inf
+            buckets.append((scope, f"{scope}:{identity}", cost, limit))
+
+        if self.backend.shared:
+            denied = await run_in_threadpool(self._take_all, buckets)
+        else:
+            denied = self._take_all(buckets)
+
+        if denied is not None:
+            RATE_LIMITED.inc(endpoint=endpoint, scope=denied[0])
+        return denied
+
+
+def max_units(endpoint: str, scope: str) -> int:
+    """Most items of an endpoint a full bucket of ``scope`` pays for"""
+    return int(_limits()[scope].capacity // ENDPOINT_COSTS[endpoint])
+
+
+def retry_after_header(seconds: float) -> str:
+    """Retry-After value (whole seconds, at least 1)"""
+    return str(max(1, math.ceil(seconds)))
+
+
+# Global rate limiter instance
+rate_limiter = RateLimiter(_create_backend())
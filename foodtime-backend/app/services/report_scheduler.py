@@ -0,0 +1,175 @@
+"""
+Overnight precompute of last week's reports
+
+Every worker runs the scheduler loop, but only the holder of the
+``weekly_reports`` lease (a row in ``scheduler_leases``, taken over once it
+expires) does any work, so a multi-worker or multi-replica deployment
+computes each report once. During the off-peak window
+(REPORT_PRECOMPUTE_START_HOUR to REPORT_PRECOMPUTE_END_HOUR) the leader
+computes last week's report for every active user that has none stored,
+at most REPORT_PRECOMPUTE_CONCURRENCY AI calls at a time, and stores it;
+``/api/reports/weekly`` then answers with a single-row read.
+"""
+
+import asyncio
+import logging
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, exists
+
+from ..config import settings
+from ..database import session_scope
+from ..models.meal import Meal
+from ..models.user import User
+from ..models.weekly_report import WeeklyReport
+from ..utils.metrics import REPORTS_PRECOMPUTED
+from .ai_provider import ai_service
+from .circuit_breaker import CircuitBreaker
+from .leader_lease import LeaderLease
+from .report_service import ReportService, week_start_of
+
+logger = logging.getLogger(__name__)
+
+
+def in_precompute_window(hour: int) -> bool:
+    """Whether a local hour falls in the off-peak window (which may wrap midnight)"""
+    start, end = settings.REPORT_PRECOMPUTE_START_HOUR, settings.REPORT_PRECOMPUTE_END_HOUR
+    if start <= end:
+        return start <= hour < end
+    return hour >= start or hour < end
+
+
+def _pending_users(week_start: date, after_id: int, limit: int) -> List[Tuple[int, Optional[str], Optional[int]]]:
+    """
+    Active users with meals in the week and no stored report, by id
+
+    Returns:
+        (user id, goal, daily calorie target) tuples
+    """
+    week_end = week_start + timedelta(days=6)
+    with session_scope() as db:
+        return [tuple(row) for row in db.query(User.id, User.goal, User.daily_calorie_target).filter(
+            User.id > after_id,
+            User.is_active == 1,
+            exists().where(and_(
+                Meal.user_id == User.id,
+                Meal.meal_date >= week_start,
+                Meal.meal_date <= week_end
+            )),
+            ~exists().where(and_(
+                WeeklyReport.user_id == User.id,
+                WeeklyReport.week_start == week_start
+            ))
+        ).order_by(User.id).limit(limit).all()]
+
+
+class ReportScheduler:
+    """Background task precomputing weekly reports on the lease holder"""
+
+    def __init__(self):
+        self.lease = LeaderLease("weekly_reports", settings.REPORT_SCHEDULER_LEASE_SECONDS)
+        self._task: Optional[asyncio.Task] = None
+        # Night on which this process finished a full pass
+        self._completed_on: Optional[date] = None
+
+    def start(self):
+        """Start the scheduler loop on the running event loop"""
+        if settings.REPORT_SCHEDULER_ENABLED and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Cancel the loop and release the lease"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        try:
+            await run_in_threadpool(self.lease.release)
+        except Exception as e:
+            logger.warning("Could not release scheduler lease: %s", e)
+
+    async def _run(self):
+        """Poll for the off-peak window and the lease"""
+        while True:
+            try:
+                now = datetime.now()
+                if in_precompute_window(now.hour) and self._completed_on != now.date():
+                    if await run_in_threadpool(self.lease.acquire):
+                        if await self.precompute(week_start_of(now.date()) - timedelta(weeks=1)):
+                            self._completed_on = now.date()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Weekly report precompute failed: %s", e)
+            await asyncio.sleep(settings.REPORT_SCHEDULER_POLL_SECONDS)
+
+    async def precompute(self, week_start: date) -> bool:
+        """
+        Compute and store the week's report for every pending user
+
+        Users are processed in id order, REPORT_PRECOMPUTE_BATCH_SIZE at a
+        time. The lease is renewed before each user (a batch can outlast
+        it) and no further user is started once it is lost; the pass also
+        stops between batches if the window closes or the AI circuit opens.
+
+        Returns:
+            True if every pending user was processed
+        """
+        semaphore = asyncio.Semaphore(settings.REPORT_PRECOMPUTE_CONCURRENCY)
+        lease_lost = asyncio.Event()
+        after_id = 0
+
+        while True:
+            users = await run_in_threadpool(
+                _pending_users, week_start, after_id, settings.REPORT_PRECOMPUTE_BATCH_SIZE
+            )
+            if not users:
+                return True
+
+            await asyncio.gather(*(
+                self._precompute_user(semaphore, lease_lost, week_start, user) for user in users
+            ))
+            after_id = users[-1][0]
+
+            if lease_lost.is_set():
+                return False
+            if ai_service.circuit_breaker.state == CircuitBreaker.OPEN:
+                logger.warning("AI circuit open; weekly report precompute paused")
+                return False
+            if not in_precompute_window(datetime.now().hour):
+                return False
+
+    async def _precompute_user(self, semaphore: asyncio.Semaphore, lease_lost: asyncio.Event,
+                               week_start: date, user: tuple):
+        """Build and store one user's report; failures are left for the next pass"""
+        user_id, goal, daily_calorie_target = user
+        async with semaphore:
+            if lease_lost.is_set():
+                return
+            try:
+                if not await run_in_threadpool(self.lease.renew):
+                    logger.warning("Scheduler lease lost; weekly report precompute stopped")
+                    lease_lost.set()
+                    return
+                data = await run_in_threadpool(ReportService.collect_weekly_data, user_id, week_start)
+                report = await ReportService.build_weekly_report(
+                    data, {"goal": goal, "daily_calorie_target": daily_calorie_target}
+                )
+                stored = await run_in_threadpool(
+                    ReportService.store_report, user_id, week_start, data["data_version"],
+                    report.model_dump_json().encode("utf-8")
+                )
+                REPORTS_PRECOMPUTED.inc(outcome="stored" if stored else "skipped")
+            except Exception as e:
+                REPORTS_PRECOMPUTED.inc(outcome="failed")
+                logger.warning("Weekly report for user %s failed: %s", user_id, e)
+
+
+# Global scheduler instance (started by the app's startup hook)
+report_scheduler = ReportScheduler()
@@ -0,0 +1,326 @@
+"""
+Weekly report service
+
+Builds weekly reports (statistics plus AI insights) and keeps rendered
+reports of completed weeks in the ``weekly_reports`` table, filled on
+first view and overnight by the report scheduler. Meal and analysis writes
+delete the stored reports they affect in the same transaction.
+"""
+
+from datetime import date, timedelta
+from typing import Optional
+
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..database import session_scope
+from ..models.food_analysis import FoodAnalysis
+from ..models.meal import Meal
+from ..models.user import User
+from ..models.weekly_report import WeeklyReport
+from ..schemas.report import (
+    WeeklyReportResponse,
+    WeeklySummary,
+    WeeklyMacros,
+    DailyBreakdown,
+    WeeklyTrends
+)
+from ..utils.metrics import record_cache_lookup
+from .ai_provider import ai_service
+
+NO_DATA_INSIGHTS = "Bu hafta için yeterli veri yok. Öğünlerinizi kaydetmeye başlayın!"
+
+
+def week_start_of(day: date) -> date:
+    """Monday of the week containing ``day``"""
+    return day - timedelta(days=day.weekday())
+
+
+def get_week_range(week_offset: int = 0):
+    """Get start and end dates for a week (Monday to Sunday)"""
+    # Monday of current week, then apply offset
+    start = week_start_of(date.today()) + timedelta(weeks=week_offset)
+    end = start + timedelta(days=6)
+    return start, end
+
+
+class ReportService:
+    """Weekly report business logic"""
+
+    @staticmethod
+    def collect_weekly_data(user_id: int, week_start: date) -> dict:
+        """
+        Compute weekly statistics in a single short transaction
+
+        Returns plain data only, so nothing ORM-bound outlives the session.
+        The user's data_version is read in the same transaction so a stored
+        report can be checked against later writes.
+        """
+        week_end = week_start + timedelta(days=6)
+
+        with session_scope() as db:
+            data_version = db.query(User.data_version).filter(User.id == user_id).scalar()
+
+            # Get all meals for the week
+            weekly_meals = db.query(Meal).filter(
+                Meal.user_id == user_id,
+                Meal.meal_date >= week_start,
+                Meal.meal_date <= week_end
+            ).order_by(Meal.meal_date).all()
+
+            # All of the week's analyses in one query, grouped by meal
+            meal_analyses = {}
+            for analysis in db.query(FoodAnalysis).join(Meal).filter(
+                Meal.user_id == user_id,
+                Meal.meal_date >= week_start,
+                Meal.meal_date <= week_end,
+                FoodAnalysis.meal_date == Meal.meal_date,
+                FoodAnalysis.meal_date >= week_start,
+                FoodAnalysis.meal_date <= week_end
+            ).all():
+                meal_analyses.setdefault(analysis.meal_id, []).append(analysis)
+
+            # Aggregate statistics
+            total_meals = len(weekly_meals)
+            total_calories = 0.0
+            total_protein = 0.0
+            total_carbs = 0.0
+            total_fat = 0.0
+            health_scores = []
+
+            daily_breakdown = []
+            best_day = {"date": None, "score": 0}
+            worst_day = {"date": None, "score": 10}
+
+            # Process each day
+            for i in range(7):
+                day_date = week_start + timedelta(days=i)
+                day_meals = [m for m in weekly_meals if m.meal_date == day_date]
+
+                day_calories = 0.0
+                day_scores = []
+
+                for meal in day_meals:
+                    for analysis in meal_analyses.get(meal.id, []):
+                        if analysis.health_score:
+                            day_scores.append(analysis.health_score)
+                            health_scores.append(analysis.health_score)
+                        if analysis.calories:
+                            day_calories += analysis.calories
+                            total_calories += analysis.calories
+                        if analysis.protein:
+                            total_protein += analysis.protein
+                        if analysis.carbs:
+                            total_carbs += analysis.carbs
+                        if analysis.fat:
+                            total_fat += analysis.fat
+
+                day_avg_score = sum(day_scores) / len(day_scores) if day_scores else 0
+
+                daily_breakdown.append(DailyBreakdown(
+                    date=day_date,
+                    health_score=round(day_avg_score, 1),
+                    calories=round(day_calories, 1),
+                    meal_count=len(day_meals)
+                ))
+
+                # Track best/worst days
+                if day_avg_score > 0:
+                    if day_avg_score > best_day["score"]:
+                        best_day = {"date": day_date, "score": day_avg_score}
+                    if day_avg_score < worst_day["score"]:
+                        worst_day = {"date": day_date, "score": day_avg_score}
+
+            # Calculate averages
+            avg_health_score = sum(health_scores) / len(health_scores) if health_scores else 0
+            avg_calories_per_day = total_calories / 7 if total_calories > 0 else 0
+
+            # Calculate trends (compare to previous week if available)
+            prev_week_start = week_start - timedelta(weeks=1)
+            prev_week_end = prev_week_start + timedelta(days=6)
+            prev_scores = []
+            prev_calories = 0.0
+            # Only scores and calories are needed, in one query as for the week above
+            for health_score, calories in db.query(FoodAnalysis.health_score, FoodAnalysis.calories).join(Meal).filter(
+                Meal.user_id == user_id,
+                Meal.meal_date >= prev_week_start,
+                Meal.meal_date <= prev_week_end,
+                FoodAnalysis.meal_date == Meal.meal_date,
+                FoodAnalysis.meal_date >= prev_week_start,
+                FoodAnalysis.meal_date <= prev_week_end
+            ):
+                if health_score:
+                    prev_scores.append(health_score)
+                if calories:
+                    prev_calories += calories
+
+            # Prepare meal data for AI
+            meal_summary = []
+            for meal in weekly_meals:
+                meal_summary.append({
+                    "date": meal.meal_date.isoformat(),
+                    "morning": meal.morning_meal or "",
+                    "afternoon": meal.afternoon_meal or "",
+                    "evening": meal.evening_meal or ""
+                })
+
+        prev_avg_score = sum(prev_scores) / len(prev_scores) if prev_scores else avg_health_score
+        prev_avg_calories = prev_calories / 7 if prev_calories > 0 else avg_calories_per_day
+
+        # Determine trends
+        score_diff = avg_health_score - prev_avg_score
+        cal_diff = avg_calories_per_day - prev_avg_calories
+
+        health_score_trend = "stable"
+        if score_diff > 0.5:
+            health_score_trend = "improving"
+        elif score_diff < -0.5:
+            health_score_trend = "declining"
+
+        calorie_trend = "stable"
+        if cal_diff > 200:
+            calorie_trend = "increasing"
+        elif cal_diff < -200:
+            calorie_trend = "decreasing"
+
+        return {
+            "data_version": data_version,
+            "week_start": week_start,
+            "week_end": week_end,
+            "total_meals": total_meals,
+            "avg_health_score": avg_health_score,
+            "total_calories": total_calories,
+            "avg_calories_per_day": avg_calories_per_day,
+            "total_protein": total_protein,
+            "total_carbs": total_carbs,
+            "total_fat": total_fat,
+            "daily_breakdown": daily_breakdown,
+            "meal_summary": meal_summary,
+            "health_score_trend": health_score_trend,
+            "calorie_trend": calorie_trend,
+            "best_day": best_day["date"],
+            "worst_day": worst_day["date"]
+        }
+
+    @staticmethod
+    async def build_weekly_report(data: dict, user_goals: dict) -> WeeklyReportResponse:
+        """
+        Turn collected statistics into a report, calling the AI for insights
+
+        Args:
+            data: Result of collect_weekly_data
+            user_goals: {"goal", "daily_calorie_target"} of the user
+        """
+        if data["total_meals"] > 0:
+            weekly_stats = {
+                "avg_health_score": round(data["avg_health_score"], 1),
+                "total_calories": round(data["total_calories"], 1),
+                "avg_calories": round(data["avg_calories_per_day"], 1),
+                "total_protein": round(data["total_protein"], 1),
+                "total_carbs": round(data["total_carbs"], 1),
+                "total_fat": round(data["total_fat"], 1),
+                "total_meals": data["total_meals"]
+            }
+
+            insights = await ai_service.generate_weekly_insights(
+                data["meal_summary"],
+                weekly_stats,
+                user_goals
+            )
+        else:
+            insights = NO_DATA_INSIGHTS
+
+        return WeeklyReportResponse(
+            week_start=data["week_start"],
+            week_end=data["week_end"],
+            summary=WeeklySummary(
+                total_meals=data["total_meals"],
+                avg_health_score=round(data["avg_health_score"], 1),
+                total_calories=round(data["total_calories"], 1),
+                avg_calories_per_day=round(data["avg_calories_per_day"], 1),
+                macros=WeeklyMacros(
+                    protein=round(data["total_protein"], 1),
+                    carbs=round(data["total_carbs"], 1),
+                    fat=round(data["total_fat"], 1)
+                )
+            ),
+            daily_breakdown=data["daily_breakdown"],
+            insights=insights,
+            trends=WeeklyTrends(
+                health_score_trend=data["health_score_trend"],
+                calorie_trend=data["calorie_trend"],
+                best_day=data["best_day"],
+                worst_day=data["worst_day"]
+            )
+        )
+
+    @staticmethod
+    def is_complete(week_start: date) -> bool:
+        """Whether a week has ended (only completed weeks are stored)"""
+        return week_start + timedelta(days=6) < date.today()
+
+    @staticmethod
+    def get_stored_report(user_id: int, week_start: date) -> Optional[bytes]:
+        """Read a stored report body in a short transaction (one indexed row)"""
+        with session_scope() as db:
+            payload = db.query(WeeklyReport.payload).filter(
+                WeeklyReport.user_id == user_id,
+                WeeklyReport.week_start == week_start
+            ).scalar()
+        record_cache_lookup("weekly_report", payload is not None)
+        return payload.encode("utf-8") if payload is not None else None
+
+    @staticmethod
+    def store_report(user_id: int, week_start: date, data_version: Optional[int], body: bytes) -> bool:
+        """
+        Store a rendered report unless the user's data changed meanwhile
+
+        The report was computed from ``data_version``; if a write bumped it
+        since, the write may already have invalidated this week, so the
+        (possibly stale) report is dropped instead of stored.
+
+        Returns:
+            True if the report was stored
+        """
+        with session_scope() as db:
+            current = db.query(User.data_version).filter(User.id == user_id).scalar()
+            if current is None or current != data_version:
+                return False
+
+            db.execute(delete(WeeklyReport).where(
+                WeeklyReport.user_id == user_id,
+                WeeklyReport.week_start == week_start
+            ))
+            db.add(WeeklyReport(
+                user_id=user_id,
+                week_start=week_start,
+                payload=body.decode("utf-8"),
+                data_version=data_version
+            ))
+            try:
+                db.commit()
+            except IntegrityError:
+                # Another worker stored the same week concurrently
+                db.rollback()
+                return False
+        return True
+
+    @staticmethod
+    def invalidate_week(db: Session, user_id: int, day: date):
+        """
+        Delete stored reports affected by a change on ``day``
+
+        That is the report of the day's week and of the following week,
+        whose trends compare against it. Runs in the caller's transaction.
+        """
+        week_start = week_start_of(day)
+        db.execute(delete(WeeklyReport).where(
+            WeeklyReport.user_id == user_id,
+            WeeklyReport.week_start.in_([week_start, week_start + timedelta(weeks=1)])
+        ))
+
+    @staticmethod
+    def invalidate_user(db: Session, user_id: int):
+        """Delete all of a user's stored reports (e.g. goals changed)"""
+        db.execute(delete(WeeklyReport).where(WeeklyReport.user_id == user_id))
@@ -0,0 +1,104 @@
+"""
+Versioned response cache for authenticated GET endpoints
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+from ..config import settings
+from ..utils.metrics import registry, record_cache_lookup, CACHE_SIZE_BYTES, CACHE_ENTRIES
+
+CacheKey = Tuple[int, str]
+
+
+class ResponseCache:
+    """
+    In-process LRU cache of rendered JSON responses
+
+    Entries are keyed by (user id, version tag) where the tag already covers
+    route, query parameters and the user's data version, so a write makes
+    old entries unreachable even without invalidation. Explicit per-user
+    invalidation after writes frees their memory right away. Total size is
+    bounded by ``max_bytes``; least recently used entries are evicted first.
+    """
+
+    def __init__(self, max_bytes: int, max_entry_bytes: int):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._entries: "OrderedDict[CacheKey, bytes]" = OrderedDict()
+        self._by_user: Dict[int, Set[CacheKey]] = {}
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int, tag: str) -> Optional[bytes]:
+        """Return a cached body and mark it recently used"""
+        key = (user_id, tag)
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+        record_cache_lookup("response", body is not None)
+        return body
+
+    def set(self, user_id: int, tag: str, body: bytes):
+        """Store a rendered body, evicting old entries to stay in budget"""
+        if len(body) > self.max_entry_bytes:
+            return
+        key = (user_id, tag)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = body
+            self._by_user.setdefault(user_id, set()).add(key)
+            self._size += len(body)
+
+            while self._size > self.max_bytes and self._entries:
+                old_key, old_body = self._entries.popitem(last=False)
+                self._size -= len(old_body)
+                self._discard_index(old_key)
+
+    def invalidate_user(self, user_id: int):
+        """Drop every cached response of a user"""
+        with self._lock:
+            for key in self._by_user.pop(user_id, ()):
+                body = self._entries.pop(key, None)
+                if body is not None:
+                    self._size -= len(body)
+
+    def clear(self):
+        """Drop everything"""
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+            self._size = 0
+
+    def _discard_index(self, key: CacheKey):
+        keys = self._by_user.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[key[0]]
+
+    @property
+    def size(self) -> int:
+        """Bytes currently held"""
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+response_cache = ResponseCache(
+    max_bytes=settings.RESPONSE_CACHE_MAX_BYTES,
+    max_entry_bytes=settings.RESPONSE_CACHE_MAX_ENTRY_BYTES
+)
+
+
+def _collect_cache_size():
+    CACHE_SIZE_BYTES.set(response_cache.size, cache="response")
+    CACHE_ENTRIES.set(len(response_cache), cache="response")
+
+
+registry.add_collector(_collect_cache_size)
@@ -0,0 +1,280 @@
+"""
+Full-text search over meal history
+
+Each meal has one row in the ``meal_search`` table holding its meal texts
+and the text of its stored analyses, written in the same transaction as
+the meal or analysis change. The table is created by ``python -m
+app.migrate`` and differs per database:
+
+- PostgreSQL: plain table with a stored ``tsvector`` column (meal texts
+  weighted A, analyses B, SEARCH_TEXT_CONFIG stemming) and a GIN index
+- SQLite (development): FTS5 virtual table keyed by the meal id (rowid)
+
+Results are ranked so matches in what the user ate outrank mentions in the
+AI's analysis (which also names recommended foods).
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import inspect, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.analysis_text import AnalysisText, decode_text
+from ..models.food_analysis import FoodAnalysis
+from ..models.meal import Meal
+
+# Highlight markers around matched terms in snippets
+HIGHLIGHT_START = "«"
+HIGHLIGHT_END = "»"
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+# Python's lower() maps "I" to "i"; Turkish text needs "ı" (and "İ" -> "i")
+_TURKISH_UPPER = str.maketrans({"I": "ı", "İ": "i"})
+
+
+def _is_postgres(bind) -> bool:
+    return bind.dialect.name == "postgresql"
+
+
+def _text_config() -> str:
+    """Text search configuration name, validated before it is put into DDL"""
+    if not re.fullmatch(r"[A-Za-z_]+", settings.SEARCH_TEXT_CONFIG):
+        raise ValueError(f"Invalid SEARCH_TEXT_CONFIG: {settings.SEARCH_TEXT_CONFIG!r}")
+    return settings.SEARCH_TEXT_CONFIG
+
+
+REBUILD_BATCH_SIZE = 1000
+
+
+def _load_documents(conn: Connection, meal_ids: Optional[List[int]] = None, after_id: int = 0,
+                    limit: Optional[int] = None) -> List[dict]:
+    """
+    Search rows for the given meals, or the next ``limit`` meals after ``after_id``
+
+    Analysis texts are stored compressed, so documents are assembled here
+    rather than with an INSERT ... SELECT.
+    """
+    query = select(Meal.id, Meal.user_id, Meal.meal_date, Meal.morning_meal, Meal.afternoon_meal, Meal.evening_meal)
+    if meal_ids is not None:
+        query = query.where(Meal.id.in_(meal_ids))
+    else:
+        query = query.where(Meal.id > after_id).order_by(Meal.id).limit(limit)
+    meals = conn.execute(query).all()
+    if not meals:
+        return []
+
+    analyses: Dict[int, List[str]] = {}
+    for meal_id, body in conn.execute(
+        select(FoodAnalysis.meal_id, AnalysisText.body)
+        .join(AnalysisText, AnalysisText.digest == FoodAnalysis.text_digest)
+        .where(FoodAnalysis.meal_id.in_([meal.id for meal in meals]))
+        .order_by(FoodAnalysis.meal_id, FoodAnalysis.id)
+    ):
+        analyses.setdefault(meal_id, []).append(decode_text(body))
+
+    return [
+        {
+            "meal_id": meal.id,
+            "user_id": meal.user_id,
+            "meal_date": meal.meal_date,
+            "meal_text": "\n".join(part for part in (meal.morning_meal, meal.afternoon_meal, meal.evening_meal) if part),
+            "analysis_text": "\n".join(analyses.get(meal.id, [])),
+        }
+        for meal in meals
+    ]
+
+
+def _insert_documents(conn: Connection, documents: List[dict]):
+    """Insert search rows built by _load_documents"""
+    if documents:
+        conn.execute(text(
+            f"INSERT INTO meal_search ({_key_column(conn)}, user_id, meal_date, meal_text, analysis_text)"
+            " VALUES (:meal_id, :user_id, :meal_date, :meal_text, :analysis_text)"
+        ), documents)
+
+
+def _key_column(bind) -> str:
+    return "meal_id" if _is_postgres(bind) else "rowid"
+
+
+def create_search_index(conn: Connection) -> bool:
+    """
+    Create the search table and indexes if missing
+
+    Returns:
+        True if the table was created (and needs a rebuild)
+    """
+    if inspect(conn).has_table("meal_search"):
+        return False
+
+    if _is_postgres(conn):
+        config = _text_config()
+        conn.execute(text(f"""
+            CREATE TABLE meal_search (
+                meal_id INTEGER PRIMARY KEY,
+                user_id INTEGER NOT NULL,
+                meal_date DATE NOT NULL,
+                meal_text TEXT NOT NULL DEFAULT '',
+                analysis_text TEXT NOT NULL DEFAULT '',
+                document tsvector GENERATED ALWAYS AS (
+                    setweight(to_tsvector('{config}', meal_text), 'A')
+                    || setweight(to_tsvector('{config}', analysis_text), 'B')
+                ) STORED
+            )
+        """))
+        conn.execute(text("CREATE INDEX ix_meal_search_document ON meal_search USING GIN (document)"))
+        conn.execute(text("CREATE INDEX ix_meal_search_user_date ON meal_search (user_id, meal_date)"))
+    else:
+        conn.execute(text("""
+            CREATE VIRTUAL TABLE meal_search USING fts5(
+                user_id UNINDEXED,
+                meal_date UNINDEXED,
+                meal_text,
+                analysis_text,
+                tokenize = 'unicode61 remove_diacritics 2'
+            )
+        """))
+    return True
+
+
+def drop_search_index(conn: Connection):
+    """Drop the search table (it is not part of the ORM metadata)"""
+    conn.execute(text("DROP TABLE IF EXISTS meal_search"))
+
+
+def rebuild_search_index(conn: Connection) -> int:
+    """
+    Re-create every search row from the meals and analyses tables
+
+    Returns:
+        Number of indexed meals
+    """
+    conn.execute(text("DELETE FROM meal_search"))
+    count, after_id = 0, 0
+    while True:
+        documents = _load_documents(conn, after_id=after_id, limit=REBUILD_BATCH_SIZE)
+        if not documents:
+            return count
+        _insert_documents(conn, documents)
+        count += len(documents)
+        after_id = documents[-1]["meal_id"]
+
+
+class SearchService:
+    """Meal search index maintenance and queries"""
+
+    @staticmethod
+    def index_meal(db: Session, meal_id: int):
+        """
+        Rebuild a meal's search row from its current meal and analyses
+
+        Runs in the caller's transaction; pending ORM changes must be
+        flushed first so the rebuild reads them.
+        """
+        conn = db.connection()
+        conn.execute(text(f"DELETE FROM meal_search WHERE {_key_column(conn)} = :meal_id"), {"meal_id": meal_id})
+        _insert_documents(conn, _load_documents(conn, meal_ids=[meal_id]))
+
+    @staticmethod
+    def remove_meal(db: Session, meal_id: int):
+        """Delete a meal's search row in the caller's transaction"""
+        key = _key_column(db.bind)
+        db.execute(text(f"DELETE FROM meal_search WHERE {key} = :meal_id"), {"meal_id": meal_id})
+
+    @staticmethod
+    def remove_user(db: Session, user_id: int):
+        """Delete all of a user's search rows in the caller's transaction"""
+        db.execute(text("DELETE FROM meal_search WHERE user_id = :user_id"), {"user_id": user_id})
+
+    @staticmethod
+    def search(
+        db: Session,
+        user_id: int,
+        query: str,
+        limit: int,
+        offset: int = 0,
+        include_analysis: bool = True,
+        order: str = "rank"
+    ) -> Tuple[List[dict], bool]:
+        """
+        Search a user's meals
+
+        Args:
+            db: Database session
+            user_id: Owner of the meals
+            query: Words to look for (all must match; stemmed on PostgreSQL,
+                prefix-matched on SQLite)
+            limit: Page size
+            offset: Number of results to skip
+            include_analysis: Also search the stored analysis texts
+            order: "rank" (best match first) or "recent" (newest first)
+
+        Returns:
+            Tuple of (rows, has_more); rows have meal_id, meal_date, the
+            three meal texts, rank and snippet
+        """
+        query = query.translate(_TURKISH_UPPER)
+        if _is_postgres(db.bind):
+            statement, params = SearchService._postgres_query(query, include_analysis, order)
+        else:
+            statement, params = SearchService._sqlite_query(query, include_analysis, order)
+            if statement is None:
+                return [], False
+
+        params.update(user_id=user_id, limit=limit + 1, offset=offset)
+        rows = [dict(row._mapping) for row in db.execute(text(statement), params)]
+        return rows[:limit], len(rows) > limit
+
+    @staticmethod
+    def _postgres_query(query: str, include_analysis: bool, order: str) -> Tuple[str, dict]:
+        """Ranked tsquery search; headlines are only built for the returned page"""
+        config = _text_config()
+        # ts_filter keeps only weight-A (meal text) lexemes; the plain match still uses the GIN index
+        condition = "s.document @@ q" if include_analysis else "s.document @@ q AND ts_filter(s.document, '{a}') @@ q"
+        snippet_source = "s.meal_text || E'\\n' || s.analysis_text" if include_analysis else "s.meal_text"
+        columns = ["rank", "meal_date", "meal_id"] if order == "rank" else ["meal_date", "meal_id"]
+        statement = f"""
+            SELECT page.meal_id, page.meal_date, m.morning_meal, m.afternoon_meal, m.evening_meal, page.rank,
+                   ts_headline('{config}', page.source, page.q,
+                               'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_END}, MaxWords=24, MinWords=8, MaxFragments=2') AS snippet
+            FROM (
+                SELECT s.meal_id, s.meal_date, {snippet_source} AS source, q,
+                       ts_rank_cd(s.document, q) AS rank
+                FROM meal_search s, websearch_to_tsquery('{config}', :query) q
+                WHERE s.user_id = :user_id AND {condition}
+                ORDER BY {", ".join(f"{column} DESC" for column in columns)}
+                LIMIT :limit OFFSET :offset
+            ) page
+            JOIN meals m ON m.id = page.meal_id
+            ORDER BY {", ".join(f"page.{column} DESC" for column in columns)}
+        """
+        return statement, {"query": query}
+
+    @staticmethod
+    def _sqlite_query(query: str, include_analysis: bool, order: str) -> Tuple[Optional[str], dict]:
+        """FTS5 MATCH search with bm25 ranking (None if the query has no words)"""
+        tokens = _TOKEN.findall(query.lower())
+        if not tokens:
+            return None, {}
+        # Quoted prefix terms, so user input can't use FTS5 operators
+        match = " ".join(f'"{token}"*' for token in tokens)
+        if not include_analysis:
+            match = f"meal_text : ({match})"
+        snippet_column = -1 if include_analysis else 2
+        # Meal text weighs 4x the analysis text; bm25() is lower for better matches
+        bm25 = "bm25(meal_search, 0, 0, 4.0, 1.0)"
+        ordering = f"{bm25}, m.meal_date DESC, m.id DESC" if order == "rank" else "m.meal_date DESC, m.id DESC"
+        statement = f"""
+            SELECT m.id AS meal_id, m.meal_date, m.morning_meal, m.afternoon_meal, m.evening_meal,
+                   -{bm25} AS rank,
+                   snippet(meal_search, {snippet_column}, '{HIGHLIGHT_START}', '{HIGHLIGHT_END}', '…', 16) AS snippet
+            FROM meal_search JOIN meals m ON m.id = meal_search.rowid
+            WHERE meal_search MATCH :match AND m.user_id = :user_id
+            ORDER BY {ordering}
+            LIMIT :limit OFFSET :offset
+        """
+        return statement, {"match": match}
@@ -0,0 +1,213 @@
+"""
+Long-range trend analytics
+
+A user's history is read with one aggregate query (one row per logged
+day) into dense NumPy columns indexed by day, with NaN for days without a
+value; rolling averages, slopes, target ratios and weekday patterns are
+then computed on whole arrays. NumPy is imported on first use so it does
+not add to app start-up.
+"""
+
+from datetime import date, timedelta
+from typing import List, Optional
+
+from sqlalchemy import and_, case, func, select
+
+from ..database import session_scope
+from ..models.food_analysis import FoodAnalysis
+from ..models.meal import Meal
+from ..schemas.report import (
+    TrendsResponse,
+    TrendSeries,
+    TrendSlopes,
+    TargetRatios,
+    MacroShares,
+    WeekdayPattern
+)
+
+# kcal per gram
+PROTEIN_KCAL = 4
+CARBS_KCAL = 4
+FAT_KCAL = 9
+
+
+def _nullable(values) -> List[Optional[float]]:
+    """Round an array to one decimal for JSON, NaN as None"""
+    return [None if value != value else value for value in values.round(1).tolist()]
+
+
+def _scalar(value) -> Optional[float]:
+    """Round a NumPy scalar to one decimal, NaN as None"""
+    value = float(value)
+    return None if value != value else round(value, 1) + 0.0  # no "-0.0"
+
+
+class TrendsService:
+    """Vectorized trend computations over a user's daily series"""
+
+    @staticmethod
+    def load_daily_rows(user_id: int, start: date, end: date) -> list:
+        """
+        Per-day aggregates of a user's meals and analyses in one query
+
+        Returns:
+            Rows of (meal_date, average health score, calories, protein,
+            carbs, fat); values are None for days without analyses
+        """
+        with session_scope() as db:
+            return db.execute(
+                select(
+                    Meal.meal_date,
+                    func.avg(case((FoodAnalysis.health_score > 0, FoodAnalysis.health_score))),
+                    func.sum(FoodAnalysis.calories),
+                    func.sum(FoodAnalysis.protein),
+                    func.sum(FoodAnalysis.carbs),
+                    func.sum(FoodAnalysis.fat)
+                )
+                .outerjoin(FoodAnalysis, and_(
+                    FoodAnalysis.meal_id == Meal.id,
+                    FoodAnalysis.meal_date == Meal.meal_date
+                ))
+                .where(Meal.user_id == user_id, Meal.meal_date >= start, Meal.meal_date <= end)
+                .group_by(Meal.meal_date)
+                .order_by(Meal.meal_date)
+            ).all()
+
+    @staticmethod
+    def compute_trends(user_id: int, days: int, targets: dict, today: Optional[date] = None) -> TrendsResponse:
+        """
+        Trends over the last ``days`` days (ending today)
+
+        Args:
+            user_id: Owner of the meals
+            days: Length of the period
+            targets: {"calories", "protein", "carbs", "fat"} daily targets
+            today: Last day of the period (defaults to today)
+        """
+        import numpy as np
+
+        end = today or date.today()
+        start = end - timedelta(days=days - 1)
+        rows = TrendsService.load_daily_rows(user_id, start, end)
+
+        # Dense per-day columns; days without data stay NaN
+        offsets = np.array([(row[0] - start).days for row in rows], dtype=np.int64)
+        columns = np.array([row[1:] for row in rows], dtype=np.float64).reshape(len(rows), 5)
+        series = np.full((5, days), np.nan)
+        series[:, offsets] = columns.T
+        score, calories, protein, carbs, fat = series
+        logged = np.zeros(days, dtype=bool)
+        logged[offsets] = True
+
+        return TrendsResponse(
+            start=start,
+            end=end,
+            days=days,
+            logged_days=int(logged.sum()),
+            series=TrendSeries(
+                dates=[start + timedelta(days=i) for i in range(days)],
+                health_score=_nullable(score),
+                calories=_nullable(calories),
+                protein=_nullable(protein),
+                carbs=_nullable(carbs),
+                fat=_nullable(fat),
+                health_score_7d=_nullable(TrendsService.rolling_mean(score, 7)),
+                health_score_30d=_nullable(TrendsService.rolling_mean(score, 30)),
+                calories_7d=_nullable(TrendsService.rolling_mean(calories, 7)),
+                calories_30d=_nullable(TrendsService.rolling_mean(calories, 30))
+            ),
+            slopes=TrendSlopes(
+                health_score_per_week=TrendsService.weekly_slope(score),
+                calories_per_week=TrendsService.weekly_slope(calories)
+            ),
+            target_ratios=TargetRatios(**{
+                name: TrendsService.target_ratio(values, targets.get(name))
+                for name, values in (("calories", calories), ("protein", protein), ("carbs", carbs), ("fat", fat))
+            }),
+            macro_shares=TrendsService.macro_shares(protein, carbs, fat),
+            weekdays=TrendsService.weekday_patterns(start, logged, score, calories)
+        )
+
+    @staticmethod
+    def rolling_mean(values, window: int):
+        """
+        Trailing mean over ``window`` days, ignoring NaN days
+
+        Computed from cumulative sums of the values and of the non-NaN
+        counts, so each day costs O(1) whatever the window. Days whose
+        window holds no value are NaN; the first days use a shorter window.
+        """
+        import numpy as np
+
+        present = ~np.isnan(values)
+        sums = np.concatenate(([0.0], np.cumsum(np.where(present, values, 0.0))))
+        counts = np.concatenate(([0], np.cumsum(present)))
+        index = np.arange(len(values))
+        lower = np.maximum(index - window + 1, 0)
+        window_counts = counts[index + 1] - counts[lower]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(window_counts > 0, (sums[index + 1] - sums[lower]) / window_counts, np.nan)
+
+    @staticmethod
+    def weekly_slope(values) -> Optional[float]:
+        """Least-squares slope of the non-NaN days, per week (None below two days)"""
+        import numpy as np
+
+        days = np.flatnonzero(~np.isnan(values))
+        if len(days) < 2:
+            return None
+        x = days - days.mean()
+        y = values[days]
+        return _scalar(7 * (x @ (y - y.mean())) / (x @ x))
+
+    @staticmethod
+    def target_ratio(values, target: Optional[float]) -> Optional[float]:
+        """Average share of a daily target reached on days with data, in percent"""
+        import numpy as np
+
+        if not target or np.isnan(values).all():
+            return None
+        return _scalar(np.nanmean(values) / target * 100)
+
+    @staticmethod
+    def macro_shares(protein, carbs, fat) -> MacroShares:
+        """Share of macro calories from protein, carbs and fat over the period, in percent"""
+        import numpy as np
+
+        energy = np.array([
+            np.nansum(protein) * PROTEIN_KCAL,
+            np.nansum(carbs) * CARBS_KCAL,
+            np.nansum(fat) * FAT_KCAL
+        ])
+        total = energy.sum()
+        if total <= 0:
+            return MacroShares()
+        shares = energy / total * 100
+        return MacroShares(protein=_scalar(shares[0]), carbs=_scalar(shares[1]), fat=_scalar(shares[2]))
+
+    @staticmethod
+    def weekday_patterns(start: date, logged, score, calories) -> List[WeekdayPattern]:
+        """Averages per weekday (0 = Monday) over the days with data"""
+        import numpy as np
+
+        weekdays = (start.weekday() + np.arange(len(logged))) % 7
+
+        def weekday_means(values):
+            present = ~np.isnan(values)
+            sums = np.bincount(weekdays[present], weights=values[present], minlength=7)
+            counts = np.bincount(weekdays[present], minlength=7)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                return sums / counts
+
+        score_means = weekday_means(score)
+        calorie_means = weekday_means(calories)
+        logged_counts = np.bincount(weekdays[logged], minlength=7)
+        return [
+            WeekdayPattern(
+                weekday=day,
+                logged_days=int(logged_counts[day]),
+                health_score=_scalar(score_means[day]),
+                calories=_scalar(calorie_means[day])
+            )
+            for day in range(7)
+        ]
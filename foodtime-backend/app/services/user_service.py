@@ -2,9 +2,13 @@
 User service for business logic
 """
 
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 from ..models.user import User
 from ..schemas.user import UserCreate, UserUpdate
+from .response_cache import response_cache
+from .search_service import SearchService
+from .report_service import ReportService
 from typing import Optional
 
 
@@ -37,7 +41,12 @@ class UserService:
         for field, value in update_data.items():
             setattr(user, field, value)
         
+        # Stored weekly insights were written for the old goals
+        if update_data.keys() & {"goal", "daily_calorie_target"}:
+            ReportService.invalidate_user(db, user_id)
+        UserService.bump_data_version(db, user_id)
         db.commit()
+        response_cache.invalidate_user(user_id)
         db.refresh(user)
         return user
     
@@ -49,5 +58,27 @@ class UserService:
             return False
         
         db.delete(user)
+        SearchService.remove_user(db, user_id)
+        ReportService.invalidate_user(db, user_id)
         db.commit()
+        response_cache.invalidate_user(user_id)
         return True
+    
+    @staticmethod
+    def bump_data_version(db: Session, user_id: int) -> Optional[int]:
+        """
+        Mark the user's derived data (dashboard, nutrition, reports) as changed
+        
+        Issued as an atomic UPDATE in the caller's transaction; the caller
+        commits together with the write that caused it.
+        
+        Returns:
+            The new data version, or None if the user does not exist
+        """
+        return db.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(data_version=User.data_version + 1)
+            .returning(User.data_version)
+            .execution_options(synchronize_session=False)
+        ).scalar()
@@ -0,0 +1,163 @@
+"""
+Structured, non-blocking logging
+
+Every log record carries the id of the request it was emitted for, taken
+from a context variable that follows the request into threadpool workers
+and AI calls (``RequestContext``). Handlers only put records on a bounded
+queue; a ``QueueListener`` thread formats them (JSON lines, or plain text
+for local development with LOG_FORMAT=text) and writes them to stdout, so
+log I/O never blocks the event loop. When the queue is full records are
+dropped and counted in ``foodtime_log_records_dropped_total``.
+
+Fields passed with ``extra={...}`` become top-level JSON keys.
+"""
+
+import atexit
+import copy
+import logging
+import logging.handlers
+import queue
+import sys
+import traceback
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional
+
+import orjson
+
+from ..config import settings
+from .metrics import LOG_RECORDS_DROPPED
+
+# Attributes every LogRecord has; anything else was passed via ``extra``
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id"}
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"
+
+
+class RequestContext:
+    """Id and AI time of the request being served"""
+
+    __slots__ = ("request_id", "ai_time", "ai_calls")
+
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.ai_time = 0.0
+        self.ai_calls = 0
+
+    def record_ai_call(self, elapsed: float):
+        """Add one AI provider call"""
+        self.ai_calls += 1
+        self.ai_time += elapsed
+
+
+# Context of the request being served (shared with threadpool workers)
+_request_context: ContextVar[Optional[RequestContext]] = ContextVar("request_context", default=None)
+
+
+def start_request_context(request_id: Optional[str] = None) -> RequestContext:
+    """Begin a request, with the given id or a new one"""
+    context = RequestContext(request_id or uuid.uuid4().hex)
+    _request_context.set(context)
+    return context
+
+
+def get_request_context() -> Optional[RequestContext]:
+    """Context of the current request, if any"""
+    return _request_context.get()
+
+
+def current_request_id() -> Optional[str]:
+    """Id of the current request, None outside requests (e.g. schedulers)"""
+    context = _request_context.get()
+    return context.request_id if context is not None else None
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp records with the current request id in the emitting thread"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "request_id"):
+            record.request_id = current_request_id()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            record.exc_text = "".join(traceback.format_exception(*record.exc_info)).rstrip()
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return orjson.dumps(entry, default=str).decode()
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking or raising when full"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Resolve the message and traceback while the arguments are still valid
+
+        Unlike the base class this leaves formatting to the listener's
+        formatter, so ``extra`` fields and the traceback stay separate.
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = "".join(traceback.format_exception(*record.exc_info)).rstrip()
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def configure_logging():
+    """
+    Route the root logger (and uvicorn's loggers) through the log queue
+
+    Safe to call more than once; only the first call installs handlers.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(sys.stdout)
+    if settings.LOG_FORMAT == "text":
+        output.setFormatter(logging.Formatter(TEXT_FORMAT))
+    else:
+        output.setFormatter(JsonFormatter())
+
+    handler = DroppingQueueHandler(queue.Queue(settings.LOG_QUEUE_SIZE))
+    handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(settings.LOG_LEVEL.upper())
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers = []
+        uvicorn_logger.propagate = True
+
+    _listener = logging.handlers.QueueListener(handler.queue, output)
+    _listener.start()
+    atexit.register(_listener.stop)
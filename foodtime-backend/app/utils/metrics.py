@@ -0,0 +1,317 @@
+"""
+In-process metrics with Prometheus text exposition
+
+Counters, gauges and histograms are kept in memory per worker process and
+rendered in the Prometheus text format (version 0.0.4) by ``/metrics``.
+"""
+
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+AI_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the text format"""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    """Render a label set as {a="1",b="2"}"""
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    """Render a sample value"""
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Base class for labelled metrics"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        """Increase the counter for a label set"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        """Current value for a label set"""
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels):
+        """Set the gauge for a label set"""
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        """Increase the gauge for a label set"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        """Decrease the gauge for a label set"""
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        """Current value for a label set"""
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Histogram(_Metric):
+    """Cumulative histogram with fixed buckets"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # label key -> [bucket counts..., sum, count]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        """Record one observation"""
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    def time(self, **labels) -> "_Timer":
+        """Context manager observing the elapsed time of a block"""
+        return _Timer(self, labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(state)) for key, state in self._values.items()]
+        lines = []
+        for key, state in items:
+            cumulative = 0.0
+            for i, bound in enumerate(self.buckets):
+                cumulative += state[i]
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {_format_value(cumulative)}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(state[-1])}")
+        return lines
+
+
+class _Timer:
+    """Context manager used by Histogram.time()"""
+
+    def __init__(self, histogram: Histogram, labels: Dict[str, str]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+class MetricsRegistry:
+    """Collection of metrics plus callbacks refreshed at scrape time"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        """Add a metric to the registry"""
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, callback: Callable[[], None]):
+        """Register a callback that updates gauges before rendering"""
+        self._collectors.append(callback)
+
+    def render(self) -> str:
+        """Render all metrics in Prometheus text format"""
+        for collect in self._collectors:
+            try:
+                collect()
+            except Exception:
+                pass
+
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.header())
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# HTTP
+HTTP_REQUESTS = registry.register(Counter(
+    "foodtime_http_requests_total", "HTTP requests by route and status", ("method", "route", "status")
+))
+HTTP_REQUEST_DURATION = registry.register(Histogram(
+    "foodtime_http_request_duration_seconds", "HTTP request latency by route", ("method", "route")
+))
+HTTP_IN_FLIGHT = registry.register(Gauge(
+    "foodtime_http_requests_in_flight", "HTTP requests currently being served"
+))
+
+# Database connection pool
+DB_POOL = registry.register(Gauge(
+    "foodtime_db_pool_connections", "Database pool connections by state", ("state",)
+))
+
+DB_POOL_CHECKOUT_DURATION = registry.register(Histogram(
+    "foodtime_db_pool_checkout_duration_seconds", "Time a pooled connection stays checked out",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+))
+
+# AI provider
+AI_REQUESTS = registry.register(Counter(
+    "foodtime_ai_requests_total", "AI provider calls by method and outcome", ("provider", "method", "outcome")
+))
+AI_REQUEST_DURATION = registry.register(Histogram(
+    "foodtime_ai_request_duration_seconds", "AI provider call latency by method", ("provider", "method"),
+    buckets=AI_BUCKETS
+))
+AI_TOKENS = registry.register(Counter(
+    "foodtime_ai_tokens_total", "AI tokens consumed by method and direction", ("provider", "method", "direction")
+))
+
+# Caches
+CACHE_REQUESTS = registry.register(Counter(
+    "foodtime_cache_requests_total", "Cache lookups by cache and result", ("cache", "result")
+))
+CACHE_SIZE_BYTES = registry.register(Gauge(
+    "foodtime_cache_size_bytes", "Bytes held by a cache", ("cache",)
+))
+CACHE_ENTRIES = registry.register(Gauge(
+    "foodtime_cache_entries", "Entries held by a cache", ("cache",)
+))
+CACHE_HIT_RATIO = registry.register(Gauge(
+    "foodtime_cache_hit_ratio", "Cache hit ratio since process start", ("cache",)
+))
+
+
+# Live update events
+EVENTS_PUBLISHED = registry.register(Counter(
+    "foodtime_events_published_total", "Change events published by type", ("type",)
+))
+EVENT_STREAMS = registry.register(Gauge(
+    "foodtime_event_streams", "Open server-sent event streams"
+))
+
+# Rate limiting
+RATE_LIMITED = registry.register(Counter(
+    "foodtime_rate_limited_total", "Requests rejected by rate limiting by endpoint and scope", ("endpoint", "scope")
+))
+
+# Idempotency keys
+IDEMPOTENCY_REQUESTS = registry.register(Counter(
+    "foodtime_idempotency_requests_total",
+    "Requests sent with an Idempotency-Key by outcome (claimed, replay, mismatch, in_progress)", ("outcome",)
+))
+
+# Logging
+LOG_RECORDS_DROPPED = registry.register(Counter(
+    "foodtime_log_records_dropped_total", "Log records dropped because the log queue was full"
+))
+
+# Background jobs
+REPORTS_PRECOMPUTED = registry.register(Counter(
+    "foodtime_reports_precomputed_total", "Weekly reports precomputed by the scheduler by outcome", ("outcome",)
+))
+SCHEDULER_LEADER = registry.register(Gauge(
+    "foodtime_scheduler_leader", "1 if this worker holds the job's lease", ("job",)
+))
+
+
+def record_cache_lookup(cache: str, hit: bool):
+    """Count a cache hit or miss"""
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def _collect_cache_ratios():
+    """Derive hit ratios from the lookup counters"""
+    caches = {key[0] for key in list(CACHE_REQUESTS._values)}
+    for cache in caches:
+        hits = CACHE_REQUESTS.value(cache=cache, result="hit")
+        misses = CACHE_REQUESTS.value(cache=cache, result="miss")
+        total = hits + misses
+        CACHE_HIT_RATIO.set(hits / total if total else 0.0, cache=cache)
+
+
+registry.add_collector(_collect_cache_ratios)
+
+
+def render_metrics() -> str:
+    """Render the global registry"""
+    return registry.render()
@@ -0,0 +1,4 @@
+"""
+FOOD TIME Backend Benchmarks
+Synthetic data seeding and load testing for the API
+"""
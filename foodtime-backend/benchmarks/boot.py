@@ -0,0 +1,175 @@
+"""
+Cold start profile
+
+Measures, in fresh interpreters, how long importing ``app.main`` takes
+(with a per-package breakdown from ``python -X importtime``), how long the
+startup hooks take and how long the first request takes, then checks the
+total against a boot budget. Modules that must stay lazy (the AI SDK) are
+reported if anything imports them at boot.
+
+Usage (from foodtime-backend/):
+    python -m benchmarks.boot
+    python -m benchmarks.boot --budget-ms 800 --top 20 --output boot.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+from typing import Dict, List
+
+DEFAULT_BUDGET_MS = 1500.0
+
+# Heavy modules that should only load on first use
+LAZY_MODULES = ["google.generativeai", "grpc", "numpy"]
+
+# Runs in a child process so nothing is already imported
+STARTUP_PROBE = """
+import asyncio, json, time
+started = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+
+async def probe():
+    import httpx
+    await app.router.startup()
+    ready = time.perf_counter()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://boot") as client:
+        response = await client.get("/health/live")
+    first = time.perf_counter()
+    await app.router.shutdown()
+    return ready, first, response.status_code
+
+ready, first, status = asyncio.run(probe())
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "startup_ms": (ready - imported) * 1000,
+    "first_request_ms": (first - ready) * 1000,
+    "first_request_status": status,
+}))
+"""
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="FOOD TIME cold start profile")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help="Maximum import + startup + first request time")
+    parser.add_argument("--top", type=int, default=15, help="Packages to list in the breakdown")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters to time (best run is kept)")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    return parser.parse_args(argv)
+
+
+def child_environment(workdir: str) -> Dict[str, str]:
+    """Environment for child interpreters, with safe defaults for required settings"""
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(workdir, 'boot.db')}")
+    env.setdefault("SECRET_KEY", "boot-profile-secret-key-not-for-production-use")
+    return env
+
+
+def parse_importtime(stderr: str) -> List[Dict]:
+    """
+    Parse ``-X importtime`` output
+
+    Returns:
+        One entry per module with self/cumulative microseconds
+    """
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        modules.append({
+            "module": name.strip(),
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us)
+        })
+    return modules
+
+
+def profile_imports(env: Dict[str, str]) -> List[Dict]:
+    """Import app.main once with -X importtime and return the parsed timings"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"Importing app.main failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def package_breakdown(modules: List[Dict], top: int) -> List[Dict]:
+    """Sum self time per top-level package"""
+    totals = defaultdict(int)
+    for entry in modules:
+        totals[entry["module"].split(".")[0]] += entry["self_us"]
+    ranked = sorted(totals.items(), key=lambda item: item[1], reverse=True)[:top]
+    return [{"package": name, "ms": round(us / 1000, 1)} for name, us in ranked]
+
+
+def time_startup(env: Dict[str, str], runs: int) -> Dict:
+    """Time import, startup hooks and the first request; keep the fastest run"""
+    best = None
+    for _ in range(max(runs, 1)):
+        result = subprocess.run([sys.executable, "-c", STARTUP_PROBE], env=env, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise SystemExit(f"Startup probe failed:\n{result.stderr[-2000:]}")
+        timing = json.loads(result.stdout.strip().splitlines()[-1])
+        timing["total_ms"] = timing["import_ms"] + timing["startup_ms"] + timing["first_request_ms"]
+        if best is None or timing["total_ms"] < best["total_ms"]:
+            best = timing
+    return {key: round(value, 1) if isinstance(value, float) else value for key, value in best.items()}
+
+
+def main(argv=None) -> int:
+    """Command line entry point"""
+    args = parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        env = child_environment(workdir)
+        modules = profile_imports(env)
+        timing = time_startup(env, args.runs)
+
+    imported = {entry["module"] for entry in modules}
+    eager_lazy_modules = [name for name in LAZY_MODULES if name in imported]
+    report = {
+        "timing": timing,
+        "budget_ms": args.budget_ms,
+        "packages": package_breakdown(modules, args.top),
+        "eager_lazy_modules": eager_lazy_modules,
+    }
+
+    print(f"import app.main   {timing['import_ms']:>8.1f} ms")
+    print(f"startup hooks     {timing['startup_ms']:>8.1f} ms")
+    print(f"first request     {timing['first_request_ms']:>8.1f} ms")
+    print(f"total             {timing['total_ms']:>8.1f} ms  (budget {args.budget_ms:.0f} ms)")
+    print("\nImport time by package (self time):")
+    for row in report["packages"]:
+        print(f"  {row['package']:<28}{row['ms']:>8.1f} ms")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    failed = False
+    if eager_lazy_modules:
+        print(f"\nImported at boot but expected to load lazily: {', '.join(eager_lazy_modules)}")
+        failed = True
+    if timing["total_ms"] > args.budget_ms:
+        print(f"\nBoot time {timing['total_ms']:.1f} ms exceeds budget {args.budget_ms:.0f} ms")
+        failed = True
+    if timing["first_request_status"] != 200:
+        print(f"\nFirst request returned {timing['first_request_status']}")
+        failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,283 @@
+"""
+API load test and benchmark runner
+
+Seeds a synthetic dataset, drives the FastAPI app in-process with
+concurrent clients (AI provider replaced by the fake provider) and reports
+latency percentiles, throughput and SQL statements per request for each
+endpoint. Results can be stored as a baseline and compared on later runs.
+
+Usage (from foodtime-backend/):
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks.run --users 20 --days 730 --concurrency 16
+    python -m benchmarks.run --baseline benchmarks/baselines/sqlite-default.json
+    python -m benchmarks.run --save-baseline benchmarks/baselines/sqlite-default.json
+
+Point --database-url at a local PostgreSQL (postgresql://...) to benchmark
+the production engine configuration. The target database is dropped and
+re-created unless --skip-seed is given.
+"""
+
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import platform
+import random
+import sys
+import time
+from typing import Dict, List, Optional
+
+DEFAULT_DATABASE_URL = "sqlite:///./benchmark.db"
+
+ENDPOINTS = {
+    "dashboard_stats": ("GET", "/api/dashboard/stats", None),
+    "nutrition_daily": ("GET", "/api/nutrition/daily", None),
+    "reports_weekly": ("GET", "/api/reports/weekly", None),
+    "reports_weekly_previous": ("GET", "/api/reports/weekly?week_offset=-1", None),
+    "meals_history": ("GET", "/api/meals/history?days=30", None),
+    "meals_history_page": ("GET", "/api/meals/history/page?limit=20", None),
+    "analysis_daily": ("POST", "/api/analysis/daily", {
+        "morning_meal": "menemen ve tam buğday ekmeği",
+        "afternoon_meal": "mercimek çorbası ve pilav",
+        "evening_meal": "fırında somon ve sebze"
+    }),
+}
+
+# Statement counter for the request currently being driven
+_query_counter: contextvars.ContextVar[Optional[List[int]]] = contextvars.ContextVar(
+    "benchmark_query_counter", default=None
+)
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="FOOD TIME API benchmark")
+    parser.add_argument("--database-url", default=os.getenv("BENCHMARK_DATABASE_URL", DEFAULT_DATABASE_URL))
+    parser.add_argument("--users", type=int, default=20, help="Synthetic users to seed")
+    parser.add_argument("--days", type=int, default=730, help="Days of meal history per user")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=5, help="Unmeasured requests per endpoint (after one per user)")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help="Comma separated endpoint names")
+    parser.add_argument("--ai-latency-ms", type=float, default=50.0, help="Fake AI mean latency")
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse existing data")
+    parser.add_argument("--no-response-cache", action="store_true",
+                        help="Disable the server-side response cache to measure raw endpoint cost")
+    parser.add_argument("--baseline", help="Compare results against this baseline file")
+    parser.add_argument("--save-baseline", help="Write results to this baseline file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative p95 regression")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    return parser.parse_args(argv)
+
+
+def configure_environment(args: argparse.Namespace):
+    """Set environment before the app (and its settings) are imported"""
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ["AI_PROVIDER"] = "fake"
+    os.environ["FAKE_AI_LATENCY_MS"] = str(args.ai_latency_ms)
+    os.environ["FAKE_AI_LATENCY_SPREAD_MS"] = str(args.ai_latency_ms / 4)
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-not-for-production-use")
+    # Measures endpoint cost, not the limiter: a few users would exhaust their buckets
+    os.environ["RATE_LIMIT_ENABLED"] = "false"
+    # Per-request access logs would drown the report
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    if args.no_response_cache:
+        os.environ["RESPONSE_CACHE_ENABLED"] = "false"
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def install_query_counter(engine):
+    """Count SQL statements issued on behalf of each benchmarked request"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        counter = _query_counter.get()
+        if counter is not None:
+            counter[0] += 1
+
+
+async def run_endpoint(client, name: str, tokens: List[str], args: argparse.Namespace) -> Dict:
+    """Drive one endpoint with concurrent clients and collect statistics"""
+    method, path, body = ENDPOINTS[name]
+    rng = random.Random(name)
+    latencies: List[float] = []
+    query_counts: List[int] = []
+    errors = 0
+    remaining = args.requests
+
+    async def one_request(measure: bool, token: Optional[str] = None):
+        nonlocal errors
+        headers = {"Authorization": f"Bearer {token or rng.choice(tokens)}"}
+        counter = [0]
+        _query_counter.set(counter)
+        started = time.perf_counter()
+        response = await client.request(method, path, json=body, headers=headers)
+        elapsed = time.perf_counter() - started
+        if not measure:
+            return
+        if response.status_code >= 400:
+            errors += 1
+        latencies.append(elapsed * 1000)
+        query_counts.append(counter[0])
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            await one_request(True)
+
+    # One request per user first, so cold response caches do not land in p95
+    for token in tokens:
+        await one_request(False, token)
+    for _ in range(args.warmup):
+        await one_request(False)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "mean_ms": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else 0.0,
+        "queries_per_request": round(sum(query_counts) / len(query_counts), 2) if query_counts else 0.0,
+    }
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict:
+    """Seed data, run every selected endpoint and build the report"""
+    import httpx
+    from app.main import app
+    from app.database import engine
+    from app.utils.auth_utils import create_access_token
+    from .seed import seed
+
+    if args.skip_seed:
+        from app.database import SessionLocal
+        from app.models import User
+        db = SessionLocal()
+        try:
+            user_ids = [row.id for row in db.query(User.id).all()]
+        finally:
+            db.close()
+    else:
+        seeding_started = time.perf_counter()
+        user_ids = seed(args.users, args.days)
+        print(f"Seeded {len(user_ids)} users x {args.days} days in "
+              f"{time.perf_counter() - seeding_started:.1f}s")
+
+    install_query_counter(engine)
+    tokens = [create_access_token(user_id) for user_id in user_ids]
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        for name in [n.strip() for n in args.endpoints.split(",") if n.strip()]:
+            if name not in ENDPOINTS:
+                raise SystemExit(f"Unknown endpoint: {name}")
+            results[name] = await run_endpoint(client, name, tokens, args)
+
+    return {
+        "meta": {
+            "database": engine.dialect.name,
+            "users": len(user_ids),
+            "days": args.days,
+            "concurrency": args.concurrency,
+            "requests_per_endpoint": args.requests,
+            "ai_latency_ms": args.ai_latency_ms,
+            "response_cache": not args.no_response_cache,
+            "python": platform.python_version(),
+        },
+        "endpoints": results,
+    }
+
+
+def print_report(report: Dict):
+    """Print results as an aligned table"""
+    header = f"{'endpoint':<26}{'req':>6}{'err':>5}{'p50':>9}{'p95':>9}{'p99':>9}{'rps':>9}{'queries':>9}"
+    print(header)
+    print("-" * len(header))
+    for name, row in report["endpoints"].items():
+        print(f"{name:<26}{row['requests']:>6}{row['errors']:>5}{row['p50_ms']:>9.1f}"
+              f"{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}{row['throughput_rps']:>9.1f}"
+              f"{row['queries_per_request']:>9.1f}")
+
+
+def compare_with_baseline(report: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """
+    Compare a report with a stored baseline
+
+    Returns:
+        Human readable regression messages (empty if none)
+    """
+    regressions = []
+    for name, base in baseline.get("endpoints", {}).items():
+        current = report["endpoints"].get(name)
+        if current is None:
+            continue
+        # Ignore sub-millisecond noise on very fast endpoints
+        allowed_p95 = max(base["p95_ms"] * (1 + tolerance), base["p95_ms"] + 2.0)
+        if current["p95_ms"] > allowed_p95:
+            regressions.append(
+                f"{name}: p95 {current['p95_ms']:.1f}ms > baseline {base['p95_ms']:.1f}ms"
+            )
+        if current["queries_per_request"] > base["queries_per_request"] + 0.5:
+            regressions.append(
+                f"{name}: {current['queries_per_request']:.1f} queries/request > "
+                f"baseline {base['queries_per_request']:.1f}"
+            )
+        if current["errors"] > base.get("errors", 0):
+            regressions.append(f"{name}: {current['errors']} errors > baseline {base.get('errors', 0)}")
+    return regressions
+
+
+def main(argv=None) -> int:
+    """Command line entry point"""
+    args = parse_args(argv)
+    configure_environment(args)
+
+    report = asyncio.run(run_benchmark(args))
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"Baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("meta", {}).get("database") != report["meta"]["database"]:
+            print("Warning: baseline was recorded on a different database engine")
+        regressions = compare_with_baseline(report, baseline, args.tolerance)
+        if regressions:
+            print("\nRegressions detected:")
+            for message in regressions:
+                print(f"  - {message}")
+            return 1
+        print("\nNo regressions against baseline")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""
+Synthetic data seeding for benchmarks
+
+Creates users with a long daily meal history and one daily analysis per
+meal, using bulk inserts so multi-year datasets load in seconds.
+"""
+
+import random
+from datetime import date, datetime, timedelta
+from typing import List
+
+from sqlalchemy import insert
+
+from app.database import Base, engine, SessionLocal
+from app.migrate import migrate
+from app.services.search_service import drop_search_index, rebuild_search_index
+from app.models import User, Meal, FoodAnalysis
+from app.models.analysis_text import encode_text, store_texts
+from app.services.fake_ai_service import DAILY_TEMPLATE
+
+BREAKFASTS = ["menemen ve tam buğday ekmeği", "yulaf ezmesi ve muz", "peynir, zeytin, domates", "simit ve çay", "haşlanmış yumurta ve salatalık"]
+LUNCHES = ["mercimek çorbası ve pilav", "ızgara tavuk salata", "kuru fasulye ve bulgur", "döner dürüm", "zeytinyağlı taze fasulye"]
+DINNERS = ["karnıyarık ve yoğurt", "fırında somon ve sebze", "mantı", "lahmacun ve ayran", "etli nohut ve cacık"]
+
+BATCH_SIZE = 5000
+
+
+def seed(users: int, days: int, fill_rate: float = 0.85, seed_value: int = 1) -> List[int]:
+    """
+    Create synthetic users, meals and analyses
+
+    Args:
+        users: Number of users to create
+        days: Days of history per user (ending today)
+        fill_rate: Probability that a given day has a logged meal
+        seed_value: Random seed for reproducible datasets
+
+    Returns:
+        List of created user IDs
+    """
+    rng = random.Random(seed_value)
+    with engine.begin() as conn:
+        drop_search_index(conn)
+    Base.metadata.drop_all(bind=engine)
+    migrate()
+
+    today = date.today()
+    now = datetime.utcnow()
+
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {
+                "email": f"bench{i}@foodtime.local",
+                "name": f"Bench User {i}",
+                # Benchmarks authenticate with minted tokens, never with a password
+                "hashed_password": "!",
+                "is_active": 1,
+                "goal": rng.choice(["Kilo Ver", "Kas Yap", "Denge"]),
+                "daily_calorie_target": 2000,
+                "daily_protein_target": 150,
+                "daily_carbs_target": 250,
+                "daily_fat_target": 70,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for i in range(users)
+        ])
+
+    db = SessionLocal()
+    try:
+        user_ids = [row.id for row in db.query(User.id).order_by(User.id).all()]
+    finally:
+        db.close()
+
+    meals, analyses, texts = [], [], {}
+    for user_id in user_ids:
+        for offset in range(days):
+            if rng.random() > fill_rate:
+                continue
+            meal_date = today - timedelta(days=offset)
+            created = datetime.combine(meal_date, datetime.min.time()) + timedelta(hours=20)
+            meals.append({
+                "user_id": user_id,
+                "meal_date": meal_date,
+                "morning_meal": rng.choice(BREAKFASTS),
+                "afternoon_meal": rng.choice(LUNCHES),
+                "evening_meal": rng.choice(DINNERS),
+                "created_at": created,
+            })
+            score = rng.randint(4, 9)
+            calories = rng.randrange(1400, 2800, 10)
+            protein, carbs, fat = rng.randint(50, 160), rng.randint(120, 330), rng.randint(35, 110)
+            digest, body = encode_text(DAILY_TEMPLATE.format(
+                score=score, calories=calories, protein=protein, carbs=carbs, fat=fat
+            ))
+            texts[digest] = body
+            analyses.append({
+                "analysis_type": "gunluk",
+                "meal_date": meal_date,
+                "text_digest": digest,
+                "health_score": float(score),
+                "calories": float(calories),
+                "protein": float(protein),
+                "carbs": float(carbs),
+                "fat": float(fat),
+                "created_at": created,
+            })
+            if len(meals) >= BATCH_SIZE:
+                _flush(meals, analyses, texts)
+
+    _flush(meals, analyses, texts)
+    with engine.begin() as conn:
+        rebuild_search_index(conn)
+    return user_ids
+
+
+def _flush(meals: list, analyses: list, texts: dict):
+    """Insert buffered rows and clear the buffers"""
+    if not meals:
+        return
+    with engine.begin() as conn:
+        store_texts(conn, texts.items())
+        result = conn.execute(
+            insert(Meal).returning(Meal.id, sort_by_parameter_order=True), meals
+        )
+        for analysis, meal_id in zip(analyses, result.scalars()):
+            analysis["meal_id"] = meal_id
+        conn.execute(insert(FoodAnalysis), analyses)
+    meals.clear()
+    analyses.clear()
+    texts.clear()
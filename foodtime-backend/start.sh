@@ -18,6 +18,11 @@ if [ ! -f .env ]; then
     echo "✅ .env file created. Please update it with your configuration."
 fi
 
+# Apply database schema changes
+echo "🗄️  Applying database migrations..."
+python -m app.migrate || exit 1
+echo ""
+
 # Start the server
 echo "🔥 Starting FastAPI server on http://localhost:8000"
 echo "📚 API Documentation will be available at http://localhost:8000/docs"
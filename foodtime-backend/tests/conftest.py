@@ -0,0 +1,90 @@
+"""
+Shared test setup
+
+Tests run against a throwaway SQLite database and the fake AI provider.
+The environment is set here, before any ``app`` module is imported, because
+settings and the engine are created at import time.
+"""
+
+import os
+import tempfile
+import uuid
+from datetime import date
+
+_DB_DIR = tempfile.mkdtemp(prefix="foodtime-tests-")
+
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{os.path.join(_DB_DIR, 'test.db')}",
+    "SECRET_KEY": "test-secret-key-not-for-production-0123456789",
+    "AI_PROVIDER": "fake",
+    "FAKE_AI_LATENCY_MS": "0",
+    "FAKE_AI_LATENCY_SPREAD_MS": "0",
+    "FAKE_AI_FAILURE_RATE": "0",
+    "REPORT_SCHEDULER_ENABLED": "false",
+    "RATE_LIMIT_ENABLED": "false",
+    "PROFILING_ENABLED": "false",
+    "LOG_LEVEL": "WARNING",
+    "LOG_FORMAT": "text",
+})
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.database import session_scope  # noqa: E402
+from app.main import app  # noqa: E402
+from app.migrate import migrate  # noqa: E402
+from app.models.food_analysis import FoodAnalysis  # noqa: E402
+from app.models.meal import Meal  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.utils.auth_utils import create_access_token  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    """Create the tables (and search index) once per run"""
+    migrate()
+
+
+@pytest.fixture
+def user_id() -> int:
+    """A fresh user with no meals"""
+    with session_scope() as db:
+        user = User(email=f"{uuid.uuid4().hex}@test.local", name="Test User", hashed_password="!")
+        db.add(user)
+        db.commit()
+        return user.id
+
+
+@pytest.fixture
+def client() -> TestClient:
+    """Client for the app, without running its startup tasks"""
+    return TestClient(app)
+
+
+@pytest.fixture
+def auth_headers(user_id) -> dict:
+    """Authorization header for ``user_id``"""
+    return {"Authorization": f"Bearer {create_access_token(user_id)}"}
+
+
+def add_meal(user_id: int, meal_date: date, analyses=(), **texts) -> int:
+    """
+    Insert a meal with analyses directly, bypassing the services
+
+    Args:
+        user_id: Owner of the meal
+        meal_date: Day of the meal
+        analyses: Dicts of FoodAnalysis columns (health_score, calories, ...)
+        texts: morning_meal / afternoon_meal / evening_meal
+
+    Returns:
+        Id of the meal
+    """
+    with session_scope() as db:
+        meal = Meal(user_id=user_id, meal_date=meal_date, **texts)
+        db.add(meal)
+        db.flush()
+        for values in analyses:
+            db.add(FoodAnalysis(meal_id=meal.id, meal_date=meal_date, analysis_type="gunluk", **values))
+        db.commit()
+        return meal.id
@@ -0,0 +1,128 @@
+"""
+Splitting batched model answers and chunking batch inputs
+"""
+
+import asyncio
+import base64
+
+import pytest
+
+from app.config import settings
+from app.routers.rate_limit import max_batch_items
+from app.services.ai_provider import AIProvider, BATCH_SECTION
+
+
+@pytest.fixture
+def provider() -> AIProvider:
+    return AIProvider()
+
+
+def _answer(*sections) -> str:
+    return "Tamam, analizler:\n" + "".join(
+        BATCH_SECTION.format(index=index) + "\n" + body + "\n" for index, body in sections
+    )
+
+
+def test_sections_are_split_in_order(provider):
+    results = provider._split_sections(_answer((1, "**Elma** 8/10"), (2, "# Simit 5/10")), 2)
+
+    assert [result["analysis"] for result in results] == ["Elma 8/10", "Simit 5/10"]
+    assert [result["health_score"] for result in results] == [8, 5]
+    assert all(result["source"] == "ai" for result in results)
+
+
+def test_sections_follow_their_numbers_not_their_position(provider):
+    results = provider._split_sections(_answer((2, "ikinci 4/10"), (1, "birinci 9/10")), 2)
+
+    assert results[0]["analysis"] == "birinci 9/10"
+    assert results[1]["analysis"] == "ikinci 4/10"
+
+
+def test_missing_empty_and_out_of_range_sections_are_none(provider):
+    results = provider._split_sections(_answer((1, "   "), (3, "tamam 6/10"), (7, "fazla")), 3)
+
+    assert results[0] is None
+    assert results[1] is None
+    assert results[2]["analysis"] == "tamam 6/10"
+
+
+def test_first_duplicate_section_wins(provider):
+    results = provider._split_sections(_answer((1, "ilk 7/10"), (1, "tekrar 2/10")), 1)
+
+    assert results[0]["analysis"] == "ilk 7/10"
+
+
+def test_spacing_variants_of_the_marker_are_recognised(provider):
+    results = provider._split_sections("===ÖĞE 1===\nbir\n===  ÖĞE  2  ===\niki", 2)
+
+    assert [result["analysis"] for result in results] == ["bir", "iki"]
+
+
+def test_answer_without_markers_yields_nothing(provider):
+    assert provider._split_sections("Sağlık puanı: 7/10", 2) == [None, None]
+
+
+def test_chunks_respect_item_count(monkeypatch):
+    monkeypatch.setattr(settings, "AI_BATCH_ITEMS_PER_CALL", 3)
+
+    assert AIProvider._chunk(list(range(7)), lambda item: 1, 1000) == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+def test_chunks_respect_size_budget(monkeypatch):
+    monkeypatch.setattr(settings, "AI_BATCH_ITEMS_PER_CALL", 100)
+
+    chunks = AIProvider._chunk(["aaaa", "bbb", "cc", "dddddd", "e"], len, 7)
+
+    assert chunks == [["aaaa", "bbb"], ["cc"], ["dddddd", "e"]]
+
+
+def test_oversized_item_gets_its_own_chunk(monkeypatch):
+    monkeypatch.setattr(settings, "AI_BATCH_ITEMS_PER_CALL", 100)
+
+    assert AIProvider._chunk(["a", "x" * 50, "b"], len, 10) == [["a"], ["x" * 50], ["b"]]
+
+
+def test_no_items_no_chunks():
+    assert AIProvider._chunk([], len, 10) == []
+
+
+def test_fill_missing_retries_only_gaps():
+    retried = []
+
+    async def retry(index):
+        retried.append(index)
+        return {"analysis": f"tekrar {index}"}
+
+    results = asyncio.run(AIProvider._fill_missing([{"analysis": "bir"}, None, None], retry))
+
+    assert sorted(retried) == [1, 2]
+    assert [result["analysis"] for result in results] == ["bir", "tekrar 1", "tekrar 2"]
+
+
+@pytest.fixture
+def default_limits(monkeypatch):
+    """Rate limiting on, with the shipped bucket sizes"""
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(settings, "AI_BATCH_MAX_ITEMS", 20)
+    monkeypatch.setattr(settings, "RATE_LIMIT_USER_CAPACITY", 30.0)
+    monkeypatch.setattr(settings, "RATE_LIMIT_IP_CAPACITY", 60.0)
+
+
+def test_batch_cap_follows_the_rate_limit(default_limits, monkeypatch):
+    assert max_batch_items("food") == 20
+    assert max_batch_items("photo") == 6
+
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+    assert max_batch_items("photo") == 20
+
+
+def test_photo_batch_over_the_cap_is_refused_before_charging(client, auth_headers, default_limits):
+    image = {"image_base64": base64.b64encode(b"jpeg").decode(), "mime_type": "image/jpeg"}
+
+    too_many = client.post("/api/analysis/photo/batch", headers=auth_headers, json={"images": [image] * 7})
+    assert too_many.status_code == 400
+    assert too_many.json()["detail"] == "At most 6 items per batch"
+
+    allowed = client.post("/api/analysis/photo/batch", headers=auth_headers, json={"images": [image] * 6})
+    assert allowed.status_code == 200
+    assert len(allowed.json()["items"]) == 6
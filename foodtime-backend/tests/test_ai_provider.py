@@ -0,0 +1,118 @@
+"""
+AI provider selection and the deterministic fake provider
+"""
+
+import asyncio
+import statistics
+
+import pytest
+
+from app.config import settings
+from app.services.ai_provider import AIProviderError, create_ai_provider
+from app.services.fake_ai_service import FakeAIService
+from app.services.gemini_service import GeminiService
+
+MEALS = ("menemen ve simit", "mercimek çorbası", "ızgara köfte ve pilav")
+
+
+def _fake(**options) -> FakeAIService:
+    return FakeAIService(**{"latency_ms": 0, "latency_spread_ms": 0, "failure_rate": 0, **options})
+
+
+def test_provider_follows_settings(monkeypatch):
+    monkeypatch.setattr(settings, "AI_PROVIDER", "Fake")
+    assert isinstance(create_ai_provider(), FakeAIService)
+
+    gemini = create_ai_provider("gemini")
+    assert isinstance(gemini, GeminiService)
+    assert gemini._model is None  # the SDK is configured on the first call, not here
+
+    with pytest.raises(ValueError):
+        create_ai_provider("openai")
+
+
+def test_same_prompt_same_answer():
+    first = asyncio.run(_fake(seed=1).analyze_daily_meals(*MEALS))
+    again = asyncio.run(_fake(seed=2).analyze_daily_meals(*MEALS))
+    other = asyncio.run(_fake().analyze_daily_meals("yulaf", "salata", "balık"))
+
+    assert first == again
+    assert first["analysis"] != other["analysis"]
+
+
+def test_fake_answers_parse_like_model_answers():
+    daily = asyncio.run(_fake().analyze_daily_meals(*MEALS))
+
+    assert daily["source"] == "ai"
+    assert 4 <= daily["health_score"] <= 9
+    assert 1400 <= daily["calories"] < 2800
+    assert all(daily[key] for key in ("protein", "carbs", "fat"))
+
+    food = asyncio.run(_fake().analyze_food("ev yapımı erik reçeli"))
+    assert food["source"] == "ai" and 4 <= food["health_score"] <= 9
+
+
+@pytest.mark.parametrize("distribution, low, high", [
+    ("constant", 200, 200),
+    ("uniform", 150, 250),
+])
+def test_latency_stays_in_its_range(distribution, low, high):
+    provider = _fake(latency_ms=200, latency_spread_ms=50, distribution=distribution)
+
+    samples = [provider._sample_latency() * 1000 for _ in range(500)]
+
+    assert low <= min(samples) and max(samples) <= high
+
+
+@pytest.mark.parametrize("distribution", ["normal", "lognormal"])
+def test_latency_has_the_configured_mean_and_spread(distribution):
+    provider = _fake(latency_ms=1500, latency_spread_ms=500, distribution=distribution)
+
+    samples = [provider._sample_latency() * 1000 for _ in range(5000)]
+
+    assert statistics.mean(samples) == pytest.approx(1500, rel=0.05)
+    assert statistics.stdev(samples) == pytest.approx(500, rel=0.1)
+    assert min(samples) >= 0
+
+
+def test_latency_is_reproducible_per_seed():
+    draws = [[_fake(latency_ms=100, latency_spread_ms=30, seed=seed)._sample_latency() for _ in range(5)]
+             for seed in (7, 7, 8)]
+
+    assert draws[0] == draws[1] != draws[2]
+
+
+def test_unknown_distribution_is_rejected():
+    with pytest.raises(ValueError):
+        _fake(distribution="pareto")
+
+
+def test_failure_rate_fails_calls_and_counts_them():
+    provider = _fake(failure_rate=1.0)
+
+    with pytest.raises(AIProviderError):
+        asyncio.run(provider.generate_weekly_insights([], {}, {}))
+    assert provider.circuit_breaker._failures == 1
+
+
+def test_slow_fake_hits_the_call_timeout(monkeypatch):
+    monkeypatch.setattr(settings, "AI_CALL_TIMEOUT", 0.02)
+    provider = _fake(latency_ms=2000)
+
+    with pytest.raises(AIProviderError, match="timed out"):
+        asyncio.run(provider.generate_weekly_insights([], {}, {}))
+    assert provider.in_flight == 0
+
+
+def test_drain_waits_for_calls_in_flight():
+    provider = _fake(latency_ms=50)
+
+    async def scenario():
+        call = asyncio.create_task(provider.generate_weekly_insights([], {}, {}))
+        await asyncio.sleep(0)
+        timed_out = await provider.drain(0)
+        drained = await provider.drain(5)
+        await call
+        return timed_out, drained
+
+    assert asyncio.run(scenario()) == (1, 0)
@@ -0,0 +1,108 @@
+"""
+Compressed, content-addressed analysis texts
+"""
+
+import hashlib
+import zlib
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import inspect, text
+
+from app.database import engine, session_scope
+from app.models.analysis_text import AnalysisText, decode_text, encode_text, store_texts
+from app.models.food_analysis import FoodAnalysis
+from app.services.analysis_texts import ORPHAN_GRACE, migrate_legacy_texts, prune_orphaned_texts
+
+from conftest import add_meal
+
+
+def test_encode_decode_round_trip():
+    content = "Sağlık puanı: 7/10. Mercimek çorbası lif açısından zengindir. " * 20
+    digest, body = encode_text(content)
+
+    assert digest == hashlib.sha256(content.encode("utf-8")).hexdigest()
+    assert len(body) < len(content.encode("utf-8"))
+    assert zlib.decompress(body).decode("utf-8") == content
+    assert decode_text(body) == content
+
+
+def test_analysis_text_is_stored_once_and_loaded_lazily(user_id):
+    content = f"Aynı metin {user_id}"
+    meal_id = add_meal(user_id, date(2024, 5, 1), analyses=[{"analysis_result": content}] * 2)
+
+    digest = encode_text(content)[0]
+    with session_scope() as db:
+        assert db.query(AnalysisText).filter(AnalysisText.digest == digest).count() == 1
+        analyses = db.query(FoodAnalysis).filter(FoodAnalysis.meal_id == meal_id).all()
+        assert [analysis.text_digest for analysis in analyses] == [digest, digest]
+        assert analyses[0].analysis_result == content
+
+
+def test_clearing_the_text_clears_the_digest(user_id):
+    meal_id = add_meal(user_id, date(2024, 5, 2), analyses=[{"analysis_result": "geçici"}])
+
+    with session_scope() as db:
+        analysis = db.query(FoodAnalysis).filter(FoodAnalysis.meal_id == meal_id).one()
+        analysis.analysis_result = None
+        db.commit()
+        db.refresh(analysis)
+        assert analysis.text_digest is None and analysis.analysis_result is None
+
+
+def test_store_texts_touches_existing_rows():
+    digest, body = encode_text("tekrar kullanılan metin")
+    old = datetime.utcnow() - timedelta(days=30)
+    with engine.begin() as conn:
+        store_texts(conn, [(digest, body)])
+        conn.execute(text("UPDATE analysis_texts SET touched_at = :old WHERE digest = :digest"),
+                     {"old": old, "digest": digest})
+        store_texts(conn, [(digest, body), (digest, body)])
+
+    with session_scope() as db:
+        assert db.get(AnalysisText, digest).touched_at > old
+
+
+def test_prune_keeps_referenced_and_recent_texts(user_id):
+    referenced = f"kullanılıyor {user_id}"
+    add_meal(user_id, date(2024, 5, 3), analyses=[{"analysis_result": referenced}])
+    orphan, recent_orphan = encode_text(f"sahipsiz {user_id}"), encode_text(f"yeni {user_id}")
+    with engine.begin() as conn:
+        store_texts(conn, [orphan, recent_orphan])
+        conn.execute(text("UPDATE analysis_texts SET touched_at = :old WHERE digest IN (:a, :b)"), {
+            "old": datetime.utcnow() - ORPHAN_GRACE - timedelta(hours=1),
+            "a": orphan[0],
+            "b": encode_text(referenced)[0],
+        })
+        assert prune_orphaned_texts(conn) >= 1
+
+    with session_scope() as db:
+        assert db.get(AnalysisText, orphan[0]) is None
+        assert db.get(AnalysisText, recent_orphan[0]) is not None
+        assert db.get(AnalysisText, encode_text(referenced)[0]) is not None
+
+
+@pytest.fixture
+def legacy_column():
+    """The inline text column of the previous release"""
+    if "analysis_result" not in {column["name"] for column in inspect(engine).get_columns("food_analyses")}:
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE food_analyses ADD COLUMN analysis_result TEXT"))
+
+
+def test_migrate_legacy_texts_in_batches(user_id, legacy_column):
+    meal_id = add_meal(user_id, date(2024, 5, 4), analyses=[{"health_score": 5}] * 3)
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE food_analyses SET analysis_result = 'eski metin ' || id WHERE meal_id = :meal_id"),
+                     {"meal_id": meal_id})
+
+    with engine.connect() as conn:
+        assert migrate_legacy_texts(conn, batch_size=2) == 3
+        assert migrate_legacy_texts(conn) == 0
+
+    with session_scope() as db:
+        for analysis in db.query(FoodAnalysis).filter(FoodAnalysis.meal_id == meal_id):
+            assert analysis.analysis_result == f"eski metin {analysis.id}"
+        assert db.execute(text(
+            "SELECT COUNT(*) FROM food_analyses WHERE meal_id = :meal_id AND analysis_result IS NOT NULL"
+        ), {"meal_id": meal_id}).scalar() == 0
@@ -0,0 +1,65 @@
+"""
+Calendar heatmap arrays and ranges
+"""
+
+from datetime import date
+
+from app.services.calendar_service import CalendarService
+
+from conftest import add_meal
+
+
+def test_month_and_year_ranges():
+    assert CalendarService.month_range(2024, 2) == (date(2024, 2, 1), date(2024, 2, 29))
+    assert CalendarService.month_range(2023, 2) == (date(2023, 2, 1), date(2023, 2, 28))
+    assert CalendarService.month_range(2024, 12) == (date(2024, 12, 1), date(2024, 12, 31))
+    assert CalendarService.year_range(2024) == (date(2024, 1, 1), date(2024, 12, 31))
+
+
+def test_arrays_have_one_entry_per_day(user_id):
+    calendar = CalendarService.build_calendar(user_id, *CalendarService.year_range(2024), 2000)
+
+    for values in (calendar.health_score, calendar.calories, calendar.adherence, calendar.logged):
+        assert len(values) == 366
+    assert calendar.logged_days == 0
+    assert not any(calendar.logged)
+
+
+def test_days_are_placed_at_their_offsets(user_id):
+    add_meal(user_id, date(2024, 3, 1), analyses=[{"health_score": 7.25, "calories": 1500.4}])
+    add_meal(user_id, date(2024, 3, 31), analyses=[
+        {"health_score": 6, "calories": 1000},
+        {"health_score": 9, "calories": 1500},
+    ])
+    add_meal(user_id, date(2024, 3, 15))  # logged, not analyzed
+    add_meal(user_id, date(2024, 4, 1), analyses=[{"health_score": 1, "calories": 1}])  # next month
+
+    calendar = CalendarService.build_calendar(user_id, *CalendarService.month_range(2024, 3), 2000)
+
+    assert (calendar.start, calendar.end, calendar.logged_days) == (date(2024, 3, 1), date(2024, 3, 31), 3)
+    assert calendar.health_score[0] == 7.2
+    assert calendar.calories[0] == 1500
+    assert calendar.adherence[0] == 75
+    assert calendar.health_score[30] == 7.5
+    assert calendar.calories[30] == 2500
+    assert calendar.adherence[30] == 125
+    assert calendar.logged[14] and calendar.health_score[14] is None and calendar.calories[14] is None
+    assert calendar.logged.count(True) == 3
+
+
+def test_adherence_needs_a_target(user_id):
+    add_meal(user_id, date(2024, 3, 1), analyses=[{"health_score": 7, "calories": 1500}])
+
+    calendar = CalendarService.build_calendar(user_id, *CalendarService.month_range(2024, 3), None)
+
+    assert calendar.calories[0] == 1500
+    assert calendar.adherence == [None] * 31
+
+
+def test_calendar_endpoints(client, auth_headers):
+    month = client.get("/api/reports/calendar/2024/2", headers=auth_headers)
+    assert month.status_code == 200
+    assert len(month.json()["logged"]) == 29
+
+    assert client.get("/api/reports/calendar/2024/13", headers=auth_headers).status_code == 422
+    assert len(client.get("/api/reports/calendar/2023", headers=auth_headers).json()["logged"]) == 365
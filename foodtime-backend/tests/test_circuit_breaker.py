@@ -0,0 +1,199 @@
+"""
+Circuit breaker state transitions and AIProvider._call bookkeeping
+"""
+
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.services.ai_provider import AIProvider, AIProviderError
+from app.services.circuit_breaker import CircuitBreaker
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time.monotonic for the breaker module"""
+    now = [1000.0]
+    monkeypatch.setattr("app.services.circuit_breaker.time.monotonic", lambda: now[0])
+    return now
+
+
+def test_opens_after_threshold_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.retry_after() == 30
+
+
+def test_success_resets_failure_count(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_lets_one_trial_through(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock[0] += 29
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock[0] += 1
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.retry_after() == 0
+    assert breaker.allow()
+    assert not breaker.allow()
+
+
+def test_half_open_trial_success_closes(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock[0] += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_half_open_trial_failure_reopens(clock):
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=30)
+    for _ in range(5):
+        breaker.record_failure()
+    clock[0] += 30
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.retry_after() == 30
+
+
+def test_released_trial_can_be_retaken(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock[0] += 30
+    assert breaker.allow()
+    breaker.release_trial()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+
+
+class ScriptedProvider(AIProvider):
+    """Provider whose calls sleep for ``delay`` seconds, then answer or fail"""
+
+    name = "scripted"
+
+    def __init__(self, delay: float = 0.0, error: Exception = None):
+        super().__init__()
+        self.delay = delay
+        self.error = error
+
+    async def _generate(self, method, prompt, image_parts=None):
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return "Sağlık puanı: 7/10"
+
+
+def _open_then_half_open(provider: AIProvider):
+    breaker = provider.circuit_breaker
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    breaker._opened_at -= breaker.reset_timeout
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+
+def test_call_timeout_counts_as_failure(monkeypatch):
+    monkeypatch.setattr(settings, "AI_CALL_TIMEOUT", 0.01)
+    provider = ScriptedProvider(delay=1)
+
+    with pytest.raises(AIProviderError):
+        asyncio.run(provider._call("analyze_food", "prompt"))
+    assert provider.circuit_breaker._failures == 1
+    assert provider.in_flight == 0
+
+
+@pytest.mark.parametrize("error", [AIProviderError("down"), ConnectionResetError("reset")])
+def test_outages_count_as_failures(error):
+    provider = ScriptedProvider(error=error)
+
+    with pytest.raises(type(error)):
+        asyncio.run(provider._call("analyze_food", "prompt"))
+    assert provider.circuit_breaker._failures == 1
+
+
+@pytest.mark.parametrize("error", [ValueError("response.text: no candidates"), RuntimeError("bad request")])
+def test_client_errors_leave_the_breaker_alone(error):
+    provider = ScriptedProvider(error=error)
+    breaker = provider.circuit_breaker
+
+    for _ in range(breaker.failure_threshold):
+        with pytest.raises(type(error)):
+            asyncio.run(provider._call("analyze_food", "prompt"))
+    assert breaker._failures == 0
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_client_error_in_half_open_trial_releases_it():
+    provider = ScriptedProvider(error=ValueError("blocked"))
+    _open_then_half_open(provider)
+
+    with pytest.raises(ValueError):
+        asyncio.run(provider._call("analyze_food", "prompt"))
+    assert provider.circuit_breaker.state == CircuitBreaker.HALF_OPEN
+    assert provider.circuit_breaker.allow()
+
+
+def test_gemini_counts_only_server_errors():
+    from google.api_core import exceptions
+
+    from app.services.gemini_service import GeminiService
+
+    provider = GeminiService()
+    assert provider._is_outage(exceptions.ServiceUnavailable("unavailable"))
+    assert provider._is_outage(exceptions.InternalServerError("internal"))
+    assert provider._is_outage(exceptions.DeadlineExceeded("deadline"))
+    assert not provider._is_outage(exceptions.InvalidArgument("bad request"))
+    assert not provider._is_outage(exceptions.PermissionDenied("bad key"))
+    assert not provider._is_outage(ValueError("blocked by safety filters"))
+
+
+def test_call_rejected_while_open():
+    provider = ScriptedProvider()
+    breaker = provider.circuit_breaker
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+
+    with pytest.raises(AIProviderError):
+        asyncio.run(provider._call("analyze_food", "prompt"))
+
+
+def test_half_open_trial_success_closes_circuit():
+    provider = ScriptedProvider()
+    _open_then_half_open(provider)
+
+    assert asyncio.run(provider._call("analyze_food", "prompt")) == "Sağlık puanı: 7/10"
+    assert provider.circuit_breaker.state == CircuitBreaker.CLOSED
+
+
+def test_cancelled_half_open_trial_is_released():
+    provider = ScriptedProvider(delay=10)
+    _open_then_half_open(provider)
+
+    async def cancel_trial():
+        task = asyncio.create_task(provider._call("analyze_food", "prompt"))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_trial())
+    assert provider.in_flight == 0
+    assert provider.circuit_breaker.state == CircuitBreaker.HALF_OPEN
+    assert provider.circuit_breaker.allow()
@@ -0,0 +1,68 @@
+"""
+Content negotiation and headers of the compression middleware
+"""
+
+import pytest
+
+from app.config import settings
+from app.middleware import compression
+from app.middleware.compression import _add_vary, choose_encoding
+
+
+@pytest.fixture
+def with_brotli(monkeypatch):
+    """Pretend the optional brotli module is installed"""
+    monkeypatch.setattr(compression, "brotli", object())
+
+
+@pytest.fixture
+def without_brotli(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("", None),
+    ("identity", None),
+    ("gzip", "gzip"),
+    ("GZIP", "gzip"),
+    ("gzip, deflate, br", "br"),
+    ("br;q=0.5, gzip", "gzip"),
+    ("br;q=0, gzip;q=0", None),
+    ("*", "br"),
+    ("*;q=0.1, gzip;q=0.5", "gzip"),
+    ("gzip;q=0, *", "br"),
+    ("br;q=oops, gzip;q=0.2", "gzip"),
+])
+def test_choose_encoding_with_brotli(with_brotli, header, expected):
+    assert choose_encoding(header) == expected
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("br", None),
+    ("gzip, br", "gzip"),
+    ("*", "gzip"),
+])
+def test_choose_encoding_without_brotli(without_brotli, header, expected):
+    assert choose_encoding(header) == expected
+
+
+def test_add_vary():
+    assert _add_vary([]) == [(b"vary", b"Accept-Encoding")]
+    assert _add_vary([(b"vary", b"Origin")]) == [(b"vary", b"Origin, Accept-Encoding")]
+    assert _add_vary([(b"vary", b"accept-encoding")]) == [(b"vary", b"accept-encoding")]
+    assert _add_vary([(b"vary", b"*")]) == [(b"vary", b"*")]
+
+
+def test_small_responses_still_vary(client, auth_headers):
+    response = client.get("/api/users/me", headers={**auth_headers, "Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in response.headers
+    assert "accept-encoding" in response.headers["vary"].lower()
+
+
+def test_large_responses_are_compressed(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(settings, "COMPRESSION_MIN_SIZE", 0)
+    response = client.get("/api/users/me", headers={**auth_headers, "Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json()["name"] == "Test User"
@@ -0,0 +1,82 @@
+"""
+ETags and conditional GETs of versioned views
+"""
+
+from datetime import date
+from types import SimpleNamespace
+
+from starlette.requests import Request
+
+from app.config import settings
+from app.database import session_scope
+from app.routers.conditional import compute_etag, etag_matches
+from app.schemas.meal import MealCreate
+from app.services.meal_service import MealService
+
+STATS = "/api/dashboard/stats"
+
+
+def _request(path: str, query: bytes = b"") -> Request:
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": query, "headers": []})
+
+
+def test_etag_is_strong_and_stable():
+    user = SimpleNamespace(id=1, data_version=3)
+    etag = compute_etag(user, _request("/api/x", b"a=1&b=2"))
+
+    assert etag.startswith('"') and etag.endswith('"') and not etag.startswith("W/")
+    assert compute_etag(user, _request("/api/x", b"b=2&a=1")) == etag
+
+
+def test_etag_changes_with_version_user_route_and_query():
+    user = SimpleNamespace(id=1, data_version=3)
+    etag = compute_etag(user, _request("/api/x", b"a=1"))
+
+    assert compute_etag(SimpleNamespace(id=1, data_version=4), _request("/api/x", b"a=1")) != etag
+    assert compute_etag(SimpleNamespace(id=2, data_version=3), _request("/api/x", b"a=1")) != etag
+    assert compute_etag(user, _request("/api/y", b"a=1")) != etag
+    assert compute_etag(user, _request("/api/x", b"a=2")) != etag
+
+
+def test_etag_matches_plain_weak_encoded_and_lists():
+    etag = '"abc"'
+
+    assert etag_matches(None, etag) is None
+    assert etag_matches('"other"', etag) is None
+    assert etag_matches('"abc"', etag) == '"abc"'
+    assert etag_matches('W/"abc"', etag) == '"abc"'
+    assert etag_matches('"abc-gzip"', etag) == '"abc-gzip"'
+    assert etag_matches('"x", W/"abc-br"', etag) == '"abc-br"'
+    assert etag_matches("*", etag) == '"abc"'
+    assert etag_matches('"abc-deflate"', etag) is None
+
+
+def test_not_modified_until_data_changes(client, user_id, auth_headers):
+    first = client.get(STATS, headers=auth_headers)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    cached = client.get(STATS, headers={**auth_headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
+    assert cached.content == b""
+
+    with session_scope() as db:
+        MealService.create_meal(db, MealCreate(user_id=user_id, meal_date=date.today(), morning_meal="simit"))
+
+    changed = client.get(STATS, headers={**auth_headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+
+def test_compressed_validator_round_trips(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(settings, "COMPRESSION_MIN_SIZE", 0)
+    first = client.get(STATS, headers={**auth_headers, "Accept-Encoding": "gzip"})
+    etag = first.headers["etag"]
+    assert first.headers["content-encoding"] == "gzip"
+    assert etag.endswith('-gzip"') and not etag.startswith("W/")
+    assert "accept-encoding" in first.headers["vary"].lower()
+
+    cached = client.get(STATS, headers={**auth_headers, "Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
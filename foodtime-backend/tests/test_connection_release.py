@@ -0,0 +1,48 @@
+"""
+No pooled database connection is held while waiting on the AI provider
+"""
+
+from datetime import date
+
+import pytest
+
+from app.database import engine
+from app.services.ai_provider import ai_service
+
+from conftest import add_meal
+
+MEALS = {"morning_meal": "menemen", "afternoon_meal": "mercimek çorbası", "evening_meal": "ızgara tavuk"}
+
+
+@pytest.fixture
+def checked_out_during_ai(monkeypatch) -> list:
+    """Pool connections checked out at each AI call, relative to before the request"""
+    seen = []
+    baseline = engine.pool.checkedout()
+
+    def watch(method):
+        async def call(*args, **kwargs):
+            seen.append(engine.pool.checkedout() - baseline)
+            return await method(*args, **kwargs)
+        return call
+
+    for name in ("analyze_daily_meals", "generate_weekly_insights"):
+        monkeypatch.setattr(ai_service, name, watch(getattr(ai_service, name)))
+    return seen
+
+
+def test_daily_analysis_holds_no_connection_during_the_ai_call(client, auth_headers, checked_out_during_ai):
+    response = client.post("/api/analysis/daily", headers=auth_headers, json=MEALS)
+
+    assert response.status_code == 200
+    assert checked_out_during_ai == [0]
+
+
+def test_weekly_report_holds_no_connection_during_the_ai_call(client, user_id, auth_headers,
+                                                               checked_out_during_ai):
+    add_meal(user_id, date.today(), analyses=[{"health_score": 7, "calories": 1900}], morning_meal="simit")
+
+    response = client.get("/api/reports/weekly", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert checked_out_during_ai == [0]
@@ -0,0 +1,137 @@
+"""
+Server-sent event stream: authentication, per-user limit and publishing
+"""
+
+import asyncio
+from datetime import date
+
+import pytest
+
+from app.config import settings
+from app.database import session_scope
+from app.schemas.meal import MealCreate
+from app.services.event_bus import event_bus
+from app.services.meal_service import MealService
+from app.services.user_service import UserService
+from app.utils.auth_utils import create_access_token
+
+STREAM = "/api/events/stream"
+MEALS = {"morning_meal": "menemen", "afternoon_meal": "mercimek çorbası", "evening_meal": "ızgara tavuk"}
+
+
+@pytest.fixture
+def short_streams(monkeypatch):
+    """Streams that heartbeat quickly and end on their own"""
+    monkeypatch.setattr(settings, "SSE_HEARTBEAT_SECONDS", 0.05)
+    monkeypatch.setattr(settings, "SSE_MAX_STREAM_SECONDS", 0.2)
+
+
+def _subscribe(user_id: int, limit: int = None):
+    """Open a subscription outside a request (it outlives the loop it was made on)"""
+    async def subscribe():
+        return event_bus.subscribe(user_id, limit=limit)
+
+    return asyncio.run(subscribe())
+
+
+def test_stream_needs_a_valid_token(client):
+    assert client.get(STREAM).status_code == 401
+    assert client.get(STREAM, params={"token": "not-a-jwt"}).status_code == 401
+
+
+def test_stream_starts_with_ready_and_keeps_alive(client, user_id, auth_headers, short_streams):
+    response = client.get(STREAM, headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.headers["cache-control"] == "no-cache"
+    assert response.text.startswith("retry: 5000\n\n")
+    assert 'event: ready\ndata: {"data_version":0}\n\n' in response.text
+    assert ": keep-alive\n\n" in response.text
+    assert event_bus.subscriber_count(user_id) == 0
+
+
+def test_stream_accepts_the_token_as_query_parameter(client, user_id, short_streams):
+    response = client.get(STREAM, params={"token": create_access_token(user_id)})
+
+    assert response.status_code == 200
+    assert "event: ready" in response.text
+
+
+def test_streams_per_user_are_limited(client, user_id, auth_headers, short_streams, monkeypatch):
+    monkeypatch.setattr(settings, "SSE_MAX_STREAMS_PER_USER", 2)
+    held = [_subscribe(user_id), _subscribe(user_id)]
+    try:
+        refused = client.get(STREAM, headers=auth_headers)
+        assert refused.status_code == 429
+        assert event_bus.subscriber_count(user_id) == 2
+
+        event_bus.unsubscribe(held.pop())
+        assert client.get(STREAM, headers=auth_headers).status_code == 200
+    finally:
+        for subscription in held:
+            event_bus.unsubscribe(subscription)
+    assert event_bus.subscriber_count(user_id) == 0
+
+
+def test_subscribe_limit_is_exact(user_id):
+    subscriptions = [_subscribe(user_id, limit=3) for _ in range(4)]
+
+    assert subscriptions[3] is None
+    for subscription in subscriptions[:3]:
+        event_bus.unsubscribe(subscription)
+
+
+def test_stream_sends_sync_for_changes_it_was_not_told_about(client, user_id, auth_headers, short_streams,
+                                                              monkeypatch):
+    monkeypatch.setattr(settings, "SSE_MAX_STREAM_SECONDS", 0.5)
+
+    async def scenario():
+        stream = asyncio.create_task(asyncio.to_thread(client.get, STREAM, headers=auth_headers))
+        while not event_bus.subscriber_count(user_id):
+            await asyncio.sleep(0.01)
+        # Another worker's change: the data version moves without an event here
+        with session_scope() as db:
+            version = UserService.bump_data_version(db, user_id)
+            db.commit()
+        return await stream, version
+
+    response, version = asyncio.run(scenario())
+    assert f'event: sync\ndata: {{"data_version":{version}}}' in response.text
+
+
+def test_daily_analysis_is_published_after_it_is_saved(client, user_id, auth_headers):
+    async def scenario():
+        subscription = event_bus.subscribe(user_id)
+        try:
+            response = await asyncio.to_thread(client.post, "/api/analysis/daily", headers=auth_headers, json=MEALS)
+            return response, await subscription.next_event(1)
+        finally:
+            event_bus.unsubscribe(subscription)
+
+    response, event = asyncio.run(scenario())
+
+    assert response.status_code == 200
+    assert event.type == "analysis.completed"
+    assert event.data["meal_created"] is True
+    assert event.data["data_version"] == 1
+    with session_scope() as db:
+        meal = MealService.get_meal_by_date(db, user_id, date.today())
+        assert event.data["meal_id"] == meal.id
+
+
+def test_meal_changes_are_published(user_id):
+    async def scenario():
+        subscription = event_bus.subscribe(user_id)
+        try:
+            with session_scope() as db:
+                meal = MealService.create_meal(db, MealCreate(user_id=user_id, meal_date=date(2024, 2, 1),
+                                                              morning_meal="simit"))
+            return meal.id, await subscription.next_event(1)
+        finally:
+            event_bus.unsubscribe(subscription)
+
+    meal_id, event = asyncio.run(scenario())
+
+    assert event.type == "meal.created"
+    assert event.data["meal_id"] == meal_id
@@ -0,0 +1,71 @@
+"""
+Local food database: exact, fuzzy and rejected matches and quantities
+"""
+
+import pytest
+
+from app.config import settings
+from app.services.food_database import food_database, normalize, parse_portion
+
+
+def _lookup(description: str, threshold: float = None):
+    return food_database.lookup(description, threshold or settings.FOOD_DB_MATCH_THRESHOLD)
+
+
+def test_normalize_folds_turkish_text():
+    assert normalize("IZGARA Köfte!") == "izgara kofte"
+    assert normalize("İnek SÜTÜ") == "inek sutu"
+
+
+def test_names_and_aliases_match_exactly():
+    assert _lookup("Mercimek çorbası").name == "Mercimek çorbası"
+    assert _lookup("mercimek corbasi").similarity == 1.0
+    assert _lookup("yumurta").name == "Haşlanmış yumurta"
+
+
+def test_typos_match_only_under_the_fallback_threshold():
+    assert _lookup("elmma") is None
+
+    match = _lookup("elmma", settings.FOOD_DB_FALLBACK_THRESHOLD)
+    assert match.name == "Elma" and match.similarity < 1
+
+
+@pytest.mark.parametrize("description", ["muzlu süt", "diyet kola", "elma ve muz", "kola ve cips"])
+def test_extra_words_are_not_ignored(description):
+    assert _lookup(description, settings.FOOD_DB_FALLBACK_THRESHOLD) is None
+
+
+def test_grams_are_scaled():
+    match = _lookup("200 g somon")
+
+    assert (match.portion, match.grams, match.calories) == ("200 g", 200, 412)
+
+
+@pytest.mark.parametrize("description, portion, grams", [
+    ("3 yumurta", "3 adet", 150),
+    ("2 adet yumurta", "2 adet", 100),
+    ("iki tane yumurta", "2 adet", 100),
+    ("bir kase mercimek çorbası", "1 kase", 250),
+    ("iki mercimek çorbası", "2 kase", 500),
+    ("yarım dilim ekmek", "yarım dilim", 15),
+    ("yarım porsiyon karnıyarık", "yarım porsiyon", 125),
+    ("2 porsiyon mercimek çorbası", "2 x 1 kase", 500),
+    ("6 mercimek köftesi", "6 adet", 180),
+])
+def test_counts_use_the_portion_unit(description, portion, grams):
+    match = _lookup(description)
+
+    assert (match.portion, match.grams) == (portion, grams)
+
+
+@pytest.mark.parametrize("description", ["yarım ekmek", "2 ekmek", "4 köfte", "2 dilim süt"])
+def test_unconvertible_quantities_are_left_to_the_ai(description):
+    assert _lookup(description) is None
+
+
+def test_parse_portion():
+    assert parse_portion("3 adet") == (3, "adet", "adet")
+    assert parse_portion("1 orta boy") == (1, None, "orta boy")
+    assert parse_portion("yarım adet") == (0.5, "adet", "adet")
+    assert parse_portion("1 yemek kaşığı") == (1, "kasik", "yemek kaşığı")
+    assert parse_portion("portion") == (1, None, "portion")
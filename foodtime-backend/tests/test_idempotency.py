@@ -0,0 +1,171 @@
+"""
+Idempotency keys: claim, replay, mismatch and in-progress outcomes
+"""
+
+import asyncio
+import time
+import uuid
+
+import pytest
+from sqlalchemy import update
+
+from app.config import settings
+from app.database import session_scope
+from app.models.food_analysis import FoodAnalysis
+from app.models.idempotency_key import IdempotencyKey
+from app.services.idempotency import (
+    CLAIMED,
+    IN_PROGRESS,
+    MISMATCH,
+    REPLAY,
+    IdempotencyStore,
+    StoredResponse,
+    fingerprint,
+)
+
+DAILY = "/api/analysis/daily"
+MEALS = {"morning_meal": "menemen", "afternoon_meal": "mercimek çorbası", "evening_meal": "ızgara tavuk"}
+
+
+@pytest.fixture
+def store() -> IdempotencyStore:
+    return IdempotencyStore()
+
+
+@pytest.fixture
+def key() -> str:
+    return f"test:{uuid.uuid4().hex}"
+
+
+@pytest.fixture
+def short_waits(monkeypatch):
+    monkeypatch.setattr(settings, "IDEMPOTENCY_WAIT_SECONDS", 0.2)
+    monkeypatch.setattr(settings, "IDEMPOTENCY_POLL_SECONDS", 0.05)
+
+
+def test_fingerprint_identifies_bodies():
+    assert fingerprint(b"a") == fingerprint(b"a")
+    assert fingerprint(b"a") != fingerprint(b"b")
+
+
+def test_first_request_claims_then_replays(store, key):
+    async def scenario():
+        outcome, token = await store.acquire(key, "digest")
+        assert outcome == CLAIMED and token
+        await store.complete(key, token, 200, b'{"ok": true}')
+        return await store.acquire(key, "digest")
+
+    assert asyncio.run(scenario()) == (REPLAY, StoredResponse(200, b'{"ok": true}'))
+
+
+def test_other_body_is_a_mismatch(store, key):
+    async def scenario():
+        _, token = await store.acquire(key, "digest")
+        pending = await store.acquire(key, "other")
+        await store.complete(key, token, 200, b"{}")
+        return pending, await store.acquire(key, "other")
+
+    assert asyncio.run(scenario()) == ((MISMATCH, None), (MISMATCH, None))
+
+
+def test_duplicate_gives_up_while_first_is_running(store, key, short_waits):
+    async def scenario():
+        await store.acquire(key, "digest")
+        started = time.monotonic()
+        outcome = await store.acquire(key, "digest")
+        return outcome, time.monotonic() - started
+
+    outcome, waited = asyncio.run(scenario())
+    assert outcome == (IN_PROGRESS, None)
+    assert waited >= 0.2
+
+
+def test_waiting_duplicate_is_woken_with_the_response(store, key, monkeypatch):
+    monkeypatch.setattr(settings, "IDEMPOTENCY_POLL_SECONDS", 10)
+
+    async def scenario():
+        _, token = await store.acquire(key, "digest")
+        duplicate = asyncio.create_task(store.acquire(key, "digest"))
+        await asyncio.sleep(0.05)
+        started = time.monotonic()
+        await store.complete(key, token, 201, b"done")
+        return await duplicate, time.monotonic() - started
+
+    outcome, waited = asyncio.run(scenario())
+    assert outcome == (REPLAY, StoredResponse(201, b"done"))
+    assert waited < 1
+
+
+def test_released_key_can_be_claimed_again(store, key, short_waits):
+    async def scenario():
+        _, token = await store.acquire(key, "digest")
+        duplicate = asyncio.create_task(store.acquire(key, "digest"))
+        await asyncio.sleep(0.01)
+        await store.release(key, token)
+        return await duplicate
+
+    assert asyncio.run(scenario())[0] == CLAIMED
+
+
+def _expire(key: str):
+    with session_scope() as db:
+        db.execute(update(IdempotencyKey).where(IdempotencyKey.key == key).values(expires_at=time.time() - 1))
+        db.commit()
+
+
+def test_expired_claim_is_taken_over(store, key):
+    async def scenario():
+        _, first = await store.acquire(key, "digest")
+        _expire(key)
+        return first, await store.acquire(key, "other")
+
+    first, (outcome, second) = asyncio.run(scenario())
+    assert outcome == CLAIMED and second != first
+
+
+def test_late_owner_cannot_touch_the_new_claim(store, key, short_waits):
+    async def scenario():
+        _, late = await store.acquire(key, "digest")
+        _expire(key)
+        _, current = await store.acquire(key, "digest")
+
+        # The original request finishes (or fails) after losing its lock
+        await store.complete(key, late, 200, b"late")
+        await store.release(key, late)
+        pending = await store.acquire(key, "digest")
+
+        await store.complete(key, current, 200, b"current")
+        return pending, await store.acquire(key, "digest")
+
+    pending, replay = asyncio.run(scenario())
+    assert pending == (IN_PROGRESS, None)
+    assert replay == (REPLAY, StoredResponse(200, b"current"))
+
+
+def _analysis_count(user_id: int) -> int:
+    with session_scope() as db:
+        return db.query(FoodAnalysis).join(FoodAnalysis.meal).filter_by(user_id=user_id).count()
+
+
+def test_daily_analysis_is_replayed(client, user_id, auth_headers):
+    headers = {**auth_headers, "Idempotency-Key": uuid.uuid4().hex}
+
+    first = client.post(DAILY, headers=headers, json=MEALS)
+    second = client.post(DAILY, headers=headers, json=MEALS)
+
+    assert first.status_code == second.status_code == 200
+    assert second.headers.get("idempotent-replayed") == "true"
+    assert "idempotent-replayed" not in first.headers
+    assert second.content == first.content
+    assert _analysis_count(user_id) == 1
+
+
+def test_daily_analysis_key_errors(client, auth_headers):
+    headers = {**auth_headers, "Idempotency-Key": uuid.uuid4().hex}
+    assert client.post(DAILY, headers=headers, json=MEALS).status_code == 200
+
+    changed = client.post(DAILY, headers=headers, json={**MEALS, "evening_meal": "mantı"})
+    assert changed.status_code == 422
+
+    invalid = client.post(DAILY, headers={**auth_headers, "Idempotency-Key": "bad key!"}, json=MEALS)
+    assert invalid.status_code == 400
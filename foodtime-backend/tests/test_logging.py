@@ -0,0 +1,141 @@
+"""
+Structured logging: request ids, JSON records and the non-blocking queue
+"""
+
+import asyncio
+import json
+import logging
+import queue
+import sys
+
+import pytest
+
+from app.config import settings
+from app.utils import log_config
+from app.utils.log_config import (
+    DroppingQueueHandler,
+    JsonFormatter,
+    RequestIdFilter,
+    start_request_context
+)
+from app.utils.metrics import LOG_RECORDS_DROPPED
+
+MEALS = {"morning_meal": "menemen", "afternoon_meal": "mercimek çorbası", "evening_meal": "ızgara tavuk"}
+
+
+@pytest.fixture
+def fresh_logging(monkeypatch):
+    """Let configure_logging run again, then restore the app's logging set up at import"""
+    loggers = [logging.getLogger(name) for name in ("", "uvicorn", "uvicorn.error", "uvicorn.access")]
+    saved = [(logger, logger.handlers[:], logger.level, logger.propagate) for logger in loggers]
+    monkeypatch.setattr(log_config, "_listener", None)
+    monkeypatch.setattr(log_config.atexit, "register", lambda callback: None)
+    yield
+    if log_config._listener is not None:
+        log_config._listener.stop()
+    for logger, handlers, level, propagate in saved:
+        logger.handlers, logger.level, logger.propagate = handlers, level, propagate
+
+
+@pytest.fixture
+def request_logs(caplog):
+    """Request log records, stamped with their request id"""
+    caplog.set_level(logging.INFO, logger="app.middleware.query_stats")
+    caplog.handler.addFilter(RequestIdFilter())
+    return caplog
+
+
+def _record(message: str = "hello %s", args=("world",), **extra) -> logging.LogRecord:
+    return logging.makeLogRecord({"name": "app.test", "levelname": "INFO", "levelno": logging.INFO,
+                                  "msg": message, "args": args, **extra})
+
+
+def test_json_record_has_fields_and_extras():
+    entry = json.loads(JsonFormatter().format(_record(request_id="r1", ai_method="analyze_food", _private=1)))
+
+    assert entry["level"] == "INFO" and entry["logger"] == "app.test"
+    assert entry["message"] == "hello world"
+    assert entry["request_id"] == "r1"
+    assert entry["ai_method"] == "analyze_food"
+    assert "_private" not in entry and "args" not in entry
+    assert entry["ts"].endswith("+00:00")
+
+
+def test_queued_record_keeps_message_and_traceback():
+    handler = DroppingQueueHandler(queue.Queue())
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = _record(exc_info=sys.exc_info())
+
+    prepared = handler.prepare(record)
+
+    assert (prepared.msg, prepared.args, prepared.exc_info) == ("hello world", None, None)
+    assert "ValueError: boom" in json.loads(JsonFormatter().format(prepared))["exc_info"]
+
+
+def test_full_queue_drops_and_counts():
+    handler = DroppingQueueHandler(queue.Queue(1))
+    dropped = LOG_RECORDS_DROPPED.value()
+
+    handler.handle(_record())
+    handler.handle(_record())
+
+    assert handler.queue.qsize() == 1
+    assert LOG_RECORDS_DROPPED.value() == dropped + 1
+
+
+def test_request_id_follows_into_threads():
+    async def scenario():
+        start_request_context("req-1")
+        record = _record()
+        await asyncio.to_thread(RequestIdFilter().filter, record)
+        return record
+
+    assert asyncio.run(scenario()).request_id == "req-1"
+
+    outside = _record()
+    RequestIdFilter().filter(outside)
+    assert outside.request_id is None
+
+
+def test_request_id_header_is_reused_or_replaced(client):
+    reused = client.get("/health", headers={"X-Request-ID": "proxy-id.42"}).headers["x-request-id"]
+    assert reused == "proxy-id.42"
+
+    generated = client.get("/health", headers={"X-Request-ID": "not ok\\"}).headers["x-request-id"]
+    assert len(generated) == 32 and generated != "not ok\\"
+
+
+def test_request_log_has_timings_and_request_id(client, auth_headers, request_logs):
+    response = client.post("/api/analysis/daily", headers={**auth_headers, "X-Request-ID": "daily-1"}, json=MEALS)
+    assert response.status_code == 200
+
+    record, = [record for record in request_logs.records if getattr(record, "path", None) == "/api/analysis/daily"]
+    assert record.request_id == "daily-1"
+    assert (record.route, record.status) == ("/api/analysis/daily", 200)
+    assert record.db_queries > 0 and record.db_ms >= 0
+    assert record.ai_calls == 1 and record.ai_ms >= 0
+
+
+@pytest.mark.parametrize("log_format", ["json", "text"])
+def test_configured_logging_writes_through_the_queue(log_format, monkeypatch, capsys, fresh_logging):
+    monkeypatch.setattr(settings, "LOG_FORMAT", log_format)
+    monkeypatch.setattr(settings, "LOG_LEVEL", "info")
+    log_config.configure_logging()
+    log_config.configure_logging()  # no second set of handlers
+
+    async def scenario():
+        start_request_context("cfg-1")
+        logging.getLogger("app.test").info("configured %d", 1, extra={"provider": "fake"})
+
+    asyncio.run(scenario())
+    log_config._listener.stop()  # writes out what is queued
+    log_config._listener = None
+
+    line, = capsys.readouterr().out.splitlines()
+    if log_format == "json":
+        entry = json.loads(line)
+        assert (entry["message"], entry["request_id"], entry["provider"]) == ("configured 1", "cfg-1", "fake")
+    else:
+        assert line.endswith("INFO app.test [cfg-1] configured 1")
@@ -0,0 +1,79 @@
+"""
+Keyset pagination of meal history
+"""
+
+from datetime import date, timedelta
+
+import pytest
+
+from app.database import session_scope
+from app.services.meal_service import MealService
+
+from conftest import add_meal
+
+
+def test_cursor_round_trip():
+    cursor = MealService.encode_cursor(date(2024, 2, 29), 12345)
+    assert "=" not in cursor
+    assert MealService.decode_cursor(cursor) == (date(2024, 2, 29), 12345)
+
+
+@pytest.mark.parametrize("cursor", ["", "not base64!", "MjAyNC0wMi0yOQ", "eDp5", "MjAyNC0xMy0wMToxMg"])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        MealService.decode_cursor(cursor)
+
+
+def _pages(user_id: int, limit: int, **bounds):
+    """All pages of a user's history as lists of meal ids"""
+    pages, cursor = [], None
+    with session_scope() as db:
+        while True:
+            meals, cursor = MealService.get_meal_history_page(db, user_id, limit, cursor=cursor, **bounds)
+            pages.append([meal.id for meal in meals])
+            if cursor is None:
+                return pages
+
+
+def test_pages_cover_history_newest_first(user_id):
+    start = date(2024, 1, 1)
+    ids = [add_meal(user_id, start + timedelta(days=i)) for i in range(7)]
+
+    pages = _pages(user_id, 3)
+
+    assert pages == [ids[6:3:-1], ids[3:0:-1], ids[:1]]
+
+
+def test_exact_multiple_has_no_empty_last_page(user_id):
+    start = date(2024, 1, 1)
+    ids = [add_meal(user_id, start + timedelta(days=i)) for i in range(4)]
+
+    assert _pages(user_id, 2) == [ids[3:1:-1], ids[1::-1]]
+
+
+def test_same_day_meals_are_split_by_id(user_id):
+    day = date(2024, 1, 1)
+    ids = [add_meal(user_id, day) for _ in range(5)]
+
+    pages = _pages(user_id, 2)
+
+    assert [meal_id for page in pages for meal_id in page] == sorted(ids, reverse=True)
+    assert [len(page) for page in pages] == [2, 2, 1]
+
+
+def test_date_bounds_are_inclusive(user_id):
+    start = date(2024, 1, 1)
+    ids = [add_meal(user_id, start + timedelta(days=i)) for i in range(10)]
+
+    pages = _pages(user_id, 4, from_date=start + timedelta(days=2), to_date=start + timedelta(days=7))
+
+    assert [meal_id for page in pages for meal_id in page] == ids[7:1:-1]
+
+
+def test_pages_only_show_own_meals(user_id):
+    add_meal(user_id, date(2024, 1, 1))
+
+    with session_scope() as db:
+        meals, cursor = MealService.get_meal_history_page(db, user_id + 1000, 10)
+
+    assert meals == [] and cursor is None
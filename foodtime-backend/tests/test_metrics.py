@@ -0,0 +1,107 @@
+"""
+Metrics registry, text exposition and what the app records in it
+"""
+
+import asyncio
+
+from sqlalchemy import text
+
+from app.database import session_scope
+from app.services.fake_ai_service import FakeAIService
+from app.utils.metrics import (
+    AI_REQUESTS,
+    AI_TOKENS,
+    DB_POOL_CHECKOUT_DURATION,
+    Counter,
+    Histogram,
+    MetricsRegistry,
+    record_cache_lookup,
+    render_metrics
+)
+
+
+def _sample(name: str) -> float:
+    """Value of one sample line of the rendered registry"""
+    for line in render_metrics().splitlines():
+        if line.startswith(name + " "):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{name} not rendered")
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    latency = registry.register(Histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0)))
+    for value in (0.05, 0.5, 0.7, 3):
+        latency.observe(value, route="/a")
+
+    assert registry.render().splitlines() == [
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{route="/a",le="0.1"} 1',
+        'latency_seconds_bucket{route="/a",le="1"} 3',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 4',
+        'latency_seconds_sum{route="/a"} 4.25',
+        'latency_seconds_count{route="/a"} 4',
+    ]
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    errors = registry.register(Counter("errors_total", "Errors", ("message",)))
+    errors.inc(message='say "hi"\\\n')
+
+    assert 'errors_total{message="say \\"hi\\"\\\\\\n"} 1' in registry.render()
+
+
+def test_failing_collector_does_not_break_the_scrape():
+    registry = MetricsRegistry()
+    registry.register(Counter("ok_total", "Still rendered")).inc()
+    registry.add_collector(lambda: 1 / 0)
+
+    assert "ok_total 1" in registry.render()
+
+
+def test_requests_are_labelled_by_route_template(client, auth_headers):
+    label = 'foodtime_http_requests_total{method="GET",route="/api/meals/{meal_id}",status="404"}'
+    before = _sample(label) if label in render_metrics() else 0
+
+    assert client.get("/api/meals/987654", headers=auth_headers).status_code == 404
+    assert client.get("/api/meals/987655", headers=auth_headers).status_code == 404
+
+    response = client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert _sample(label) == before + 2
+    assert "/api/meals/987654" not in response.text
+    assert _sample("foodtime_http_requests_in_flight") == 0
+
+
+def test_ai_calls_are_counted_per_method():
+    labels = {"provider": "fake", "method": "analyze_food"}
+    calls = AI_REQUESTS.value(outcome="success", **labels)
+    tokens = AI_TOKENS.value(direction="completion", **labels)
+
+    asyncio.run(FakeAIService(latency_ms=0, latency_spread_ms=0).analyze_food("ev yapımı erik reçeli"))
+
+    assert AI_REQUESTS.value(outcome="success", **labels) == calls + 1
+    assert AI_TOKENS.value(direction="completion", **labels) > tokens
+    assert 'foodtime_ai_request_duration_seconds_count{provider="fake",method="analyze_food"}' in render_metrics()
+
+
+def test_cache_hit_ratio_is_derived_at_scrape_time():
+    for hit in (True, True, True, False):
+        record_cache_lookup("test_ratio", hit)
+
+    assert _sample('foodtime_cache_hit_ratio{cache="test_ratio"}') == 0.75
+
+
+def test_pool_occupancy_and_checkout_time_are_published():
+    checked_out = 'foodtime_db_pool_connections{state="checked_out"}'
+    before = _sample(checked_out)
+    checkouts = DB_POOL_CHECKOUT_DURATION._values.get((), [0] * 3)[-1]
+
+    with session_scope() as db:
+        db.execute(text("SELECT 1"))
+        assert _sample(checked_out) == before + 1
+
+    assert _sample(checked_out) == before
+    assert DB_POOL_CHECKOUT_DURATION._values[()][-1] > checkouts
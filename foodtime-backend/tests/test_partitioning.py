@@ -0,0 +1,117 @@
+"""
+Partitioning: server version gate and generated partition SQL
+"""
+
+import logging
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+from app.config import settings
+from app.services.partitioning import (
+    MEAL_FOREIGN_KEY,
+    add_months,
+    ensure_partitions,
+    partition_name,
+    partition_tables,
+    partitioning_enabled
+)
+
+
+class RecordingConnection:
+    """PostgreSQL connection stand-in recording SQL and answering catalog queries"""
+
+    dialect = SimpleNamespace(name="postgresql")
+
+    def __init__(self, answers: dict, existing=()):
+        # SQL fragment -> scalar result of statements containing it
+        self.answers = answers
+        self.existing = set(existing)
+        self.statements = []
+
+    def execute(self, statement, parameters=None):
+        sql = str(statement)
+        self.statements.append(sql)
+        if "to_regclass(:name)" in sql:
+            value = parameters["name"] in self.existing
+        else:
+            value = next((value for fragment, value in self.answers.items() if fragment in sql), None)
+        return SimpleNamespace(scalar=lambda: value, rowcount=0)
+
+    def ddl(self) -> list:
+        return [sql for sql in self.statements if sql.startswith(("CREATE", "ALTER"))]
+
+
+@pytest.fixture
+def enabled(monkeypatch):
+    monkeypatch.setattr(settings, "DB_PARTITIONING_ENABLED", True)
+    monkeypatch.setattr(settings, "PARTITION_MONTHS_AHEAD", 1)
+
+
+def test_month_arithmetic():
+    assert add_months(date(2024, 11, 1), 2) == date(2025, 1, 1)
+    assert add_months(date(2024, 1, 1), -1) == date(2023, 12, 1)
+    assert partition_name("meals", date(2024, 3, 1)) == "meals_p2024_03"
+
+
+def test_old_servers_are_not_partitioned(enabled, caplog):
+    caplog.set_level(logging.WARNING, logger="app.services.partitioning")
+
+    assert not partitioning_enabled(RecordingConnection({"server_version_num": "140011"}))
+    assert "PostgreSQL 140011 is older than 150000" in caplog.text
+    assert partitioning_enabled(RecordingConnection({"server_version_num": "150004"}))
+
+
+def test_other_databases_are_not_queried(enabled, monkeypatch):
+    sqlite = RecordingConnection({})
+    sqlite.dialect = SimpleNamespace(name="sqlite")
+    assert not partitioning_enabled(sqlite)
+    assert sqlite.statements == []
+
+    monkeypatch.setattr(settings, "DB_PARTITIONING_ENABLED", False)
+    conn = RecordingConnection({})
+    assert not partitioning_enabled(conn)
+    assert conn.statements == []
+
+
+def test_partitions_are_created_per_month(enabled):
+    conn = RecordingConnection({})
+
+    created = ensure_partitions(conn, today=date(2024, 12, 15))
+
+    assert created == ["meals_p2024_12", "meals_p2025_01", "food_analyses_p2024_12", "food_analyses_p2025_01"]
+    assert conn.ddl() == [
+        "CREATE TABLE meals_default PARTITION OF meals DEFAULT",
+        "CREATE TABLE meals_p2024_12 PARTITION OF meals FOR VALUES FROM ('2024-12-01') TO ('2025-01-01')",
+        "CREATE TABLE meals_p2025_01 PARTITION OF meals FOR VALUES FROM ('2025-01-01') TO ('2025-02-01')",
+        "CREATE TABLE food_analyses_default PARTITION OF food_analyses DEFAULT",
+        "CREATE TABLE food_analyses_p2024_12 PARTITION OF food_analyses"
+        " FOR VALUES FROM ('2024-12-01') TO ('2025-01-01')",
+        "CREATE TABLE food_analyses_p2025_01 PARTITION OF food_analyses"
+        " FOR VALUES FROM ('2025-01-01') TO ('2025-02-01')",
+    ]
+
+
+def test_month_with_rows_in_the_default_partition_is_skipped(enabled):
+    conn = RecordingConnection({"_default WHERE": True}, existing={"meals_default", "food_analyses_default",
+                                                                  "meals_p2025_01", "food_analyses_p2025_01"})
+
+    assert ensure_partitions(conn, today=date(2024, 12, 15)) == []
+    assert conn.ddl() == []
+    assert "SELECT EXISTS (SELECT 1 FROM meals_default WHERE meal_date >= :start AND meal_date < :end)" \
+        in conn.statements
+
+
+def test_foreign_key_follows_meal_date_changes(enabled):
+    this_month = date.today().replace(day=1)
+    conn = RecordingConnection({"pg_partitioned_table": True, "pg_constraint": False},
+                               existing={f"{table}_default" for table in ("meals", "food_analyses")} | {
+                                   partition_name(table, add_months(this_month, offset))
+                                   for table in ("meals", "food_analyses") for offset in (0, 1)})
+
+    assert not partition_tables(conn)
+    assert conn.ddl() == [
+        f"ALTER TABLE food_analyses ADD CONSTRAINT {MEAL_FOREIGN_KEY} FOREIGN KEY (meal_id, meal_date)"
+        " REFERENCES meals (id, meal_date) ON UPDATE CASCADE"
+    ]
@@ -0,0 +1,95 @@
+"""
+Per-request profiling and the debug routes serving the profiles
+"""
+
+import pytest
+
+from app.config import settings
+from app.middleware.profiling import _safe_query_string
+from app.services.profiler import profile_store
+
+TOKEN = "profiling-token"
+PROFILES = "/api/debug/profiles"
+
+
+@pytest.fixture
+def profiling(monkeypatch, tmp_path):
+    """Profiling on, with a token and a throwaway profile directory"""
+    monkeypatch.setattr(settings, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(settings, "PROFILING_TOKEN", TOKEN)
+    monkeypatch.setattr(settings, "PROFILING_INTERVAL_MS", 1.0)
+    monkeypatch.setattr(settings, "PROFILING_DIR", str(tmp_path))
+    return {"X-Debug-Profile": TOKEN}
+
+
+def _profiled_history(client, auth_headers, debug_headers, query: str = "days=3"):
+    response = client.get(f"/api/meals/history?{query}", headers={**auth_headers, **debug_headers})
+    assert response.status_code == 200
+    return response.headers.get("x-profile-id")
+
+
+def test_debug_routes_are_hidden_while_profiling_is_off(client):
+    assert client.get(PROFILES, headers={"X-Debug-Profile": TOKEN}).status_code == 404
+
+
+@pytest.mark.parametrize("headers", [
+    {},
+    {"X-Debug-Profile": "wrong"},
+    {"X-Debug-Profile": "prófiling".encode("latin-1")},  # non-ASCII must not crash the comparison
+])
+def test_debug_routes_need_the_token(client, profiling, headers):
+    assert client.get(PROFILES, headers=headers).status_code == 403
+
+
+def test_only_requests_with_the_token_are_profiled(client, auth_headers, profiling):
+    assert _profiled_history(client, auth_headers, {}) is None
+    assert _profiled_history(client, auth_headers, {"X-Debug-Profile": "wrong"}) is None
+    assert client.get(PROFILES, headers=profiling).json() == {"profiles": []}
+
+
+def test_profile_holds_the_request_and_its_queries(client, auth_headers, profiling):
+    profile_id = _profiled_history(client, auth_headers, profiling, query="days=3&token=jwt-secret")
+    assert profile_id
+
+    summary, = client.get(PROFILES, headers=profiling).json()["profiles"]
+    assert summary["id"] == profile_id
+    assert (summary["method"], summary["path"], summary["status"]) == ("GET", "/api/meals/history", 200)
+    assert summary["query_string"] == "days=3"
+    assert summary["query_count"] > 0 and "stacks" not in summary
+
+    profile = client.get(f"{PROFILES}/{profile_id}", headers=profiling).json()
+    assert any("FROM meals" in query["statement"] for query in profile["queries"])
+    assert "jwt-secret" not in str(profile)
+
+    collapsed = client.get(f"{PROFILES}/{profile_id}/collapsed", headers=profiling)
+    assert collapsed.text == "".join(f"{entry['stack']} {entry['count']}\n" for entry in profile["stacks"])
+
+
+def test_unknown_or_malformed_profile_ids_are_not_found(client, profiling):
+    assert client.get(f"{PROFILES}/{'0' * 32}", headers=profiling).status_code == 404
+    assert client.get(f"{PROFILES}/..%2F..%2Fapp", headers=profiling).status_code == 404
+
+
+def test_old_profiles_are_pruned(client, auth_headers, profiling, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILING_MAX_FILES", 2)
+    ids = [_profiled_history(client, auth_headers, profiling) for _ in range(3)]
+
+    listed = {profile["id"] for profile in client.get(PROFILES, headers=profiling).json()["profiles"]}
+    assert len(listed) == 2 and listed <= set(ids)
+
+
+def test_one_request_is_profiled_at_a_time(profiling):
+    profiler = profile_store.try_start()
+    try:
+        assert profile_store.try_start() is None
+    finally:
+        profile_store.finish(profiler, {}, [])
+
+    again = profile_store.try_start()
+    profile_store.finish(again, {}, [])
+    assert again is not None
+
+
+def test_credentials_are_dropped_from_query_strings():
+    assert _safe_query_string(b"") == ""
+    assert _safe_query_string(b"days=3&Token=abc&password=x&q=") == "days=3&q="
@@ -0,0 +1,156 @@
+"""
+Token buckets (memory and database backends) and all-or-nothing charging
+"""
+
+import asyncio
+import math
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from app.config import settings
+from app.services import rate_limiter as rate_limiter_module
+from app.services.rate_limiter import (
+    DatabaseBackend,
+    Limit,
+    MemoryBackend,
+    RateLimiter,
+    max_units,
+    retry_after_header,
+)
+
+LIMIT = Limit(capacity=10, refill_per_second=1)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable monotonic and wall clocks for the rate limiter module"""
+    now = [1_000_000.0]
+    monkeypatch.setattr(rate_limiter_module, "time", SimpleNamespace(monotonic=lambda: now[0], time=lambda: now[0]))
+    return now
+
+
+@pytest.fixture(params=["memory", "database"])
+def backend(request):
+    if request.param == "memory":
+        return MemoryBackend(max_keys=100)
+    return DatabaseBackend(prune_seconds=3600)
+
+
+@pytest.fixture
+def key() -> str:
+    return f"user:{uuid.uuid4().hex}"
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    """Small user and IP buckets, with limiting enabled"""
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(settings, "RATE_LIMIT_USER_CAPACITY", 10.0)
+    monkeypatch.setattr(settings, "RATE_LIMIT_USER_REFILL_PER_MINUTE", 60.0)
+    monkeypatch.setattr(settings, "RATE_LIMIT_IP_CAPACITY", 20.0)
+    monkeypatch.setattr(settings, "RATE_LIMIT_IP_REFILL_PER_MINUTE", 60.0)
+
+
+def test_new_bucket_starts_full(backend, key, clock):
+    assert backend.take(key, 4, LIMIT) == (True, 6)
+
+
+def test_short_bucket_denies_without_taking(backend, key, clock):
+    backend.take(key, 8, LIMIT)
+
+    granted, tokens = backend.take(key, 5, LIMIT)
+
+    assert not granted and tokens == pytest.approx(2)
+    assert backend.take(key, 2, LIMIT)[0]
+
+
+def test_bucket_refills_up_to_capacity(backend, key, clock):
+    backend.take(key, 10, LIMIT)
+    clock[0] += 3
+    assert backend.take(key, 3, LIMIT) == (True, pytest.approx(0))
+
+    clock[0] += 1000
+    assert backend.take(key, 0, LIMIT) == (True, pytest.approx(10))
+
+
+def test_refund_is_capped_at_capacity(backend, key, clock):
+    backend.take(key, 6, LIMIT)
+    backend.refund(key, 4, LIMIT)
+    backend.refund(key, 4, LIMIT)
+
+    assert backend.take(key, 0, LIMIT)[1] == pytest.approx(10)
+
+
+def test_memory_backend_forgets_least_recently_used(clock):
+    backend = MemoryBackend(max_keys=2)
+    backend.take("a", 10, LIMIT)
+    backend.take("b", 10, LIMIT)
+    backend.take("a", 0, LIMIT)
+    backend.take("c", 10, LIMIT)
+
+    assert backend.take("b", 10, LIMIT)[0]  # forgotten, so full again
+    assert not backend.take("c", 10, LIMIT)[0]
+
+
+def test_retry_after():
+    assert LIMIT.retry_after(tokens=2, cost=5) == 3
+    assert LIMIT.retry_after(tokens=8, cost=5) == 0
+    assert retry_after_header(0.2) == "1"
+    assert retry_after_header(2.1) == "3"
+
+
+def test_disabled_limiter_allows_everything(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+    limiter = RateLimiter(MemoryBackend(max_keys=10))
+
+    assert asyncio.run(limiter.check("photo", "1.2.3.4", 1, units=1000)) is None
+
+
+def test_user_and_ip_buckets_are_charged(limits, backend, clock):
+    limiter = RateLimiter(backend)
+    ip, user = uuid.uuid4().hex, uuid.uuid4().int % 10**9
+
+    assert asyncio.run(limiter.check("photo", ip, user)) is None  # costs 5
+    assert asyncio.run(limiter.check("photo", ip, user)) is None
+    scope, retry = asyncio.run(limiter.check("photo", ip, user))
+
+    assert scope == "user" and retry == pytest.approx(5)
+
+
+def test_denied_call_refunds_earlier_buckets(limits, backend, clock):
+    limiter = RateLimiter(backend)
+    ip = uuid.uuid4().hex
+    # Drain the IP bucket (20 tokens) through four different users
+    for user in range(4):
+        assert asyncio.run(limiter.check("photo", ip, 10_000 + user)) is None
+
+    user = 20_000 + uuid.uuid4().int % 10**6
+    scope, _ = asyncio.run(limiter.check("photo", ip, user))
+    assert scope == "ip"
+
+    # The user bucket kept its tokens: two full-price calls from another IP pass
+    other_ip = uuid.uuid4().hex
+    assert asyncio.run(limiter.check("photo", other_ip, user)) is None
+    assert asyncio.run(limiter.check("photo", other_ip, user)) is None
+
+
+def test_call_larger_than_a_bucket_is_refused_outright(limits, clock):
+    limiter = RateLimiter(MemoryBackend(max_keys=10))
+
+    scope, retry = asyncio.run(limiter.check("food", "1.2.3.4", 1, units=11))
+
+    assert scope == "user" and math.isinf(retry)
+    assert max_units("food", "user") == 10
+    assert max_units("photo", "ip") == 4
+    # Nothing was taken
+    assert asyncio.run(limiter.check("food", "1.2.3.4", 1, units=10)) is None
+
+
+def test_anonymous_calls_only_use_the_ip_bucket(limits, clock):
+    limiter = RateLimiter(MemoryBackend(max_keys=10))
+
+    for _ in range(4):
+        assert asyncio.run(limiter.check("photo", "5.6.7.8")) is None
+    assert asyncio.run(limiter.check("photo", "5.6.7.8"))[0] == "ip"
@@ -0,0 +1,151 @@
+"""
+Scheduler leases and the overnight weekly report precompute
+"""
+
+import asyncio
+import uuid
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import update
+
+from app.config import settings
+from app.database import session_scope
+from app.models.scheduler_lease import SchedulerLease
+from app.models.user import User
+from app.models.weekly_report import WeeklyReport
+from app.services import leader_lease as leader_lease_module
+from app.services.leader_lease import LeaderLease
+from app.services.report_scheduler import ReportScheduler
+from app.services.report_service import ReportService
+
+from conftest import add_meal
+
+
+@pytest.fixture
+def name() -> str:
+    return f"test:{uuid.uuid4().hex}"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable monotonic clock for the lease module"""
+    now = [1_000_000.0]
+    monkeypatch.setattr(leader_lease_module, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+@pytest.fixture
+def window(monkeypatch):
+    """Whole day off-peak, one report at a time"""
+    monkeypatch.setattr(settings, "REPORT_PRECOMPUTE_START_HOUR", 0)
+    monkeypatch.setattr(settings, "REPORT_PRECOMPUTE_END_HOUR", 24)
+    monkeypatch.setattr(settings, "REPORT_PRECOMPUTE_CONCURRENCY", 1)
+
+
+def _expire(name: str):
+    with session_scope() as db:
+        db.execute(update(SchedulerLease).where(SchedulerLease.name == name)
+                   .values(expires_at=datetime.utcnow() - timedelta(seconds=1)))
+        db.commit()
+
+
+def _scheduler(name: str, duration: float) -> ReportScheduler:
+    scheduler = ReportScheduler()
+    scheduler.lease = LeaderLease(name, duration)
+    return scheduler
+
+
+def _users_with_meals(week_start: date, count: int) -> list:
+    """Fresh users, each with an analyzed meal in the week"""
+    user_ids = []
+    for _ in range(count):
+        with session_scope() as db:
+            user = User(email=f"{uuid.uuid4().hex}@test.local", name="Test User", hashed_password="!")
+            db.add(user)
+            db.commit()
+            user_id = user.id
+        add_meal(user_id, week_start + timedelta(days=2), analyses=[{"health_score": 7, "calories": 1800}])
+        user_ids.append(user_id)
+    return user_ids
+
+
+def _stored(user_ids: list, week_start: date) -> set:
+    with session_scope() as db:
+        return {row.user_id for row in db.query(WeeklyReport.user_id).filter(
+            WeeklyReport.user_id.in_(user_ids), WeeklyReport.week_start == week_start
+        )}
+
+
+def test_one_holder_at_a_time(name):
+    first, second = LeaderLease(name, 300), LeaderLease(name, 300)
+
+    assert first.acquire()
+    assert not second.acquire() and not second.held
+    assert first.acquire()  # renewal by the holder
+
+
+def test_expired_lease_is_taken_over(name):
+    first, second = LeaderLease(name, 300), LeaderLease(name, 300)
+    first.acquire()
+    _expire(name)
+
+    assert second.acquire()
+    assert not first.acquire() and not first.held
+
+
+def test_release_hands_over_at_once(name):
+    first, second = LeaderLease(name, 300), LeaderLease(name, 300)
+    first.acquire()
+    first.release()
+
+    assert not first.held
+    assert second.acquire()
+
+
+def test_renew_writes_once_a_third_has_passed(name, clock):
+    lease, rival = LeaderLease(name, 300), LeaderLease(name, 300)
+    lease.acquire()
+    _expire(name)
+    rival.acquire()
+
+    clock[0] += 99
+    assert lease.renew()  # not checked yet: the lease it took is still valid
+    clock[0] += 2
+    assert not lease.renew()
+    assert rival.renew()
+
+
+def test_precompute_stores_every_pending_report(name, window):
+    week_start = date(2019, 1, 7)
+    user_ids = _users_with_meals(week_start, 3)
+    scheduler = _scheduler(name, 300)
+    scheduler.lease.acquire()
+
+    assert asyncio.run(scheduler.precompute(week_start))
+    assert _stored(user_ids, week_start) == set(user_ids)
+
+
+def test_lost_lease_stops_the_pass_and_the_new_holder_finishes(name, window, monkeypatch):
+    week_start = date(2019, 1, 14)
+    user_ids = _users_with_meals(week_start, 3)
+    # A zero duration makes every renewal hit the database
+    first, second = _scheduler(name, 0), _scheduler(name, 300)
+    first.lease.acquire()
+
+    build = ReportService.build_weekly_report
+
+    async def build_then_lose_lease(data, user_goals):
+        # Another replica takes over while the first report is being built
+        second.lease.acquire()
+        return await build(data, user_goals)
+
+    monkeypatch.setattr(ReportService, "build_weekly_report", staticmethod(build_then_lose_lease))
+    assert not asyncio.run(first.precompute(week_start))
+    assert len(_stored(user_ids, week_start)) == 1
+    assert not first.lease.held
+
+    monkeypatch.setattr(ReportService, "build_weekly_report", staticmethod(build))
+    assert asyncio.run(second.precompute(week_start))
+    assert _stored(user_ids, week_start) == set(user_ids)
@@ -0,0 +1,79 @@
+"""
+Versioned response cache: LRU eviction and per-user invalidation
+"""
+
+from app.services.response_cache import ResponseCache
+
+
+def test_get_returns_stored_body():
+    cache = ResponseCache(max_bytes=100, max_entry_bytes=50)
+    cache.set(1, '"a"', b"body")
+
+    assert cache.get(1, '"a"') == b"body"
+    assert cache.get(1, '"b"') is None
+    assert cache.get(2, '"a"') is None
+
+
+def test_oversized_entries_are_not_stored():
+    cache = ResponseCache(max_bytes=100, max_entry_bytes=10)
+    cache.set(1, '"a"', b"x" * 11)
+
+    assert cache.get(1, '"a"') is None
+    assert cache.size == 0
+
+
+def test_least_recently_used_is_evicted_first():
+    cache = ResponseCache(max_bytes=30, max_entry_bytes=10)
+    cache.set(1, '"a"', b"a" * 10)
+    cache.set(1, '"b"', b"b" * 10)
+    cache.set(2, '"c"', b"c" * 10)
+    cache.get(1, '"a"')
+
+    cache.set(2, '"d"', b"d" * 10)
+
+    assert cache.get(1, '"b"') is None
+    assert cache.get(1, '"a"') is not None
+    assert cache.get(2, '"c"') is not None
+    assert cache.size == 30 and len(cache) == 3
+
+
+def test_replacing_an_entry_keeps_size_accurate():
+    cache = ResponseCache(max_bytes=100, max_entry_bytes=50)
+    cache.set(1, '"a"', b"x" * 20)
+    cache.set(1, '"a"', b"y" * 5)
+
+    assert cache.size == 5 and len(cache) == 1
+    assert cache.get(1, '"a"') == b"y" * 5
+
+
+def test_invalidate_user_drops_only_their_entries():
+    cache = ResponseCache(max_bytes=100, max_entry_bytes=50)
+    cache.set(1, '"a"', b"aa")
+    cache.set(1, '"b"', b"bb")
+    cache.set(2, '"a"', b"cc")
+
+    cache.invalidate_user(1)
+
+    assert cache.get(1, '"a"') is None and cache.get(1, '"b"') is None
+    assert cache.get(2, '"a"') == b"cc"
+    assert cache.size == 2 and len(cache) == 1
+
+
+def test_invalidation_after_eviction_is_safe():
+    cache = ResponseCache(max_bytes=10, max_entry_bytes=10)
+    cache.set(1, '"a"', b"a" * 10)
+    cache.set(2, '"b"', b"b" * 10)  # evicts user 1's only entry
+
+    cache.invalidate_user(1)
+    cache.invalidate_user(2)
+
+    assert cache.size == 0 and len(cache) == 0
+
+
+def test_clear():
+    cache = ResponseCache(max_bytes=100, max_entry_bytes=50)
+    cache.set(1, '"a"', b"aa")
+    cache.clear()
+
+    assert cache.get(1, '"a"') is None
+    assert cache.size == 0
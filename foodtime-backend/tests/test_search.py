@@ -0,0 +1,113 @@
+"""
+Meal search query building and SQLite FTS5 results
+"""
+
+from datetime import date
+
+import pytest
+
+from app.database import session_scope
+from app.schemas.meal import MealCreate
+from app.services.meal_service import MealService
+from app.services.search_service import SearchService
+
+
+def test_sqlite_match_quotes_prefix_terms():
+    statement, params = SearchService._sqlite_query("Mercimek çorbası", True, "rank")
+
+    assert params == {"match": '"mercimek"* "çorbası"*'}
+    assert "bm25(meal_search" in statement
+    assert "mercimek" not in statement
+
+
+def test_sqlite_match_neutralises_fts_operators():
+    _, params = SearchService._sqlite_query('tavuk OR "pilav" NOT -ayran*', True, "rank")
+
+    assert params["match"] == '"tavuk"* "or"* "pilav"* "not"* "ayran"*'
+
+
+def test_sqlite_match_limited_to_meal_text():
+    statement, params = SearchService._sqlite_query("simit", False, "rank")
+
+    assert params["match"] == 'meal_text : ("simit"*)'
+    assert "snippet(meal_search, 2," in statement
+
+
+def test_sqlite_query_without_words():
+    assert SearchService._sqlite_query("  -- !! ", True, "rank") == (None, {})
+
+
+def test_sqlite_recent_order():
+    statement, _ = SearchService._sqlite_query("simit", True, "recent")
+
+    assert "ORDER BY m.meal_date DESC, m.id DESC" in statement
+
+
+def test_postgres_query_binds_user_input():
+    statement, params = SearchService._postgres_query("x'); DROP TABLE meals; --", True, "rank")
+
+    assert params == {"query": "x'); DROP TABLE meals; --"}
+    assert "DROP TABLE" not in statement
+    assert "websearch_to_tsquery" in statement
+    assert "ORDER BY rank DESC, meal_date DESC, meal_id DESC" in statement
+
+
+def test_postgres_meal_text_only_filters_weight_a():
+    statement, _ = SearchService._postgres_query("simit", False, "recent")
+
+    assert "ts_filter(s.document, '{a}')" in statement
+    assert "ORDER BY meal_date DESC, meal_id DESC" in statement
+
+
+@pytest.fixture
+def meals(user_id):
+    with session_scope() as db:
+        first = MealService.create_meal(db, MealCreate(
+            user_id=user_id, meal_date=date(2024, 3, 1), morning_meal="Irmik helvası", evening_meal="Mercimek çorbası"
+        ), notify=False).id
+        second = MealService.create_meal(db, MealCreate(
+            user_id=user_id, meal_date=date(2024, 3, 2), afternoon_meal="ızgara tavuk ve mercimek salatası"
+        ), notify=False).id
+    return first, second
+
+
+def _search(user_id: int, query: str, **options):
+    with session_scope() as db:
+        return SearchService.search(db, user_id, query, limit=10, **options)
+
+
+def test_search_finds_prefixes_and_highlights(user_id, meals):
+    rows, has_more = _search(user_id, "merc")
+
+    assert {row["meal_id"] for row in rows} == set(meals)
+    assert not has_more
+    assert all("«" in row["snippet"] for row in rows)
+
+
+def test_search_requires_every_word(user_id, meals):
+    rows, _ = _search(user_id, "mercimek tavuk")
+
+    assert [row["meal_id"] for row in rows] == [meals[1]]
+
+
+def test_search_folds_turkish_capitals(user_id, meals):
+    # "I" is the capital of "ı" in Turkish, not of "i"
+    rows, _ = _search(user_id, "IZGARA")
+
+    assert [row["meal_id"] for row in rows] == [meals[1]]
+
+
+def test_search_pages_and_order(user_id, meals):
+    rows, has_more = _search(user_id, "mercimek", order="recent")
+    assert [row["meal_id"] for row in rows] == [meals[1], meals[0]]
+
+    with session_scope() as db:
+        page, has_more = SearchService.search(db, user_id, "mercimek", limit=1, order="recent")
+    assert [row["meal_id"] for row in page] == [meals[1]] and has_more
+
+
+def test_search_is_scoped_to_the_user(meals):
+    with session_scope() as db:
+        rows, _ = SearchService.search(db, -1, "mercimek", limit=10)
+
+    assert rows == []
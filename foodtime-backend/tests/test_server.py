@@ -0,0 +1,64 @@
+"""
+Production server: worker count and the options handed to uvicorn
+"""
+
+import logging
+
+import pytest
+import uvicorn
+
+from app import server
+from app.config import settings
+
+POSTGRES_URL = "postgresql://foodtime@db/foodtime"
+
+
+@pytest.fixture
+def cpus(monkeypatch):
+    """16 CPUs, default pool sizes (15 connections per worker) and 90 connections"""
+    monkeypatch.setattr(server, "available_cpus", lambda: 16)
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 0)
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 5)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 10)
+    monkeypatch.setattr(settings, "DB_MAX_CONNECTIONS", 90)
+
+
+def test_workers_are_capped_by_database_connections(cpus, monkeypatch):
+    monkeypatch.setattr(settings, "DATABASE_URL", POSTGRES_URL)
+    assert server.resolve_workers() == 6
+
+    monkeypatch.setattr(settings, "DB_MAX_CONNECTIONS", 10)
+    assert server.resolve_workers() == 1
+
+
+def test_sqlite_uses_one_worker_per_cpu(cpus, monkeypatch):
+    monkeypatch.setattr(settings, "DATABASE_URL", "sqlite:///./foodtime.db")
+
+    assert server.resolve_workers() == 16
+
+
+def test_web_concurrency_wins(cpus, monkeypatch):
+    monkeypatch.setattr(settings, "DATABASE_URL", POSTGRES_URL)
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 8)
+
+    assert server.resolve_workers() == 8
+
+
+def test_main_runs_uvicorn_and_warns_about_oversubscription(cpus, monkeypatch, caplog):
+    runs = []
+    monkeypatch.setattr(uvicorn, "run", lambda app, **options: runs.append((app, options)))
+    monkeypatch.setattr(server, "configure_logging", lambda: None)
+    monkeypatch.setattr(settings, "DATABASE_URL", POSTGRES_URL)
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 8)
+    monkeypatch.setattr(settings, "FORWARDED_ALLOW_IPS", "127.0.0.1")
+    caplog.set_level(logging.INFO, logger="app.server")
+
+    assert server.main() == 0
+
+    (app, options), = runs
+    assert app == "app.main:app"
+    assert options["workers"] == 8
+    assert options["proxy_headers"] and options["forwarded_allow_ips"] == "127.0.0.1"
+    assert options["log_config"] is None
+    assert "up to 120 DB connections" in caplog.text
+    assert "exceeds DB_MAX_CONNECTIONS=90" in caplog.text
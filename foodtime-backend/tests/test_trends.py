@@ -0,0 +1,140 @@
+"""
+Vectorized trend maths and the trends computation over stored meals
+"""
+
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from app.services.trends_service import TrendsService
+
+from conftest import add_meal
+
+nan = np.nan
+
+
+def _listed(values):
+    return [None if value != value else value for value in values.tolist()]
+
+
+def test_rolling_mean_skips_missing_days():
+    values = np.array([2.0, nan, 4.0, nan, nan, nan, 6.0])
+
+    means = TrendsService.rolling_mean(values, 3)
+
+    assert _listed(means) == [2.0, 2.0, 3.0, 4.0, 4.0, None, 6.0]
+
+
+def test_rolling_mean_window_longer_than_series():
+    values = np.array([1.0, 2.0, 3.0])
+
+    assert _listed(TrendsService.rolling_mean(values, 30)) == [1.0, 1.5, 2.0]
+
+
+def test_rolling_mean_matches_naive_computation():
+    rng = np.random.default_rng(7)
+    values = rng.uniform(0, 10, 200)
+    values[rng.random(200) < 0.3] = nan
+
+    means = TrendsService.rolling_mean(values, 7)
+
+    for day in range(200):
+        window = values[max(day - 6, 0):day + 1]
+        expected = np.nanmean(window) if (~np.isnan(window)).any() else nan
+        assert means[day] == pytest.approx(expected, nan_ok=True)
+
+
+def test_weekly_slope():
+    days = np.arange(30, dtype=float)
+    values = 5 + 0.5 * days
+    values[::3] = nan
+
+    assert TrendsService.weekly_slope(values) == 3.5
+    assert TrendsService.weekly_slope(np.full(10, 4.0)) == 0.0
+    assert TrendsService.weekly_slope(np.array([1.0, nan, nan])) is None
+
+
+def test_weekly_slope_never_negative_zero():
+    assert str(TrendsService.weekly_slope(np.array([3.0, 3.0, 3.0 - 1e-12]))) == "0.0"
+
+
+def test_target_ratio():
+    values = np.array([1500.0, nan, 2500.0])
+
+    assert TrendsService.target_ratio(values, 2000) == 100.0
+    assert TrendsService.target_ratio(values, None) is None
+    assert TrendsService.target_ratio(values, 0) is None
+    assert TrendsService.target_ratio(np.full(3, nan), 2000) is None
+
+
+def test_macro_shares():
+    shares = TrendsService.macro_shares(np.array([100.0, nan]), np.array([200.0, nan]), np.array([nan, 400 / 9]))
+
+    assert (shares.protein, shares.carbs, shares.fat) == (25.0, 50.0, 25.0)
+    empty = TrendsService.macro_shares(np.full(2, nan), np.full(2, nan), np.full(2, nan))
+    assert (empty.protein, empty.carbs, empty.fat) == (None, None, None)
+
+
+def test_weekday_patterns():
+    start = date(2024, 1, 1)  # a Monday
+    logged = np.zeros(14, dtype=bool)
+    logged[[0, 7, 2]] = True
+    score = np.full(14, nan)
+    score[[0, 7, 2]] = [6.0, 8.0, 5.0]
+    calories = np.full(14, nan)
+    calories[[0, 2]] = [1800.0, 2200.0]
+
+    patterns = TrendsService.weekday_patterns(start, logged, score, calories)
+
+    assert [pattern.weekday for pattern in patterns] == list(range(7))
+    assert (patterns[0].logged_days, patterns[0].health_score, patterns[0].calories) == (2, 7.0, 1800.0)
+    assert (patterns[2].logged_days, patterns[2].health_score, patterns[2].calories) == (1, 5.0, 2200.0)
+    assert (patterns[4].logged_days, patterns[4].health_score, patterns[4].calories) == (0, None, None)
+
+
+def test_weekday_patterns_start_mid_week():
+    start = date(2024, 1, 3)  # a Wednesday
+    logged = np.array([True, False])
+    patterns = TrendsService.weekday_patterns(start, logged, np.array([9.0, nan]), np.array([nan, nan]))
+
+    assert patterns[2].logged_days == 1 and patterns[2].health_score == 9.0
+
+
+def test_compute_trends_over_stored_meals(user_id):
+    today = date(2024, 6, 30)
+    add_meal(user_id, today - timedelta(days=9), analyses=[
+        {"health_score": 6, "calories": 1800, "protein": 90, "carbs": 200, "fat": 60}
+    ])
+    add_meal(user_id, today - timedelta(days=2), analyses=[
+        {"health_score": 8, "calories": 1000, "protein": 50, "carbs": 100, "fat": 30},
+        {"health_score": 0, "calories": 1200, "protein": 40, "carbs": 150, "fat": 40},
+    ])
+    add_meal(user_id, today)  # logged without an analysis
+    add_meal(user_id, today - timedelta(days=20), analyses=[{"health_score": 1}])  # outside the period
+
+    trends = TrendsService.compute_trends(
+        user_id, 10, {"calories": 2000, "protein": 100, "carbs": None, "fat": 70}, today=today
+    )
+
+    assert (trends.start, trends.end, trends.days, trends.logged_days) == (today - timedelta(days=9), today, 10, 3)
+    assert len(trends.series.dates) == 10
+    # Zero scores do not count towards the daily average
+    assert trends.series.health_score == [6.0] + [None] * 6 + [8.0, None, None]
+    assert trends.series.calories == [1800.0] + [None] * 6 + [2200.0, None, None]
+    assert trends.series.health_score_7d[-1] == 8.0
+    assert trends.series.health_score_30d[-1] == 7.0
+    assert trends.slopes.health_score_per_week == 2.0
+    assert trends.target_ratios.calories == 100.0
+    assert trends.target_ratios.protein == 90.0
+    assert trends.target_ratios.carbs is None
+    assert trends.weekdays[today.weekday()].logged_days == 1
+
+
+def test_compute_trends_without_meals(user_id):
+    trends = TrendsService.compute_trends(user_id, 5, {"calories": 2000}, today=date(2024, 6, 30))
+
+    assert trends.logged_days == 0
+    assert trends.series.health_score == [None] * 5
+    assert trends.slopes.health_score_per_week is None
+    assert trends.macro_shares.protein is None
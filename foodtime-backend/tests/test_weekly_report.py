@@ -0,0 +1,59 @@
+"""
+Weekly report statistics and their statement count
+"""
+
+from datetime import date, timedelta
+
+from sqlalchemy import event
+
+from app.database import engine
+from app.services.report_service import ReportService
+
+from conftest import add_meal
+
+WEEK_START = date(2024, 1, 8)  # a Monday
+
+
+def _collect(user_id: int):
+    """collect_weekly_data and the number of SQL statements it ran"""
+    statements = []
+
+    def count(*args):
+        statements.append(args[2])
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        data = ReportService.collect_weekly_data(user_id, WEEK_START)
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    return data, len(statements)
+
+
+def test_week_is_compared_with_the_previous_one(user_id):
+    add_meal(user_id, WEEK_START, analyses=[{"health_score": 8, "calories": 2100}])
+    add_meal(user_id, WEEK_START + timedelta(days=3), analyses=[{"health_score": 9, "calories": 2100}])
+    for day in range(3):
+        add_meal(user_id, WEEK_START - timedelta(days=7 - day), analyses=[{"health_score": 5, "calories": 200}])
+
+    data, _ = _collect(user_id)
+
+    assert data["total_meals"] == 2
+    assert data["avg_health_score"] == 8.5
+    assert data["avg_calories_per_day"] == 600
+    assert data["health_score_trend"] == "improving"
+    assert data["calorie_trend"] == "increasing"
+    assert (data["best_day"], data["worst_day"]) == (WEEK_START + timedelta(days=3), WEEK_START)
+
+
+def test_statements_do_not_grow_with_meals(user_id):
+    add_meal(user_id, WEEK_START, analyses=[{"health_score": 7}])
+    add_meal(user_id, WEEK_START - timedelta(days=7), analyses=[{"health_score": 7}])
+    _, few = _collect(user_id)
+
+    for day in range(1, 7):
+        add_meal(user_id, WEEK_START + timedelta(days=day), analyses=[{"health_score": 6}] * 2)
+        add_meal(user_id, WEEK_START - timedelta(days=7 - day), analyses=[{"health_score": 6}] * 2)
+    data, many = _collect(user_id)
+
+    assert data["total_meals"] == 7
+    assert many == few
@@ -1,11 +1,40 @@
 import { useEffect, useState } from 'react';
 import { LineChart, Line, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer } from 'recharts';
-import { api } from '../services/api';
+import { api, liveEvents } from '../services/api';
 import StatCard from './StatCard';
 import NutritionProgress from './NutritionProgress';
 import RecentMealCard from './RecentMealCard';
 import './Dashboard.css';
 
+// Wait for a burst of change events to settle before refetching
+const REFETCH_DELAY_MS = 300;
+
+const round1 = (value) => Math.round(value * 10) / 10;
+
+// Patch dashboard stats in place from an "analysis.completed" event
+const applyAnalysisEvent = (stats, event) => {
+    const score = event.day_health_score;
+    const weekTrend = stats.week_trend.map((day) =>
+        day.date === event.meal_date ? { ...day, score } : day
+    );
+    const weekScores = weekTrend.map((day) => day.score).filter((value) => value > 0);
+    const weekAvg = weekScores.length
+        ? round1(weekScores.reduce((sum, value) => sum + value, 0) / weekScores.length)
+        : 0;
+
+    return {
+        ...stats,
+        today: stats.today.date === event.meal_date
+            ? { ...stats.today, health_score: score }
+            : stats.today,
+        week_trend: weekTrend,
+        recent_meals: stats.recent_meals.map((meal) =>
+            meal.id === event.meal_id ? { ...meal, description: event.description } : meal
+        ),
+        summary: { ...stats.summary, week_avg: weekAvg },
+    };
+};
+
 function Dashboard() {
     const [stats, setStats] = useState(null);
     const [loading, setLoading] = useState(true);
@@ -13,6 +42,31 @@ function Dashboard() {
 
     useEffect(() => {
         fetchDashboardStats();
+
+        // Live updates: patch scores from analysis events, refetch for anything else
+        let refetchTimer = null;
+        let connected = false;
+        const scheduleRefetch = () => {
+            clearTimeout(refetchTimer);
+            refetchTimer = setTimeout(fetchDashboardStats, REFETCH_DELAY_MS);
+        };
+
+        const unsubscribe = liveEvents.subscribe((type, data) => {
+            if (type === 'ready') {
+                // Reconnected: changes may have been missed in between
+                if (connected) scheduleRefetch();
+                connected = true;
+            } else if (type === 'analysis.completed' && !data.meal_created) {
+                setStats((current) => (current ? applyAnalysisEvent(current, data) : current));
+            } else {
+                scheduleRefetch();
+            }
+        });
+
+        return () => {
+            clearTimeout(refetchTimer);
+            unsubscribe();
+        };
     }, []);
 
     const fetchDashboardStats = async () => {
@@ -1,13 +1,44 @@
 import { useEffect, useState } from 'react';
-import { api } from '../services/api';
+import { api, liveEvents } from '../services/api';
 import './NutritionProgress.css';
 
+const MACROS = ['calories', 'protein', 'carbs', 'fat'];
+
+const round1 = (value) => Math.round(value * 10) / 10;
+
+// Add an "analysis.completed" event's macros to today's totals
+const applyAnalysisEvent = (nutrition, event) => {
+    const consumed = {};
+    const percentages = {};
+    MACROS.forEach((macro) => {
+        consumed[macro] = round1(nutrition.consumed[macro] + (event[macro] || 0));
+        const target = nutrition.targets[macro];
+        percentages[macro] = target > 0 ? round1((consumed[macro] / target) * 100) : 0;
+    });
+    return { ...nutrition, consumed, percentages };
+};
+
 function NutritionProgress() {
     const [nutrition, setNutrition] = useState(null);
     const [loading, setLoading] = useState(true);
 
     useEffect(() => {
         fetchNutrition();
+
+        let connected = false;
+        const unsubscribe = liveEvents.subscribe((type, data) => {
+            if (type === 'ready') {
+                // Reconnected: changes may have been missed in between
+                if (connected) fetchNutrition();
+                connected = true;
+            } else if (type === 'analysis.completed') {
+                setNutrition((current) => (current ? applyAnalysisEvent(current, data) : current));
+            } else {
+                fetchNutrition();
+            }
+        });
+
+        return unsubscribe;
     }, []);
 
     const fetchNutrition = async () => {
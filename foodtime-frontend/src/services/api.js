@@ -66,6 +66,14 @@ export const userAPI = {
 export const mealAPI = {
     create: (mealData) => api.post('/meals', mealData),
     getHistory: (limit = 10) => api.get(`/meals/history?limit=${limit}`),
+    getHistoryPage: ({ cursor, limit, fromDate, toDate } = {}) =>
+        api.get('/meals/history/page', {
+            params: { cursor, limit, from_date: fromDate, to_date: toDate },
+        }),
+    search: (q, { limit, offset, includeAnalysis, order } = {}) =>
+        api.get('/meals/search', {
+            params: { q, limit, offset, include_analysis: includeAnalysis, order },
+        }),
     getByDate: (date) => api.get(`/meals/date/${date}`),
     delete: (mealId) => api.delete(`/meals/${mealId}`),
 };
@@ -78,6 +86,51 @@ export const analysisAPI = {
     analyzeFood: (foodDescription) => api.post('/analysis/food', { food_description: foodDescription }),
     analyzePhoto: (imageBase64, mimeType = 'image/jpeg') =>
         api.post('/analysis/photo', { image_base64: imageBase64, mime_type: mimeType }),
+    analyzeFoodBatch: (foodDescriptions) =>
+        api.post('/analysis/food/batch', { food_descriptions: foodDescriptions }),
+    analyzePhotoBatch: (images) =>
+        api.post('/analysis/photo/batch', {
+            images: images.map(({ imageBase64, mimeType = 'image/jpeg' }) => ({
+                image_base64: imageBase64,
+                mime_type: mimeType,
+            })),
+        }),
+};
+
+// Live updates (server-sent events)
+// One EventSource is shared by all subscribed components and closed when
+// the last one unsubscribes. EventSource cannot send headers, so the token
+// goes in the query string.
+const EVENT_TYPES = ['ready', 'sync', 'analysis.completed', 'meal.created', 'meal.updated', 'meal.deleted'];
+const eventListeners = new Set();
+let eventSource = null;
+
+const openEventSource = () => {
+    const token = localStorage.getItem('foodtime_token');
+    if (!token || typeof EventSource === 'undefined') return;
+
+    const baseURL = api.defaults.baseURL.replace(/\/$/, '');
+    eventSource = new EventSource(`${baseURL}/events/stream?token=${encodeURIComponent(token)}`);
+    EVENT_TYPES.forEach((type) => {
+        eventSource.addEventListener(type, (message) => {
+            const data = message.data ? JSON.parse(message.data) : {};
+            eventListeners.forEach((listener) => listener(type, data));
+        });
+    });
+};
+
+export const liveEvents = {
+    subscribe: (listener) => {
+        eventListeners.add(listener);
+        if (!eventSource) openEventSource();
+        return () => {
+            eventListeners.delete(listener);
+            if (eventListeners.size === 0 && eventSource) {
+                eventSource.close();
+                eventSource = null;
+            }
+        };
+    },
 };
 
 export default api;